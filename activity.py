@@ -0,0 +1,272 @@
+import argparse
+import json
+import os
+import re
+from datetime import date
+
+# Miles per unit shown in the activity list
+DISTANCE_UNITS = {"mi": 1.0, "km": 0.621371}
+
+MONTH_NUMBERS = {
+    'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+    'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
+}
+MONTH_ABBREVIATIONS = {number: name for name, number in MONTH_NUMBERS.items()}
+
+_DISTANCE = re.compile(r"\s*(\d+(?:\.\d*)?|\.\d+)\s*([A-Za-z]+)\s*$")
+_EXPORT_DATE = re.compile(r"\s*(\d{1,2})/(\d{1,2})/(\d{2}|\d{4})\s*$")
+# The trailing "mm/dd" or day token; weekday and month names before it ("Sat, Jan 4") are ignored
+_LIST_DATE = re.compile(r"(?:^|[\s,])(?:(\d{1,2})/(\d{1,2})|(\d{1,2}))\s*$")
+
+
+def parse_distance(text):
+    """Miles in a list distance such as "2.19 mi" or "5 km", or None."""
+    match = _DISTANCE.match(text or "")
+    if not match:
+        return None
+    factor = DISTANCE_UNITS.get(match.group(2).lower())
+    return float(match.group(1)) * factor if factor else None
+
+
+def parse_list_date(text, month_part, year_part):
+    """date of a list row ("mm/dd", "Jan 15", "Sat, Jan 4" or "15") in the month tab being scanned, or None."""
+    match = _LIST_DATE.search(text or "")
+    if not match:
+        return None
+    month, day = (match.group(1), match.group(2)) if match.group(1) else (MONTH_NUMBERS.get(month_part), match.group(3))
+    try:
+        return date(int(year_part), int(month), int(day))
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_export_date(text):
+    """date of an exported mm/dd/yy date, or None."""
+    match = _EXPORT_DATE.match(text or "")
+    if not match:
+        return None
+    month, day, year = (int(part) for part in match.groups())
+    try:
+        return date(year if year >= 100 else 2000 + year, month, day)
+    except ValueError:
+        return None
+
+
+def parse_duration_seconds(text):
+    """Seconds in "H:MM:SS", "MM:SS" or "SS", or None for "N/A" and other unparseable values."""
+    if not text:
+        return None
+    try:
+        parts = [int(part) for part in text.strip().split(":")]
+    except ValueError:
+        return None
+    if len(parts) > 3:
+        return None
+    seconds = 0
+    for part in parts:
+        seconds = seconds * 60 + part
+    return seconds
+
+
+def format_duration(seconds, hours=True):
+    """Inverse of parse_duration_seconds, in the site's "MM:SS" / "H:MM:SS" form.
+
+    Paces are shown as minutes only (e.g. "164:03"), so pass hours=False for them.
+    """
+    if seconds is None:
+        return "N/A"
+    minutes, secs = divmod(int(seconds), 60)
+    if hours and minutes >= 60:
+        hour_count, minutes = divmod(minutes, 60)
+        return f"{hour_count}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
+
+
+def format_export_date(day):
+    """mm/dd/yy, the date format of data.json."""
+    return day.strftime("%m/%d/%y")
+
+
+def month_key(year, month):
+    """YYYY-MM, the identity of a scanned month across years."""
+    return f"{year:04d}-{month:02d}"
+
+
+def parse_month_key(key):
+    """(year, month) of a YYYY-MM month key."""
+    year, month = key.split("-")
+    return int(year), int(month)
+
+
+def month_tab_date(key):
+    """data-date of the activity list tab for a month key, e.g. "Jan-01-2025"."""
+    year, month = parse_month_key(key)
+    return f"{MONTH_ABBREVIATIONS[month]}-01-{year}"
+
+
+class Activity:
+    """One activity with typed fields: a date, miles, and durations in whole seconds.
+
+    data.json keeps its string form (mm/dd/yy dates, "MM:SS" durations) for the
+    dashboard; Activity is what the scraper and export work with in between.
+    """
+
+    __slots__ = ("date", "distance", "type", "seconds", "pace_seconds", "url")
+
+    def __init__(self, date, distance, type, seconds=None, pace_seconds=None, url=None):
+        self.date = date
+        self.distance = distance
+        self.type = type
+        self.seconds = seconds
+        self.pace_seconds = pace_seconds
+        self.url = url
+
+    def __repr__(self):
+        return (f"Activity({self.date.isoformat()}, {self.distance}, {self.type!r}, "
+                f"seconds={self.seconds}, pace_seconds={self.pace_seconds})")
+
+    def __eq__(self, other):
+        if not isinstance(other, Activity):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    @property
+    def iso_date(self):
+        return self.date.isoformat()
+
+    @classmethod
+    def from_row(cls, row, details, month_part, year_part):
+        """Build from an activity list row and its {"duration", "pace"} details.
+
+        Raises:
+            ValueError: If the row's date cannot be placed in the scanned month
+        """
+        day = parse_list_date(row["date_text"], month_part, year_part)
+        if day is None:
+            raise ValueError(f"Unparseable date {row['date_text']!r} in {month_part} {year_part}")
+        return cls(
+            day,
+            parse_distance(row["distance_text"]),
+            row["type"],
+            parse_duration_seconds(details.get("duration")),
+            parse_duration_seconds(details.get("pace")),
+            row.get("url"),
+        )
+
+    @classmethod
+    def from_dict(cls, record):
+        """Build from an exported record (see to_dict).
+
+        Raises:
+            ValueError: If the date is not mm/dd/yy or the distance is not a number
+        """
+        day = parse_export_date(record.get("date"))
+        if day is None:
+            raise ValueError(f"Unparseable date {record.get('date')!r}")
+        distance = record.get("distance")
+        if distance is not None and not isinstance(distance, (int, float)):
+            raise ValueError(f"Non-numeric distance {distance!r}")
+        return cls(
+            day,
+            float(distance) if distance is not None else None,
+            record.get("type") or "",
+            parse_duration_seconds(record.get("duration")),
+            parse_duration_seconds(record.get("pace")),
+            record.get("url"),
+        )
+
+    def to_dict(self):
+        """Record in the data.json format; "N/A" for missing durations."""
+        record = {
+            "date": format_export_date(self.date),
+            "distance": self.distance,
+            "type": self.type,
+            "duration": format_duration(self.seconds),
+            "pace": format_duration(self.pace_seconds, hours=False),
+        }
+        if self.url:
+            record["url"] = self.url
+        return record
+
+    def problems(self):
+        """Validation messages for values the dashboard cannot use (empty when valid)."""
+        problems = []
+        if self.distance is None:
+            problems.append("missing distance")
+        elif self.distance < 0:
+            problems.append(f"negative distance {self.distance}")
+        if not self.type:
+            problems.append("missing type")
+        if self.seconds is None:
+            problems.append("missing duration")
+        if self.pace_seconds is None:
+            problems.append("missing pace")
+        return problems
+
+
+def normalize_activities(records):
+    """Parse exported records in one pass, sorted by date.
+
+    Returns:
+        tuple: (activities, rejected) where rejected lists (record, reason) for
+        records whose date or distance cannot be parsed
+    """
+    activities = []
+    rejected = []
+    for record in records:
+        try:
+            activities.append(Activity.from_dict(record))
+        except ValueError as e:
+            rejected.append((record, str(e)))
+    activities.sort(key=lambda activity: activity.date)
+    return activities, rejected
+
+
+def migrate_file(filename="data.json", write=False):
+    """Normalize and validate every activity in an exported data file.
+
+    Each record is parsed into an Activity and written back in canonical form
+    (zero-padded dates, "N/A" for missing durations, sorted by date). Records
+    whose date or distance cannot be parsed are reported and kept unchanged
+    after the parsed ones, as export_to_json does. Runner stats are left to
+    the next export.
+
+    Returns:
+        dict: Counts of "activities", "changed", "rejected" and "warnings"
+    """
+    with open(filename, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    counts = {"activities": 0, "changed": 0, "rejected": 0, "warnings": 0}
+    for runner, runner_data in data.get("runners", {}).items():
+        records = runner_data.get("activities", [])
+        activities, rejected = normalize_activities(records)
+        for record, reason in rejected:
+            print(f"{runner}: rejected {record}: {reason}")
+        for activity in activities:
+            for problem in activity.problems():
+                print(f"{runner}: {activity.iso_date} {activity.type}: {problem}")
+                counts["warnings"] += 1
+        normalized = [activity.to_dict() for activity in activities] + [record for record, _ in rejected]
+        counts["activities"] += len(records)
+        counts["rejected"] += len(rejected)
+        counts["changed"] += sum(1 for old, new in zip(records, normalized) if old != new)
+        runner_data["activities"] = normalized
+
+    if write and counts["changed"]:
+        tmp_filename = f"{filename}.tmp"
+        with open(tmp_filename, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_filename, filename)
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate (and optionally normalize) the activities in data.json.")
+    parser.add_argument("file", nargs="?", default="data.json")
+    parser.add_argument("--write", action="store_true", help="Rewrite the file in canonical form")
+    args = parser.parse_args()
+    result = migrate_file(args.file, args.write)
+    print(f"{result['activities']} activities: {result['changed']} to normalize, "
+          f"{result['rejected']} rejected, {result['warnings']} warnings"
+          + (" (written)" if args.write and result["changed"] else ""))
@@ -0,0 +1,178 @@
+import html
+import http.client
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from rate_limiter import is_throttled, rate_limiter
+from tracing import tracer
+
+# Number of detail pages fetched at once across all users
+DETAIL_WORKERS = int(os.getenv("DETAIL_WORKERS", "8"))
+DETAIL_TIMEOUT = 10  # Seconds per HTTP request
+# Times a throttled (429/5xx) detail request is sent again, after the rate limiter's pause, before giving up
+DETAIL_THROTTLE_RETRIES = int(os.getenv("DETAIL_THROTTLE_RETRIES", "3"))
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0"
+)
+
+# Duration and pace are rendered as "<div id="totalDuration"><h1><span>12:40</span>"
+_STAT_PATTERNS = {
+    "duration": re.compile(
+        r'id="totalDuration"[^>]*>.*?<h1[^>]*>\s*<span[^>]*>(.*?)</span>',
+        re.DOTALL,
+    ),
+    "pace": re.compile(
+        r'id="averagePace"[^>]*>.*?<h1[^>]*>\s*<span[^>]*>(.*?)</span>',
+        re.DOTALL,
+    ),
+}
+_TAG_PATTERN = re.compile(r"<[^>]+>")
+
+
+def parse_activity_details(page_html):
+    """Extract duration and pace from an activity detail page.
+
+    Returns:
+        dict: {"duration": ..., "pace": ...}, or None if the page does not contain
+        the stats (e.g. they are rendered client-side).
+    """
+    details = {}
+    for field, pattern in _STAT_PATTERNS.items():
+        match = pattern.search(page_html)
+        if not match:
+            return None
+        value = html.unescape(_TAG_PATTERN.sub("", match.group(1))).strip()
+        if not value:
+            return None
+        details[field] = value
+    return details
+
+
+class DetailFetcher:
+    """Fetches activity detail pages over a bounded pool of keep-alive HTTP connections.
+
+    Each worker thread owns one persistent connection per host, so at most
+    ``max_workers`` detail requests are in flight at any time, shared by every
+    user being scraped.
+    """
+
+    def __init__(self, cookie, max_workers=DETAIL_WORKERS, timeout=DETAIL_TIMEOUT):
+        """
+        Args:
+            cookie (dict): Cookie as returned by format_cookie_for_playwright
+            max_workers (int): Maximum number of concurrent detail requests
+            timeout (float): Socket timeout in seconds
+        """
+        self.timeout = timeout
+        self.cookie_header = ""
+        if cookie and cookie.get("name") and cookie.get("value"):
+            self.cookie_header = f"{cookie['name']}={cookie['value']}"
+        self._local = threading.local()
+        self._open_connections = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="detail"
+        )
+
+    def _connection(self, scheme, host):
+        """Return this thread's persistent connection to host, creating it if needed."""
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+        key = (scheme, host)
+        if key not in connections:
+            connection_class = (
+                http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            )
+            connections[key] = connection_class(host, timeout=self.timeout)
+            with self._lock:
+                self._open_connections.append(connections[key])
+        return connections[key]
+
+    def _drop_connection(self, scheme, host):
+        connections = getattr(self._local, "connections", {})
+        connection = connections.pop((scheme, host), None)
+        if connection:
+            connection.close()
+            with self._lock:
+                self._open_connections.remove(connection)
+
+    def _request(self, scheme, host, path, headers):
+        """Send one GET through the rate limiter. Returns (response, body)."""
+        # A pooled connection may have been closed by the server; retry once on a fresh one
+        for attempt in range(2):
+            connection = self._connection(scheme, host)
+            rate_limiter.acquire("detail")
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                return response, response.read()
+            except (http.client.HTTPException, ConnectionError, OSError):
+                self._drop_connection(scheme, host)
+                if attempt:
+                    raise
+
+    def fetch_html(self, url):
+        """GET a page and return its body as text. Raises on non-200 responses.
+
+        A throttled response is not final: observe() has paused the rate
+        limiter, so the request is sent again once the pause is over, up to
+        DETAIL_THROTTLE_RETRIES times, rather than handing the page to the
+        browser fallback.
+        """
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        headers = {
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml",
+            "Connection": "keep-alive",
+        }
+        if self.cookie_header:
+            headers["Cookie"] = self.cookie_header
+
+        for _ in range(DETAIL_THROTTLE_RETRIES + 1):
+            response, body = self._request(parts.scheme, parts.netloc, path, headers)
+            rate_limiter.observe(response.status, response.getheader("Retry-After"))
+            if not is_throttled(response.status):
+                break
+
+        if response.status != 200:
+            raise http.client.HTTPException(f"HTTP {response.status} for {url}")
+        charset = response.headers.get_content_charset() or "utf-8"
+        return body.decode(charset, errors="replace")
+
+    def fetch_details(self, url, parent_span=None):
+        """Fetch and parse one activity. Returns None if the page could not be used."""
+        with tracer.span("activity_http", parent=parent_span) as activity_span:
+            try:
+                details = parse_activity_details(self.fetch_html(url))
+            except Exception:
+                details = None
+            if details is None:
+                activity_span["outcome"] = "unparsed"
+            return details
+
+    def fetch_many(self, urls):
+        """Fetch details for several activities concurrently.
+
+        Returns:
+            dict: Mapping of url to details dict, or None for pages that need the
+            browser fallback.
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        # Worker threads don't share the caller's span context, so pass the parent along
+        parent_span = tracer.current_id()
+        results = self._executor.map(lambda url: self.fetch_details(url, parent_span), unique_urls)
+        return dict(zip(unique_urls, results))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for connection in self._open_connections:
+                connection.close()
+            self._open_connections.clear()
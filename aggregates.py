@@ -0,0 +1,326 @@
+import json
+import os
+import re
+from datetime import date, timedelta
+
+from activity import parse_export_date, parse_list_date
+
+# Derived artifact written next to data.json with --aggregates
+AGGREGATES_PATH = "aggregates.json"
+AGGREGATES_SCHEMA = "run300.aggregates"
+AGGREGATES_VERSION = 1
+GROUPINGS = ["day", "week", "month"]
+QUARTERS = [1, 2, 3, 4]
+
+_LEADING_INT = re.compile(r"\s*([+-]?\d+)")
+
+
+def _int_part(text):
+    """parseInt(text) || 0"""
+    match = _LEADING_INT.match(text)
+    return int(match.group(1)) if match else 0
+
+
+def time_to_minutes(text):
+    """Minutes in "H:MM:SS", "MM:SS" or "M" (same rules as parseTimeToMinutes in index.html)."""
+    if not text:
+        return 0
+    parts = [_int_part(part) for part in text.split(":")]
+    if len(parts) == 3:
+        return parts[0] * 60 + parts[1] + parts[2] / 60
+    if len(parts) == 2:
+        return parts[0] + parts[1] / 60
+    return parts[0]
+
+
+def time_to_seconds(text):
+    """Seconds in "H:MM:SS", "MM:SS" or "S" (same rules as parseTimeToSeconds in index.html)."""
+    if not text:
+        return 0
+    parts = [_int_part(part) for part in text.split(":")]
+    if len(parts) == 3:
+        return parts[0] * 3600 + parts[1] * 60 + parts[2]
+    if len(parts) == 2:
+        return parts[0] * 60 + parts[1]
+    return parts[0]
+
+
+def parse_activity_date(text, default_year=None):
+    """date for "mm/dd/yy" (or "mm/dd" in default_year), or None."""
+    day = parse_export_date(text)
+    if day is None and default_year:
+        day = parse_list_date(text, None, default_year)
+    return day
+
+
+def quarter_of(day):
+    return (day.month - 1) // 3 + 1
+
+
+def quarter_range(quarter, year):
+    """First and last day of a quarter."""
+    start = date(year, (quarter - 1) * 3 + 1, 1)
+    end = date(year + 1, 1, 1) if quarter == 4 else date(year, quarter * 3 + 1, 1)
+    return start, end - timedelta(days=1)
+
+
+def _distance(activity):
+    return float(activity["distance"]) if activity.get("distance") else 0.0
+
+
+def group_by_period(activities, grouping):
+    """Port of groupDataByPeriod: {"date", "distance", "activities"} per week (Monday) or month."""
+    grouped = {}
+    for activity in activities:
+        day = activity["parsedDate"]
+        if grouping == "week":
+            key = (day - timedelta(days=day.weekday())).isoformat()
+        else:
+            key = f"{day.year}-{day.month:02d}"
+        group = grouped.setdefault(key, {"date": key, "distance": 0.0, "activities": []})
+        group["distance"] += _distance(activity)
+        group["activities"].append(activity)
+    return [grouped[key] for key in sorted(grouped)]
+
+
+def _max_by(items, value):
+    """First item with the strictly largest positive value (the dashboard's reduce semantics)."""
+    best, best_value = None, 0
+    for item in items:
+        item_value = value(item)
+        if item_value > best_value:
+            best, best_value = item, item_value
+    return best
+
+
+def _point(x, y, gain=0, period_key=None, is_best=False):
+    """Chart point; periodKey is null for the synthetic start points (hasActivity false)."""
+    point = {"x": x.isoformat(), "y": round(y, 2), "gain": round(gain, 2), "periodKey": period_key}
+    if is_best:
+        point["isLongestRun"] = True
+    return point
+
+
+def cumulative_series(activities, grouping, year):
+    """Cumulative distance points for one runner, as drawn by loadAndProcessData.
+
+    Daily: one point per activity; the farthest activity is flagged. Weekly and
+    monthly: one point at the end of each period (Sunday / last day of month);
+    the period with the most miles is flagged. Every series starts at Jan 1 with 0.
+    """
+    points = [_point(date(year, 1, 1), 0)]
+    cumulative = 0.0
+    if grouping == "day":
+        longest = _max_by(activities, _distance)
+        for activity in activities:
+            cumulative += _distance(activity)
+            is_longest = longest is not None and (activity["date"], activity["distance"]) == (
+                longest["date"], longest["distance"]
+            )
+            points.append(_point(activity["parsedDate"], cumulative, _distance(activity), activity["date"], is_longest))
+        return points
+
+    groups = group_by_period(activities, grouping)
+    best = _max_by(groups, lambda group: group["distance"])
+    for group in groups:
+        if grouping == "month":
+            group_year, group_month = (int(part) for part in group["date"].split("-"))
+            next_month = date(group_year + group_month // 12, group_month % 12 + 1, 1)
+            x = next_month - timedelta(days=1)
+        else:
+            x = date.fromisoformat(group["date"]) + timedelta(days=6)
+        cumulative += group["distance"]
+        points.append(_point(x, cumulative, group["distance"], group["date"], group is best))
+    return points
+
+
+def quarter_series(points, quarter, year):
+    """Port of filterDatasetsByQuarter for one quarter: points inside it, starting from the prior total."""
+    start, end = quarter_range(quarter, year)
+    start_text, end_text = start.isoformat(), end.isoformat()
+    inside = [point for point in points if start_text <= point["x"] <= end_text]
+    before = [point for point in points if point["x"] < start_text]
+    starting_y = before[-1]["y"] if before else 0
+    if points and (not inside or inside[0]["x"] > start_text):
+        inside.insert(0, _point(start, starting_y))
+    return inside
+
+
+def _activity_summary(activity):
+    return {key: activity.get(key) for key in ("date", "distance", "type", "duration", "pace")}
+
+
+def _period_summary(period):
+    return {
+        "date": period["date"],
+        "distance": round(period["distance"], 2),
+        "activities": len(period["activities"]),
+        "minutes": round(sum(time_to_minutes(a.get("duration") or "0") for a in period["activities"]), 2),
+    }
+
+
+def _empty_achievement(runner):
+    return {
+        "runner": runner,
+        "longestRun": None,
+        "farthestRun": None,
+        "totalActivities": 0,
+        "averagePace": 0,
+        "averageDistance": 0,
+        "totalDistance": 0,
+        "totalTimeRan": 0,
+    }
+
+
+def _pace_seconds(activities):
+    """Total time / total distance over activities with both (Runkeeper's average pace)."""
+    timed = [a for a in activities if a.get("duration") and _distance(a) > 0]
+    distance = sum(_distance(a) for a in timed)
+    return sum(time_to_seconds(a["duration"]) for a in timed) / distance if distance > 0 else 0
+
+
+def _months_between(start, end):
+    return (end.year - start.year) * 12 + end.month - start.month + 1
+
+
+def achievement(runner, activities, grouping, today, quarter=None, year=None):
+    """Port of calculateAchievements / calculateQuarterAchievements for one runner.
+
+    Daily: longest (by time) and farthest activity, activity count and average
+    distance per activity. Weekly/monthly: the periods with most time and most
+    miles, and activities and distance averaged over every period in range.
+    """
+    if not activities:
+        return _empty_achievement(runner)
+    total_time = sum(time_to_minutes(a.get("duration") or "0") for a in activities)
+
+    if grouping == "day":
+        total_distance = sum(_distance(a) for a in activities)
+        longest = _max_by([a for a in activities if a.get("duration")], lambda a: time_to_minutes(a["duration"]))
+        farthest = _max_by(activities, _distance)
+        return {
+            "runner": runner,
+            "longestRun": _activity_summary(longest) if longest else None,
+            "farthestRun": _activity_summary(farthest) if farthest else None,
+            "totalActivities": len(activities),
+            "averagePace": round(_pace_seconds(activities), 2),
+            "averageDistance": round(total_distance / len(activities), 2),
+            "totalDistance": round(total_distance, 2),
+            "totalTimeRan": round(total_time, 2),
+        }
+
+    periods = group_by_period(activities, grouping)
+    farthest = _max_by(periods, lambda period: period["distance"])
+    longest = _max_by(
+        periods, lambda period: sum(time_to_minutes(a.get("duration") or "0") for a in period["activities"])
+    )
+    total_distance = sum(period["distance"] for period in periods)
+
+    first = min(activity["parsedDate"] for activity in activities)
+    first = first - timedelta(days=first.weekday()) if grouping == "week" else first.replace(day=1)
+    if quarter is None:
+        last = max(activity["parsedDate"] for activity in activities)
+        start, end = first, max(last, today)
+    else:
+        quarter_start, quarter_end = quarter_range(quarter, year)
+        start, end = max(quarter_start, first), min(quarter_end, today)
+    if grouping == "month":
+        total_periods = _months_between(start, end)
+    else:
+        total_periods = -(-max(0, (end - start).days) // 7)
+
+    return {
+        "runner": runner,
+        "longestRun": _period_summary(longest) if longest else None,
+        "farthestRun": _period_summary(farthest) if farthest else None,
+        "totalActivities": round(len(activities) / total_periods, 2) if total_periods > 0 else 0,
+        "averagePace": round(_pace_seconds(activities), 2),
+        "averageDistance": round(total_distance / total_periods, 2) if total_periods > 0 else 0,
+        "totalDistance": round(total_distance, 2),
+        "totalTimeRan": round(total_time, 2),
+    }
+
+
+def build_aggregates(formatted_data, tracked_activities, year=None, today=None):
+    """Precompute what the dashboard derives from data.json on every interaction.
+
+    Returns a document with, per grouping (day/week/month), the cumulative
+    distance series of every runner for the whole year and for each quarter,
+    and achievement tables for the whole year and each quarter. Only tracked
+    activity types are counted, as on the dashboard. index.html does not read
+    this document; it still computes the same values itself from data.json.
+    """
+    today = today or date.today()
+    tracked = {activity_type.lower() for activity_type in tracked_activities}
+
+    runners = {}
+    for runner, runner_data in formatted_data["runners"].items():
+        activities = []
+        for activity in runner_data["activities"]:
+            if (activity.get("type") or "").lower() not in tracked:
+                continue
+            parsed = parse_activity_date(activity["date"], year)
+            if parsed:
+                activities.append({**activity, "parsedDate": parsed})
+        activities.sort(key=lambda a: a["parsedDate"])
+        runners[runner] = activities
+
+    if year is None:
+        latest = [a["parsedDate"] for activities in runners.values() for a in activities]
+        year = max(latest).year if latest else today.year
+    runners = {
+        runner: [a for a in activities if a["parsedDate"].year == year]
+        for runner, activities in runners.items()
+    }
+
+    series = {}
+    achievements = {}
+    for grouping in GROUPINGS:
+        full = {
+            runner: cumulative_series(activities, grouping, year)
+            for runner, activities in runners.items() if activities
+        }
+        series[grouping] = {"all": full}
+        achievements[grouping] = {
+            "all": [achievement(runner, activities, grouping, today) for runner, activities in runners.items()]
+        }
+        for quarter in QUARTERS:
+            series[grouping][str(quarter)] = {
+                runner: quarter_series(points, quarter, year) for runner, points in full.items()
+            }
+            achievements[grouping][str(quarter)] = [
+                achievement(
+                    runner, [a for a in activities if quarter_of(a["parsedDate"]) == quarter],
+                    grouping, today, quarter, year,
+                )
+                for runner, activities in runners.items()
+            ]
+
+    return {
+        "schema": AGGREGATES_SCHEMA,
+        "version": AGGREGATES_VERSION,
+        "dataUpdated": formatted_data["metadata"]["lastUpdated"],
+        "year": year,
+        "series": series,
+        "achievements": achievements,
+    }
+
+
+def export_aggregates(formatted_data, tracked_activities, filename=AGGREGATES_PATH):
+    """Write build_aggregates() output (compact, atomically) unless the file already holds it.
+
+    Returns:
+        tuple: (size in bytes, whether the file was written)
+    """
+    content = json.dumps(build_aggregates(formatted_data, tracked_activities), ensure_ascii=False, separators=(",", ":"))
+    try:
+        with open(filename, "r", encoding="utf-8") as f:
+            if f.read() == content:
+                return os.path.getsize(filename), False
+    except FileNotFoundError:
+        pass
+    tmp_filename = f"{filename}.tmp"
+    with open(tmp_filename, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_filename, filename)
+    return os.path.getsize(filename), True
@@ -0,0 +1,86 @@
+import glob
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+
+try:
+    import brotli
+except ImportError:  # Optional: brotli variants are skipped without it
+    brotli = None
+
+# Content-hashed copies of data.json for the static site, plus the pointer naming them
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "artifacts")
+POINTER_NAME = "current.json"
+HASH_LENGTH = 12
+KEEP_PREVIOUS = 1  # Older versions kept so pages loaded before a deploy can still fetch theirs
+
+
+def _write_bytes(path, payload):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def _prune(directory, name, keep):
+    """Delete old hashed versions of name, keeping the files of the `keep` hashes given."""
+    for path in glob.glob(os.path.join(directory, f"{name}.*.json*")):
+        file_hash = os.path.basename(path)[len(name) + 1:].split(".", 1)[0]
+        if file_hash not in keep:
+            os.remove(path)
+
+
+def publish_artifact(value, name="data", directory=ARTIFACT_DIR):
+    """Write value as minified <name>.<hash>.json plus .gz and .br variants and update the pointer.
+
+    The hash is taken over the minified bytes, so a file name always identifies
+    its content and can be cached forever; clients fetch only the small pointer
+    (<directory>/current.json) to learn the current name. Unchanged content is
+    not rewritten. The previous version is kept for clients mid-deploy.
+
+    Returns:
+        dict: Pointer entry with "path", "hash" and "bytes" per encoding
+    """
+    os.makedirs(directory, exist_ok=True)
+    minified = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    content_hash = hashlib.sha256(minified).hexdigest()[:HASH_LENGTH]
+    base = os.path.join(directory, f"{name}.{content_hash}.json")
+
+    variants = {"json": (base, lambda: minified), "gzip": (f"{base}.gz", lambda: gzip.compress(minified, 9, mtime=0))}
+    if brotli is not None:
+        variants["brotli"] = (f"{base}.br", lambda: brotli.compress(minified, quality=11))
+
+    sizes = {}
+    for encoding, (path, encode) in variants.items():
+        if not os.path.exists(path):
+            _write_bytes(path, encode())
+        sizes[encoding] = os.path.getsize(path)
+
+    pointer_path = os.path.join(directory, POINTER_NAME)
+    pointer = load_pointer(directory) or {"artifacts": {}}
+    previous = pointer["artifacts"].get(name, {})
+    history = [content_hash, previous.get("hash"), *previous.get("previous", [])]
+    history = [h for h in dict.fromkeys(history) if h][:KEEP_PREVIOUS + 1]
+
+    entry = {
+        "path": os.path.basename(base),
+        "hash": content_hash,
+        "bytes": sizes,
+        "previous": history[1:],
+    }
+    if previous.get("hash") != content_hash or previous.get("bytes") != sizes:
+        pointer["artifacts"][name] = entry
+        pointer["updated"] = datetime.now().isoformat()
+        _write_bytes(pointer_path, json.dumps(pointer, indent=2).encode("utf-8"))
+    _prune(directory, name, set(history))
+    return entry
+
+
+def load_pointer(directory=ARTIFACT_DIR):
+    try:
+        with open(os.path.join(directory, POINTER_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
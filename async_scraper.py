@@ -0,0 +1,353 @@
+# Asyncio scraping engine (--engine async). Same semantics and output shape as
+# scrape_activities / scrape_user_activities, but every user runs as a task on one
+# event loop sharing one browser; semaphores bound open sessions and detail tabs.
+import asyncio
+import os
+import time
+
+from playwright.async_api import async_playwright
+
+from activity import month_tab_date
+from scraping import (
+    ACTIVITY_SELECTORS,
+    ARROW,
+    BASE_URL,
+    CHECK,
+    COUNT_ROWS_JS,
+    CROSS,
+    EXTRACT_ROWS_JS,
+    LOAD_MORE_SELECTORS,
+    MONTH_RETRIES,
+    MonthNotLoaded,
+    RUNNER,
+    WARNING,
+    build_activity,
+    clean_activity_rows,
+    fetch_cached_or_http_details,
+    find_known_details,
+    give_up_month,
+    month_retry_delay,
+)
+from logs import event, log, runner_context
+from rate_limiter import rate_limiter
+from tracing import span, tracer
+from wait_policy import wait_policy
+
+# Concurrent user sessions and concurrent browser detail tabs on the event loop
+ASYNC_MAX_SESSIONS = int(os.getenv("ASYNC_MAX_SESSIONS", "8"))
+ASYNC_MAX_PAGES = int(os.getenv("ASYNC_MAX_PAGES", "16"))
+
+
+async def handle_cookie_modal_async(page, timeout=5000):
+    """Handle cookie consent modal if it appears on the page."""
+    try:
+        if await page.wait_for_selector("#onetrust-banner-sdk", timeout=timeout):
+            accept_button = await page.wait_for_selector(
+                "#onetrust-accept-btn-handler", state="visible", timeout=timeout
+            )
+            if accept_button:
+                await accept_button.click()
+                log.info("Cookie consent accepted")
+                await wait_policy.wait_for_selector_async(
+                    page, "cookie_banner_closed", "#onetrust-banner-sdk", state="hidden"
+                )
+                return True
+    except Exception as e:
+        log.warning(f"{WARNING} No cookie consent modal found or already accepted: {str(e)}")
+
+    return False
+
+
+async def scrape_activity_details_async(context, activity_url, page_slots):
+    """Open an activity in a new tab and read its duration and pace (browser fallback)."""
+    async with page_slots:
+        with span("activity_browser"):
+            log.debug(f"    {ARROW} Opening activity in new tab...")
+            new_page = await context.new_page()
+            try:
+                await rate_limiter.goto_async(new_page, activity_url, kind="detail", wait_until="domcontentloaded")
+
+                duration_text = "N/A"
+                average_pace_text = "N/A"
+
+                duration_element = await wait_policy.wait_for_selector_async(
+                    new_page, "detail_ready", "#totalDuration > h1 > span"
+                )
+                if duration_element:
+                    duration_text = await duration_element.inner_text()
+                else:
+                    log.warning("Could not find duration element")
+
+                pace_element = await wait_policy.wait_for_selector_async(
+                    new_page, "detail_ready", "#averagePace > h1 > span"
+                )
+                if pace_element:
+                    average_pace_text = await pace_element.inner_text()
+                else:
+                    log.warning("Could not find pace element")
+
+                return {"duration": duration_text, "pace": average_pace_text}
+            finally:
+                await new_page.close()
+
+
+async def _extract_rows(page, selector):
+    """Read every row of the open month in one page.evaluate round-trip."""
+    return clean_activity_rows(await page.evaluate(EXTRACT_ROWS_JS, selector))
+
+
+async def scrape_month_async(page, month, page_slots, detail_fetcher=None, detail_cache=None,
+                             known=None):
+    """Async counterpart of scrape_month; returns the month's activity dicts."""
+    log.info(f"Processing month: {month}")
+    cur_month = f'[data-date="{month_tab_date(month)}"]'
+
+    month_selector = await wait_policy.wait_for_selector_async(page, "month_tab", cur_month)
+    if not month_selector:
+        raise MonthNotLoaded(f"No month selector found for {month}")
+
+    previous_list = await wait_policy.list_signature_async(page, ACTIVITY_SELECTORS[0])
+    await month_selector.click()
+
+    await wait_policy.wait_for_list_change_async(page, ACTIVITY_SELECTORS[0], previous_list)
+    if not await wait_policy.wait_for_selector_async(
+        page, "list_ready", 'div[role="tabpanel"][aria-hidden="false"] ul', state="attached"
+    ):
+        raise MonthNotLoaded(f"Activity list for {month} did not appear")
+    await wait_policy.wait_for_stable_count_async(page, ACTIVITY_SELECTORS[0])
+
+    rows = []
+    row_selector = ACTIVITY_SELECTORS[0]
+    for selector in ACTIVITY_SELECTORS:
+        rows = await _extract_rows(page, selector)
+        if rows:
+            row_selector = selector
+            break
+
+    if not rows:
+        log.info(f"{WARNING} No activities found with standard selectors for {month}, trying scroll...")
+        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        await wait_policy.wait_for_stable_count_async(page, row_selector)
+        rows = await _extract_rows(page, row_selector)
+
+    if rows:
+        for load_selector in LOAD_MORE_SELECTORS:
+            try:
+                load_more_button = await page.query_selector(load_selector)
+                if load_more_button and await load_more_button.is_visible():
+                    row_count = await page.evaluate(COUNT_ROWS_JS, row_selector)
+                    await load_more_button.click()
+                    await wait_policy.wait_for_growth_async(page, row_selector, row_count)
+                    rows = await _extract_rows(page, row_selector)
+                    log.info(f"{CHECK} After loading more: {len(rows)} activities")
+                    break
+            except Exception:
+                continue
+
+    if not rows:
+        log.info(f"{CROSS} No activities found for {month}")
+        tracer.set_outcome("empty")
+        return []
+
+    log.info(f"  {CHECK} Found {len(rows)} activities for {month}")
+
+    month_year = cur_month.split('"')[1]
+    month_part = month_year.split('-')[0]
+    year_part = month_year.split('-')[2]
+
+    # Cache lookups and HTTP fetches block, so run them off the event loop
+    with span("details", rows=len(rows)) as details_span:
+        details_by_url = find_known_details(rows, known, month_part, year_part) if known else {}
+        if details_by_url:
+            log.info(f"  {CHECK} {len(details_by_url)}/{len(rows)} activities already known")
+            details_span["attrs"]["known"] = len(details_by_url)
+        new_rows = [row for row in rows if row["url"] not in details_by_url]
+        details_by_url.update(await asyncio.to_thread(
+            fetch_cached_or_http_details, new_rows, detail_fetcher, detail_cache
+        ))
+
+    # Remaining detail pages load concurrently in browser tabs
+    missing = [row for row in rows if row["url"] not in details_by_url]
+    results = await asyncio.gather(
+        *(scrape_activity_details_async(page.context, row["url"], page_slots) for row in missing),
+        return_exceptions=True,
+    )
+    for row, details in zip(missing, results):
+        if isinstance(details, Exception):
+            log.warning(f"    {CROSS} Error getting detailed info for {row['url']}: {details}")
+            continue
+        details_by_url[row["url"]] = details
+        if detail_cache:
+            detail_cache.put(row["url"], details)
+
+    month_activities = [
+        activity
+        for activity in (
+            build_activity(row, details_by_url[row["url"]], month_part, year_part)
+            for row in rows
+            if details_by_url.get(row["url"])
+        )
+        if activity
+    ]
+    event("month_done", f"  {CHECK} Completed {month}: {len(month_activities)} activities scraped",
+          month=month, activities=len(month_activities))
+    return month_activities
+
+
+async def fresh_page_async(page):
+    """Async counterpart of fresh_page."""
+    new_page = await page.context.new_page()
+    try:
+        await page.close()
+    except Exception:
+        pass
+    return new_page
+
+
+async def open_activity_list_async(page, user_id):
+    """Async counterpart of open_activity_list."""
+    log.info(f"{ARROW} Navigating to user activity list...")
+    await rate_limiter.goto_async(page, f"{BASE_URL}/user/{user_id}/activitylist", wait_until="domcontentloaded")
+    if not await wait_policy.wait_for_selector_async(page, "page_ready", "[data-date]", state="attached"):
+        log.warning(f"{WARNING} Month tabs did not appear; continuing anyway")
+
+
+async def scrape_activities_async(page, user_id, months, page_slots, user_name=None,
+                                  detail_fetcher=None, detail_cache=None, on_month=None, known_activities=None,
+                                  on_month_failed=None):
+    """Async counterpart of scrape_activities, with the same per-month retries; returns the same list."""
+    activities = []
+    known = known_activities.for_runner(user_name) if known_activities else None
+
+    page_ready = False
+    for index, month in enumerate(months):
+        month_activities = None
+        for attempt in range(1, MONTH_RETRIES + 2):
+            try:
+                if not page_ready:
+                    with span("navigate", user=user_name):
+                        await open_activity_list_async(page, user_id)
+                    page_ready = True
+                with span("month", user=user_name, month=month, attempt=attempt) as month_span:
+                    month_activities = await scrape_month_async(
+                        page, month, page_slots, detail_fetcher, detail_cache, known
+                    )
+                    month_span["attrs"]["activities"] = len(month_activities)
+                break
+            except Exception as e:
+                error = e
+                navigation_failed = not page_ready
+                delay = month_retry_delay(month, attempt, e)
+                page = await fresh_page_async(page)
+                page_ready = False
+                if delay is not None:
+                    await asyncio.sleep(delay)
+
+        if month_activities is None:
+            if give_up_month(months, index, error, navigation_failed, user_name, on_month_failed):
+                break
+            continue
+
+        activities.extend(month_activities)
+        if on_month:
+            on_month(user_name, month, month_activities)
+
+    log.info(f"  {CHECK} Finished scraping all months. Total activities: {len(activities)}")
+    return activities
+
+
+async def scrape_user_activities_async(browser, cookie, user_id, name, months, sessions,
+                                       page_slots, detail_fetcher=None, detail_cache=None,
+                                       resource_filter=None, on_month=None, known_activities=None,
+                                       storage_state=None, on_month_failed=None):
+    """Scrape one user in its own browser context; returns (name, activities, success)."""
+    async with sessions:
+        log.info(f"{RUNNER} [async] Starting scraping for {name} ({user_id})")
+        with span("user", user=name) as user_span, runner_context(name):
+            context = None
+            try:
+                if storage_state:
+                    context = await browser.new_context(storage_state=storage_state)
+                else:
+                    context = await browser.new_context()
+                if not storage_state:
+                    await context.add_cookies([cookie])
+                if resource_filter:
+                    await resource_filter.install_async(context)
+                page = await context.new_page()
+
+                # Consent is already in a captured storage state; a blocked banner never shows
+                if not (storage_state or (resource_filter and resource_filter.blocks_consent_banner)):
+                    with span("homepage"):
+                        await rate_limiter.goto_async(page, BASE_URL)
+                    with span("handle_cookie_modal"):
+                        await handle_cookie_modal_async(page)
+
+                user_activities = await scrape_activities_async(
+                    page, user_id, months, page_slots, name, detail_fetcher, detail_cache, on_month,
+                    known_activities, on_month_failed,
+                )
+                log.info(f"{CHECK} [async] Completed {name}: {len(user_activities)} activities found")
+                user_span["attrs"]["activities"] = len(user_activities)
+                return name, user_activities, True
+            except Exception as e:
+                log.error(f"{CROSS} [async] Error scraping {name}: {e}")
+                user_span["outcome"] = "failed"
+                return name, [], False
+            finally:
+                if context is not None:
+                    await context.close()
+
+
+async def _scrape_users(users, months, cookie, headless, max_sessions, max_pages,
+                        detail_fetcher, detail_cache, resource_filter, on_result, user_months, on_month,
+                        known_activities, storage_state, on_month_failed):
+    sessions = asyncio.Semaphore(max_sessions)
+    page_slots = asyncio.Semaphore(max_pages)
+    async with async_playwright() as p:
+        launch_start = time.time()
+        browser = await p.firefox.launch(headless=headless)
+        log.info(f"{CHECK} Started browser in {time.time() - launch_start:.1f} seconds")
+        try:
+            tasks = [
+                asyncio.create_task(scrape_user_activities_async(
+                    browser, cookie, user_id, name, (user_months or {}).get(user_id, months), sessions,
+                    page_slots, detail_fetcher, detail_cache, resource_filter, on_month, known_activities,
+                    storage_state, on_month_failed,
+                ))
+                for user_id, name in users.items()
+            ]
+            for task in asyncio.as_completed(tasks):
+                on_result(*await task)
+        finally:
+            await browser.close()
+
+
+def scrape_users_async(users, months, cookie, on_result, headless=True,
+                       max_sessions=ASYNC_MAX_SESSIONS, max_pages=ASYNC_MAX_PAGES,
+                       detail_fetcher=None, detail_cache=None, resource_filter=None,
+                       user_months=None, on_month=None, known_activities=None, storage_state=None,
+                       on_month_failed=None):
+    """Scrape all users on one event loop.
+
+    Args:
+        users (dict): Mapping of user id to display name
+        months (list): YYYY-MM month keys to scrape
+        cookie (dict): Playwright-formatted session cookie
+        on_result (callable): Called with (name, activities, success) as each user finishes
+        headless (bool): Run the browser headless
+        max_sessions (int): Maximum users scraped at once
+        max_pages (int): Maximum browser detail tabs open at once
+        user_months (dict, optional): Per-user month lists overriding months
+        on_month (callable, optional): Called with (name, month, activities) as each month finishes
+        known_activities (KnownActivityIndex, optional): Activities already exported, reused as-is
+        storage_state (dict, optional): Playwright storage state to create contexts from;
+            contexts then skip the homepage and cookie banner
+        on_month_failed (callable, optional): Called with (name, month, error, attempts)
+            for each month given up on after its retries
+    """
+    asyncio.run(_scrape_users(
+        users, months, cookie, headless, max_sessions, max_pages,
+        detail_fetcher, detail_cache, resource_filter, on_result, user_months, on_month, known_activities,
+        storage_state, on_month_failed,
+    ))
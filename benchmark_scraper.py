@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import time
+from concurrent.futures import as_completed
+
+from activity import month_key
+from fixture_site import FixtureSite
+from logs import LEVELS, setup_logging, stop_logging
+
+
+def _cookie_for(site):
+    """Dummy session cookie scoped to the fixture host."""
+    host = site.url.split("://", 1)[1].split(":", 1)[0]
+    return {"name": "checker", "value": "benchmark", "domain": host, "path": "/", "expires": -1, "sameSite": "Lax"}
+
+
+def run_scenario(site, engine, workers, users, months):
+    """Scrape users × months from the fixture site once and return timing figures."""
+    # Imported late: the scraper reads RUNKEEPER_BASE_URL at import time
+    import update_runkeeper_miles as scraper
+    from activity_details import DetailFetcher
+    from browser_pool import BrowserPool
+    from resource_filter import ResourceFilter
+
+    cookie = _cookie_for(site)
+    detail_fetcher = DetailFetcher(cookie, max_workers=workers * 2)
+    resource_filter = ResourceFilter()
+    results = {}
+
+    def record_result(name, user_activities, success):
+        results[name] = (len(user_activities), success)
+
+    requests_before = site.requests
+    start = time.perf_counter()
+    if engine == "async":
+        from async_scraper import scrape_users_async
+
+        scrape_users_async(
+            users, months, cookie, record_result, max_sessions=workers, max_pages=workers * 2,
+            detail_fetcher=detail_fetcher, resource_filter=resource_filter,
+        )
+    else:
+        with BrowserPool(workers, cookies=[cookie], context_setup=resource_filter.install) as pool:
+            futures = [
+                pool.submit(scraper.scrape_user_activities, user_id, name, months, detail_fetcher=detail_fetcher,
+                            skip_cookie_modal=True)
+                for user_id, name in users.items()
+            ]
+            for future in as_completed(futures):
+                record_result(*future.result())
+    elapsed = time.perf_counter() - start
+    detail_fetcher.close()
+
+    activities = sum(count for count, _ in results.values())
+    return {
+        "engine": engine,
+        "workers": workers,
+        "users": len(users),
+        "months": len(months),
+        "activitiesPerMonth": site.activities_per_month,
+        "activities": activities,
+        "failedUsers": sum(1 for _, success in results.values() if not success),
+        "seconds": round(elapsed, 3),
+        "activitiesPerSecond": round(activities / elapsed, 2) if elapsed else 0.0,
+        "requests": site.requests - requests_before,
+    }
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the scraper against the offline fixture site (no network or Runkeeper account needed)"
+    )
+    parser.add_argument("--engines", default="threads,async", help="Comma-separated engines to run")
+    parser.add_argument("--workers", type=_int_list, default=[1, 2, 4], help="Comma-separated worker counts")
+    parser.add_argument("--activities", type=_int_list, default=[5, 25],
+                        help="Comma-separated activities per month")
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--months", type=int, default=2, help="Months per user, starting from January")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--latency-ms", type=int, default=50)
+    parser.add_argument("--client-rendered-details", action="store_true",
+                        help="Force every detail page through the browser fallback")
+    parser.add_argument("--output", metavar="FILE", help="Write the results as JSON")
+    parser.add_argument("--log-level", choices=sorted(LEVELS), default="quiet", help="Scraper log verbosity")
+    args = parser.parse_args()
+    setup_logging(args.log_level)
+
+    site = FixtureSite(
+        page_size=args.page_size,
+        latency_ms=args.latency_ms,
+        client_rendered_details=args.client_rendered_details,
+    ).start()
+    # Point the scraper at the fixture before it is imported
+    os.environ["RUNKEEPER_BASE_URL"] = site.url
+    os.environ.setdefault("RESOURCE_ALLOWED_DOMAINS", "127.0.0.1")
+    # Measure the scraper itself, not the request rate limit (set REQUEST_RATE to include it)
+    os.environ.setdefault("REQUEST_RATE", "0")
+
+    users = {str(1000 + index): f"Runner{index + 1}" for index in range(args.users)}
+    months = [month_key(site.year, month) for month in range(1, args.months + 1)]
+
+    results = []
+    try:
+        for activities_per_month in args.activities:
+            site.activities_per_month = activities_per_month
+            for engine in [engine.strip() for engine in args.engines.split(",") if engine.strip()]:
+                for workers in args.workers:
+                    results.append(run_scenario(site, engine, workers, users, months))
+    finally:
+        site.stop()
+        stop_logging()  # Flush the scraper's queued log lines before the table
+
+    print(f"\n{'engine':<8} {'workers':>7} {'act/mo':>6} {'activities':>10} {'failed':>6} "
+          f"{'seconds':>8} {'act/s':>7} {'requests':>8}")
+    for result in results:
+        print(
+            f"{result['engine']:<8} {result['workers']:>7} {result['activitiesPerMonth']:>6} "
+            f"{result['activities']:>10} {result['failedUsers']:>6} {result['seconds']:>8.2f} "
+            f"{result['activitiesPerSecond']:>7.2f} {result['requests']:>8}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"latencyMs": args.latency_ms, "pageSize": args.page_size, "results": results}, f, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Fails the run when importing the entry point gets slower than this (median, milliseconds)
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "250"))
+# Only the scrape path may load these
+HEAVY_MODULES = ("playwright", "browser_cookie3", "google", "http.client")
+
+MEASURE_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+heavy = sorted({{name for name in sys.modules for prefix in {heavy!r} if name == prefix or name.startswith(prefix + ".")}})
+print(json.dumps({{"ms": elapsed, "heavy": heavy}}))
+"""
+
+
+def measure_import(module, runs):
+    """Import module in `runs` fresh interpreters; returns the timings (ms) and heavy modules it loaded."""
+    script = MEASURE_SCRIPT.format(module=module, heavy=HEAVY_MODULES)
+    here = os.path.dirname(os.path.abspath(__file__))
+    timings = []
+    heavy = set()
+    for _ in range(runs):
+        process = subprocess.run([sys.executable, "-c", script], cwd=here, capture_output=True, text=True)
+        if process.returncode != 0:
+            sys.exit(f"import {module} failed:\n{process.stderr.strip()}")
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        timings.append(result["ms"])
+        heavy.update(result["heavy"])
+    return timings, sorted(heavy)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Guard start-up latency: import the entry point in fresh interpreters and check "
+                    "the median time and that no browser, cookie-jar or cloud SDK module is loaded"
+    )
+    parser.add_argument("--module", default="update_runkeeper_miles")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    args = parser.parse_args()
+
+    # One warm-up run so bytecode compilation is not counted
+    measure_import(args.module, 1)
+    timings, heavy = measure_import(args.module, args.runs)
+    median = statistics.median(timings)
+    print(f"import {args.module}: median {median:.1f} ms, min {min(timings):.1f} ms, "
+          f"max {max(timings):.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if heavy:
+        print(f"Heavy modules loaded at import: {', '.join(heavy)}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"Start-up is over budget by {median - args.budget_ms:.1f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,277 @@
+import os
+import queue
+import resource
+import threading
+import time
+from concurrent.futures import Future
+
+from playwright.sync_api import sync_playwright
+
+from logs import log
+
+# Recycle a browser context after this many user tasks
+MAX_CONTEXT_USES = int(os.getenv("MAX_CONTEXT_USES", "5"))
+RSS_SAMPLE_INTERVAL = 0.5  # Seconds between memory samples
+
+
+def process_tree_rss(root_pid=None):
+    """Return resident memory in bytes of a process and all its descendants.
+
+    Browsers run as child processes of the Playwright driver, so the scraper's own
+    RSS says little about real memory use. Reads /proc and returns None where it
+    is not available.
+    """
+    root_pid = root_pid or os.getpid()
+    try:
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        children = {}
+        rss = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat", "r") as f:
+                    stat = f.read()
+            except OSError:
+                continue
+            # Fields after the parenthesised command name: state, ppid, ..., rss (24th field)
+            fields = stat[stat.rfind(")") + 2:].split()
+            pid = int(entry)
+            children.setdefault(int(fields[1]), []).append(pid)
+            rss[pid] = int(fields[21]) * page_size
+    except (OSError, ValueError, AttributeError):
+        return None
+
+    total = 0
+    pending = [root_pid]
+    while pending:
+        pid = pending.pop()
+        total += rss.get(pid, 0)
+        pending.extend(children.get(pid, []))
+    return total
+
+
+class _RssSampler(threading.Thread):
+    """Background thread recording the peak RSS of the process tree."""
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        super().__init__(name="rss-sampler", daemon=True)
+        self.interval = interval
+        self.peak = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.sample()
+            self._stop_event.wait(self.interval)
+
+    def sample(self):
+        rss = process_tree_rss()
+        if rss is not None:
+            self.peak = max(self.peak, rss)
+
+    def stop(self):
+        self._stop_event.set()
+        self.sample()
+
+
+class BrowserPool:
+    """A fixed number of long-lived Firefox browsers shared by all user tasks.
+
+    Sync Playwright objects can only be used from the thread that created them, so
+    each browser is owned by one pool worker thread. Tasks are queued and every
+    task runs in its own lightweight browser context with the session cookies
+    added. Contexts are recycled between tasks (cookies reset, pages closed) and
+    replaced after ``max_context_uses`` tasks or a failure. ``context_setup`` is
+    called with every new context (e.g. to install request routes).
+
+    With a Playwright ``storage_state`` (see session_state), contexts are created
+    from it instead, so they start with the session and cookie consent already
+    in place; its cookies are the ones restored when a context is recycled.
+
+    With an AdaptiveConcurrency ``concurrency``, ``size`` is the upper bound: a
+    worker only runs a task while holding one of the controller's slots, and
+    browsers beyond the controller's initial limit are launched on first use.
+
+    Usage:
+        with BrowserPool(2, cookies=[cookie]) as pool:
+            future = pool.submit(scrape_user_activities, user_id, name, months)
+            # scrape_user_activities receives the context as its first argument
+    """
+
+    def __init__(self, size, cookies=None, headless=True, max_context_uses=MAX_CONTEXT_USES,
+                 context_setup=None, concurrency=None, storage_state=None):
+        self.size = size
+        self.concurrency = concurrency
+        self.storage_state = storage_state
+        self.cookies = storage_state["cookies"] if storage_state else (cookies or [])
+        self.context_setup = context_setup
+        self.headless = headless
+        self.max_context_uses = max_context_uses
+        self.browser_startup_times = []
+        self.contexts_created = 0
+        self.contexts_reused = 0
+        self._tasks = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._sampler = _RssSampler()
+        self._started_at = None
+        self._ready_at = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+    def start(self):
+        """Launch the browsers (up to the concurrency limit) and wait until they are ready."""
+        self._started_at = time.time()
+        self._sampler.start()
+        eager = self.concurrency.limit if self.concurrency else self.size
+        ready = []
+        for index in range(self.size):
+            started = threading.Event()
+            worker = threading.Thread(
+                target=self._worker, args=(started, index < eager), name=f"browser-{index + 1}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+            if index < eager:
+                ready.append(started)
+        for started in ready:
+            started.wait()
+        self._ready_at = time.time()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(context, *args, **kwargs) and return a Future for its result."""
+        future = Future()
+        self._tasks.put((future, fn, args, kwargs))
+        return future
+
+    def shutdown(self):
+        """Close every browser (from its own thread) and stop the workers."""
+        for _ in self._workers:
+            self._tasks.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+        self._sampler.stop()
+
+    def _new_context(self, browser):
+        if self.storage_state:
+            context = browser.new_context(storage_state=self.storage_state)
+        else:
+            context = browser.new_context()
+            if self.cookies:
+                context.add_cookies(self.cookies)
+        if self.context_setup:
+            self.context_setup(context)
+        with self._lock:
+            self.contexts_created += 1
+        return context
+
+    def _recycle_context(self, context):
+        """Reset a context for the next task: close its pages and restore the cookies."""
+        for page in list(context.pages):
+            page.close()
+        context.clear_cookies()
+        if self.cookies:
+            context.add_cookies(self.cookies)
+        with self._lock:
+            self.contexts_reused += 1
+
+    def _launch(self):
+        """Start Playwright and a browser in the calling worker thread."""
+        launch_start = time.time()
+        playwright = None
+        browser = None
+        try:
+            playwright = sync_playwright().start()
+            browser = playwright.firefox.launch(headless=self.headless)
+            with self._lock:
+                self.browser_startup_times.append(time.time() - launch_start)
+        except Exception as e:
+            log.error(f"Error launching pooled browser: {e}")
+        return playwright, browser
+
+    def _worker(self, started, eager=True):
+        playwright = None
+        browser = None
+        launched = False
+        if eager:
+            playwright, browser = self._launch()
+            launched = True
+        started.set()
+
+        context = None
+        uses = 0
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            future, fn, args, kwargs = task
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            if self.concurrency:
+                self.concurrency.acquire()
+            try:
+                if not launched:
+                    playwright, browser = self._launch()
+                    launched = True
+                if browser is None:
+                    future.set_exception(RuntimeError("Browser failed to launch"))
+                    continue
+                context, uses = self._run_task(browser, context, uses, future, fn, args, kwargs)
+            finally:
+                if self.concurrency:
+                    self.concurrency.release()
+
+        try:
+            if context is not None:
+                context.close()
+            if browser is not None:
+                browser.close()
+        finally:
+            if playwright is not None:
+                playwright.stop()
+
+    def _run_task(self, browser, context, uses, future, fn, args, kwargs):
+        """Run one task in a fresh or recycled context. Returns the (context, uses) to keep."""
+        try:
+            if context is None or uses >= self.max_context_uses:
+                if context is not None:
+                    context.close()
+                context = self._new_context(browser)
+                uses = 0
+            else:
+                self._recycle_context(context)
+            uses += 1
+            future.set_result(fn(context, *args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+            # Don't reuse a context that may be in a broken state
+            try:
+                if context is not None:
+                    context.close()
+            except Exception:
+                pass
+            context = None
+        return context, uses
+
+    def stats(self):
+        """Start-up time and memory figures for the run summary."""
+        peak_rss = self._sampler.peak
+        if not peak_rss:
+            # No /proc: fall back to this process's own high-water mark (KB on Linux)
+            peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        return {
+            "browsers": len(self.browser_startup_times),
+            "startupSeconds": (self._ready_at or time.time()) - (self._started_at or time.time()),
+            "browserStartupSeconds": sum(self.browser_startup_times),
+            "contextsCreated": self.contexts_created,
+            "contextsReused": self.contexts_reused,
+            "peakRssBytes": peak_rss,
+        }
@@ -0,0 +1,92 @@
+import json
+import os
+from datetime import date, timedelta
+
+from activity import format_duration, parse_duration_seconds, parse_export_date
+
+# Columnar export written next to data.json with --columnar
+COLUMNAR_PATH = "data.columnar.json"
+COLUMNAR_SCHEMA = "run300.columnar"
+COLUMNAR_VERSION = 1
+EPOCH = date(1970, 1, 1)
+
+
+def date_to_epoch_day(text):
+    """Days since 1970-01-01 for an mm/dd/yy date, or None if it cannot be parsed."""
+    day = parse_export_date(text)
+    return (day - EPOCH).days if day else None
+
+
+def epoch_day_to_date(day):
+    """Inverse of date_to_epoch_day, as mm/dd/yy."""
+    return (EPOCH + timedelta(days=day)).strftime("%m/%d/%y")
+
+
+def to_columnar(formatted_data):
+    """Convert the data.json structure into the columnar schema.
+
+    Per runner, parallel arrays hold one entry per activity (sorted by date):
+    ``day`` (days since 1970-01-01), ``distance`` (miles), ``type`` (index into
+    the top-level ``types`` table), ``seconds`` (duration) and ``paceSeconds``
+    (per mile). Unparseable values are null. Activity URLs are not included;
+    the dashboard does not use them.
+    """
+    types = []
+    type_index = {}
+    runners = {}
+    for runner, runner_data in formatted_data["runners"].items():
+        columns = {"day": [], "distance": [], "type": [], "seconds": [], "paceSeconds": []}
+        # Unparseable dates sort last
+        days = [(date_to_epoch_day(activity["date"]), activity) for activity in runner_data["activities"]]
+        days.sort(key=lambda item: (item[0] is None, item[0] or 0))
+        for day, activity in days:
+            activity_type = activity["type"]
+            if activity_type not in type_index:
+                type_index[activity_type] = len(types)
+                types.append(activity_type)
+            columns["day"].append(day)
+            columns["distance"].append(activity["distance"])
+            columns["type"].append(type_index[activity_type])
+            columns["seconds"].append(parse_duration_seconds(activity.get("duration")))
+            columns["paceSeconds"].append(parse_duration_seconds(activity.get("pace")))
+        runners[runner] = {"stats": runner_data["stats"], **columns}
+
+    return {
+        "schema": COLUMNAR_SCHEMA,
+        "version": COLUMNAR_VERSION,
+        "metadata": formatted_data["metadata"],
+        "types": types,
+        "runners": runners,
+    }
+
+
+def from_columnar(columnar):
+    """Convert a columnar document back into the data.json structure."""
+    if columnar.get("schema") != COLUMNAR_SCHEMA or columnar.get("version") != COLUMNAR_VERSION:
+        raise ValueError(f"Unsupported columnar data: {columnar.get('schema')} v{columnar.get('version')}")
+    types = columnar["types"]
+    runners = {}
+    for runner, columns in columnar["runners"].items():
+        activities = [
+            {
+                "date": epoch_day_to_date(day) if day is not None else "N/A",
+                "distance": distance,
+                "type": types[type_id],
+                "duration": format_duration(seconds),
+                "pace": format_duration(pace, hours=False),
+            }
+            for day, distance, type_id, seconds, pace in zip(
+                columns["day"], columns["distance"], columns["type"], columns["seconds"], columns["paceSeconds"]
+            )
+        ]
+        runners[runner] = {"name": runner, "stats": columns["stats"], "activities": activities}
+    return {"runners": runners, "metadata": columnar["metadata"]}
+
+
+def export_columnar(formatted_data, filename=COLUMNAR_PATH):
+    """Write the columnar export (compact, atomically). Returns its size in bytes."""
+    tmp_filename = f"{filename}.tmp"
+    with open(tmp_filename, "w", encoding="utf-8") as f:
+        json.dump(to_columnar(formatted_data), f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_filename, filename)
+    return os.path.getsize(filename)
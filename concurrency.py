@@ -0,0 +1,212 @@
+import os
+import threading
+import time
+
+from logs import log
+
+# Bounds for the number of concurrently active browser sessions
+MIN_WORKERS = int(os.getenv("MIN_WORKERS", "1"))
+INITIAL_WORKERS = int(os.getenv("INITIAL_WORKERS", "2"))
+ADJUST_INTERVAL = float(os.getenv("CONCURRENCY_ADJUST_INTERVAL", "10"))  # Seconds between decisions
+MIN_SAMPLES = 5  # Page waits needed in a window before latency/timeouts are trusted
+
+# Shrink when any of these is exceeded; grow only with clear headroom below them
+MAX_TIMEOUT_RATE = 0.15
+LATENCY_TOLERANCE = 2.0  # Window latency vs. the best window seen so far
+MAX_CPU_BUSY = 0.85
+MIN_FREE_MEMORY_MB = int(os.getenv("MIN_FREE_MEMORY_MB", "500"))
+SESSION_MEMORY_MB = 300  # Rough footprint of one more browser session
+
+# Waits that measure how quickly the site responds. list_stable and list_growth
+# include fixed quiet periods, and the cookie banner wait is cosmetic.
+LATENCY_WAITS = {"page_ready", "month_tab", "list_change", "list_ready", "detail_ready"}
+
+
+def available_memory_mb():
+    """MemAvailable from /proc/meminfo in MB, or None where it is not available."""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class _CpuSampler:
+    """Busy fraction of all CPUs since the previous call, from /proc/stat.
+
+    Falls back to the 1-minute load average per core where /proc is missing.
+    """
+
+    def __init__(self):
+        self._previous = self._read()
+
+    @staticmethod
+    def _read():
+        try:
+            with open("/proc/stat", "r") as f:
+                values = [int(value) for value in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        idle = values[3] + (values[4] if len(values) > 4 else 0)  # idle + iowait
+        return sum(values), idle
+
+    def busy(self):
+        current = self._read()
+        previous, self._previous = self._previous, current
+        if current and previous and current[0] > previous[0]:
+            total = current[0] - previous[0]
+            return 1 - (current[1] - previous[1]) / total
+        try:
+            return os.getloadavg()[0] / (os.cpu_count() or 1)
+        except (OSError, AttributeError):
+            return None
+
+
+class AdaptiveConcurrency:
+    """Limit on concurrently active browser sessions, adjusted while the run goes on.
+
+    Workers call acquire() before starting a user and release() when it is done.
+    Page waits are fed in through observe() (see WaitPolicy.add_listener). Every
+    ``interval`` seconds the limit is re-evaluated:
+
+    - shrink (halve) when the host is short of memory or CPU, or when the share
+      of timed-out waits exceeds MAX_TIMEOUT_RATE;
+    - shrink by one when wait latency is LATENCY_TOLERANCE times the best
+      window seen so far (the site or the machine is saturating);
+    - grow by one when sessions are queued and CPU, memory, latency and
+      timeouts all have headroom.
+
+    The limit stays within [min_workers, max_workers] and every change is logged.
+    With ``adaptive=False`` the limit is fixed at max_workers.
+    """
+
+    def __init__(self, max_workers, min_workers=MIN_WORKERS, initial=INITIAL_WORKERS,
+                 interval=ADJUST_INTERVAL, adaptive=True):
+        self.max_workers = max(1, max_workers)
+        self.min_workers = max(1, min(min_workers, self.max_workers))
+        self.adaptive = adaptive
+        initial = initial if adaptive else self.max_workers
+        self.limit = max(self.min_workers, min(initial, self.max_workers))
+        self.peak_limit = self.limit
+        self.interval = interval
+        self.adjustments = []
+        self._active = 0
+        self._waiting = 0
+        self._window = []
+        self._best_latency = None
+        self._cpu = _CpuSampler()
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._started_at = time.time()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def start(self):
+        if self.adaptive and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="concurrency", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def acquire(self):
+        """Block until a session slot is free under the current limit."""
+        with self._condition:
+            self._waiting += 1
+            while self._active >= self.limit:
+                self._condition.wait()
+            self._waiting -= 1
+            self._active += 1
+
+    def release(self):
+        with self._condition:
+            self._active -= 1
+            self._condition.notify()
+
+    def observe(self, name, seconds, outcome):
+        """Record one page wait (WaitPolicy listener signature)."""
+        if name in LATENCY_WAITS:
+            with self._condition:
+                self._window.append((seconds, outcome == "timeout"))
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.adjust()
+
+    def _set_limit(self, limit, reason):
+        with self._condition:
+            old = self.limit
+            self.limit = max(self.min_workers, min(limit, self.max_workers))
+            if self.limit == old:
+                return
+            self.peak_limit = max(self.peak_limit, self.limit)
+            self._condition.notify_all()
+        self.adjustments.append({
+            "atSeconds": round(time.time() - self._started_at, 1),
+            "from": old,
+            "to": self.limit,
+            "reason": reason,
+        })
+        log.info(f"Concurrency {old} -> {self.limit} sessions: {reason}")
+
+    def adjust(self):
+        """Re-evaluate the limit from the last window of samples and host headroom."""
+        cpu_busy = self._cpu.busy()
+        free_mb = available_memory_mb()
+
+        if free_mb is not None and free_mb < MIN_FREE_MEMORY_MB:
+            self._set_limit(self.limit // 2, f"low memory ({free_mb:.0f} MB free)")
+            return
+        if cpu_busy is not None and cpu_busy > MAX_CPU_BUSY:
+            self._set_limit(self.limit // 2, f"CPU {cpu_busy:.0%} busy")
+            return
+
+        # Too few samples: keep collecting into the same window
+        with self._condition:
+            if len(self._window) < MIN_SAMPLES:
+                return
+            window, self._window = self._window, []
+            waiting = self._waiting
+        timeout_rate = sum(1 for _, timed_out in window if timed_out) / len(window)
+        latencies = sorted(seconds for seconds, timed_out in window if not timed_out)
+        latency = latencies[len(latencies) // 2] if latencies else None
+        if latency is not None and (self._best_latency is None or latency < self._best_latency):
+            self._best_latency = latency
+
+        if timeout_rate > MAX_TIMEOUT_RATE:
+            self._set_limit(self.limit // 2, f"{timeout_rate:.0%} of waits timed out")
+        elif latency is not None and latency > self._best_latency * LATENCY_TOLERANCE:
+            self._set_limit(
+                self.limit - 1, f"median wait {latency:.2f}s vs best {self._best_latency:.2f}s"
+            )
+        elif waiting and self.limit < self.max_workers:
+            memory_ok = free_mb is None or free_mb > MIN_FREE_MEMORY_MB + SESSION_MEMORY_MB
+            cpu_ok = cpu_busy is None or cpu_busy < MAX_CPU_BUSY * 0.75
+            if memory_ok and cpu_ok:
+                cpu_text = f"CPU {cpu_busy:.0%}" if cpu_busy is not None else "CPU n/a"
+                self._set_limit(
+                    self.limit + 1,
+                    f"{waiting} users queued, median wait {latency or 0:.2f}s, "
+                    f"{timeout_rate:.0%} timeouts, {cpu_text}",
+                )
+
+    def stats(self):
+        return {
+            "minWorkers": self.min_workers,
+            "maxWorkers": self.max_workers,
+            "finalLimit": self.limit,
+            "peakLimit": self.peak_limit,
+            "adjustments": list(self.adjustments),
+        }
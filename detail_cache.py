@@ -0,0 +1,102 @@
+import json
+import os
+import threading
+import time
+
+from logs import log
+
+# Default location and eviction policy for the activity detail cache
+DETAIL_CACHE_PATH = os.getenv("DETAIL_CACHE_PATH", ".cache/activity_details.json")
+DETAIL_CACHE_MAX_ENTRIES = int(os.getenv("DETAIL_CACHE_MAX_ENTRIES", "20000"))
+DETAIL_CACHE_MAX_AGE_DAYS = int(os.getenv("DETAIL_CACHE_MAX_AGE_DAYS", "400"))
+
+
+class DetailCache:
+    """On-disk cache of parsed activity details keyed by activity URL.
+
+    A finished activity's duration and pace never change, so once an activity has
+    been scraped its detail page does not need to be visited again. Entries are
+    evicted when older than ``max_age_days`` or when the cache grows past
+    ``max_entries`` (least recently used first).
+    """
+
+    def __init__(self, path=DETAIL_CACHE_PATH, max_entries=DETAIL_CACHE_MAX_ENTRIES,
+                 max_age_days=DETAIL_CACHE_MAX_AGE_DAYS):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 24 * 60 * 60
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._entries = self._load()
+
+    def _load(self):
+        """Read the cache file, ignoring it if missing or corrupt."""
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f).get("entries", {})
+        except (json.JSONDecodeError, OSError, AttributeError) as e:
+            log.warning(f"Ignoring unreadable detail cache {self.path}: {e}")
+            return {}
+
+        cutoff = time.time() - self.max_age
+        fresh = {url: entry for url, entry in entries.items() if entry.get("fetchedAt", 0) >= cutoff}
+        if len(fresh) != len(entries):
+            self._dirty = True
+        return fresh
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, url):
+        """Return cached {"duration", "pace"} for url, or None."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry["usedAt"] = time.time()
+            self._dirty = True
+            return {"duration": entry["duration"], "pace": entry["pace"]}
+
+    def put(self, url, details):
+        """Store details for url. Incomplete results ("N/A") are not cached."""
+        if not details or "N/A" in (details.get("duration"), details.get("pace")):
+            return
+        now = time.time()
+        with self._lock:
+            self._entries[url] = {
+                "duration": details["duration"],
+                "pace": details["pace"],
+                "fetchedAt": now,
+                "usedAt": now,
+            }
+            self._dirty = True
+
+    def _evict(self):
+        """Drop expired entries, then the least recently used beyond max_entries."""
+        cutoff = time.time() - self.max_age
+        entries = {url: entry for url, entry in self._entries.items() if entry["fetchedAt"] >= cutoff}
+        if len(entries) > self.max_entries:
+            newest = sorted(entries.items(), key=lambda item: item[1]["usedAt"], reverse=True)
+            entries = dict(newest[:self.max_entries])
+        self._entries = entries
+
+    def save(self):
+        """Write the cache to disk if it changed (atomic replace)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._evict()
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"entries": self._entries}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+            self._dirty = False
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+ACTIVITY_TYPES = ["Running", "Running", "Running", "Walking", "Hiking", "Trail Running"]
+
+# Activity list page: month tabs, one tabpanel per month filled client-side from a
+# JSON endpoint, and a "Load More" button when a month has more than one page.
+ACTIVITY_LIST_HTML = """<!doctype html>
+<html>
+<head><meta charset="utf-8"><title>Activity list</title></head>
+<body>
+  <nav class="months">{tabs}</nav>
+  <div class="panels">{panels}</div>
+  <button class="load-more" style="display:none">Load More</button>
+  <script>
+    const userId = {user_id};
+    const pageSize = {page_size};
+    const loadMore = document.querySelector(".load-more");
+    let current = null;
+
+    function renderRows(ul, rows) {{
+      for (const row of rows) {{
+        const li = document.createElement("li");
+        li.innerHTML = `<a href="/user/${{userId}}/activity/${{row.id}}">` +
+          `<span class="startDate">${{row.date}}</span>` +
+          `<span class="activityType">${{row.type}}</span>` +
+          `<span class="unitDistance">${{row.distance}}</span></a>`;
+        ul.appendChild(li);
+      }}
+    }}
+
+    async function loadMonth(month, offset) {{
+      const response = await fetch(`/user/${{userId}}/activitylist/${{month}}?offset=${{offset}}`);
+      const data = await response.json();
+      const ul = document.querySelector(`#panel-${{month}} ul`);
+      renderRows(ul, data.rows);
+      current = {{ month, offset: offset + data.rows.length, total: data.total }};
+      loadMore.style.display = current.offset < data.total ? "" : "none";
+    }}
+
+    document.querySelectorAll("[data-date]").forEach((tab) => {{
+      tab.addEventListener("click", (event) => {{
+        event.preventDefault();
+        const month = tab.dataset.date.split("-")[0];
+        document.querySelectorAll('div[role="tabpanel"]').forEach((panel) => {{
+          const selected = panel.id === `panel-${{month}}`;
+          panel.setAttribute("aria-hidden", selected ? "false" : "true");
+          panel.style.display = selected ? "" : "none";
+          if (selected) panel.querySelector("ul").innerHTML = "";
+        }});
+        loadMore.style.display = "none";
+        loadMonth(month, 0);
+      }});
+    }});
+
+    loadMore.addEventListener("click", () => loadMonth(current.month, current.offset));
+  </script>
+</body>
+</html>
+"""
+
+ACTIVITY_DETAIL_HTML = """<!doctype html>
+<html>
+<head><meta charset="utf-8"><title>Activity</title></head>
+<body>
+  <div id="totalDuration"><h1>{duration}</h1><p>Duration</p></div>
+  <div id="averagePace"><h1>{pace}</h1><p>Pace</p></div>
+  {script}
+</body>
+</html>
+"""
+
+# Client-rendered variant: stats only appear after JS runs, forcing the browser fallback
+CLIENT_RENDER_SCRIPT = """<script>
+    setTimeout(() => {{
+      document.querySelector("#totalDuration h1").innerHTML = "<span>{duration}</span>";
+      document.querySelector("#averagePace h1").innerHTML = "<span>{pace}</span>";
+    }}, {delay});
+  </script>"""
+
+
+def _format_minutes(total_seconds):
+    minutes, seconds = divmod(int(total_seconds), 60)
+    if minutes >= 60:
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+class FixtureSite:
+    """Local stand-in for runkeeper.com serving synthetic users and activities.
+
+    Serves the same markup the scrapers rely on: ``data-date`` month tabs,
+    ``div[role="tabpanel"] ul > li`` rows with ``span.startDate`` and
+    ``span.unitDistance``, a "Load More" button, and detail pages with
+    ``#totalDuration > h1 > span`` / ``#averagePace > h1 > span``. Data is
+    generated deterministically from the user id, so runs are reproducible.
+
+    Args:
+        activities_per_month (int): Activities generated for every user and month (at most 99)
+        page_size (int): Rows per list page; more rows are behind "Load More"
+        latency_ms (int): Delay added to every response
+        client_rendered_details (bool): Render detail stats with JS instead of in the HTML
+        year (int): Year used for the month tabs (defaults to the current year)
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, activities_per_month=12, page_size=20,
+                 latency_ms=50, client_rendered_details=False, year=None):
+        self.activities_per_month = activities_per_month
+        self.page_size = page_size
+        self.latency = latency_ms / 1000
+        self.client_rendered_details = client_rendered_details
+        self.year = year or datetime.now().year
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fixture-site", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def month_activities(self, user_id, month):
+        """Deterministic synthetic activities for one user and month abbreviation."""
+        month_number = MONTHS.index(month) + 1
+        rng = random.Random(f"{user_id}-{self.year}-{month_number}")
+        activities = []
+        for index in range(self.activities_per_month):
+            distance = round(rng.uniform(1.0, 8.0), 2)
+            pace_seconds = rng.randint(420, 900)
+            activities.append({
+                "id": user_id * 10000 + month_number * 100 + index,
+                "date": f"{month} {min(28, 1 + index * 28 // max(1, self.activities_per_month))}",
+                "type": rng.choice(ACTIVITY_TYPES),
+                "distance": f"{distance} mi",
+                "duration": _format_minutes(distance * pace_seconds),
+                "pace": _format_minutes(pace_seconds),
+            })
+        return activities
+
+    def activity(self, activity_id):
+        user_id, rest = divmod(activity_id, 10000)
+        month_number, index = divmod(rest, 100)
+        activities = self.month_activities(user_id, MONTHS[month_number - 1])
+        return activities[index]
+
+    def activity_list_html(self, user_id):
+        tabs = "".join(
+            f'<a href="#" data-date="{month}-01-{self.year}">{month}</a>' for month in MONTHS
+        )
+        panels = "".join(
+            f'<div role="tabpanel" id="panel-{month}" aria-hidden="true" style="display:none"><ul></ul></div>'
+            for month in MONTHS
+        )
+        return ACTIVITY_LIST_HTML.format(tabs=tabs, panels=panels, user_id=user_id, page_size=self.page_size)
+
+    def activity_detail_html(self, activity):
+        if self.client_rendered_details:
+            script = CLIENT_RENDER_SCRIPT.format(
+                duration=activity["duration"], pace=activity["pace"], delay=int(self.latency * 1000)
+            )
+            return ACTIVITY_DETAIL_HTML.format(duration="", pace="", script=script)
+        return ACTIVITY_DETAIL_HTML.format(
+            duration=f"<span>{activity['duration']}</span>", pace=f"<span>{activity['pace']}</span>", script=""
+        )
+
+    def _handler_class(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, content_type="text/html; charset=utf-8"):
+                payload = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                with site._lock:
+                    site.requests += 1
+                if site.latency:
+                    time.sleep(site.latency)
+
+                parts = urlsplit(self.path)
+                segments = [segment for segment in parts.path.split("/") if segment]
+                try:
+                    if not segments:
+                        self._send(200, "<!doctype html><html><body>Fixture home</body></html>")
+                    elif len(segments) == 3 and segments[0] == "user" and segments[2] == "activitylist":
+                        self._send(200, site.activity_list_html(int(segments[1])))
+                    elif len(segments) == 4 and segments[0] == "user" and segments[2] == "activitylist":
+                        offset = int(parse_qs(parts.query).get("offset", ["0"])[0])
+                        rows = site.month_activities(int(segments[1]), segments[3])
+                        body = {"rows": rows[offset:offset + site.page_size], "total": len(rows)}
+                        self._send(200, json.dumps(body), "application/json")
+                    elif len(segments) == 4 and segments[0] == "user" and segments[2] == "activity":
+                        self._send(200, site.activity_detail_html(site.activity(int(segments[3]))))
+                    else:
+                        self._send(404, "Not found", "text/plain")
+                except (ValueError, IndexError):
+                    self._send(404, "Not found", "text/plain")
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a synthetic Runkeeper stand-in for offline scraping")
+    parser.add_argument("--port", type=int, default=8300)
+    parser.add_argument("--activities-per-month", type=int, default=12)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--latency-ms", type=int, default=50)
+    parser.add_argument("--client-rendered-details", action="store_true",
+                        help="Render detail stats with JavaScript so the browser fallback is exercised")
+    args = parser.parse_args()
+
+    site = FixtureSite(
+        port=args.port,
+        activities_per_month=args.activities_per_month,
+        page_size=args.page_size,
+        latency_ms=args.latency_ms,
+        client_rendered_details=args.client_rendered_details,
+    )
+    print(f"Serving fixture site at {site.url} (Ctrl+C to stop)")
+    print(f"Scrape it with: RUNKEEPER_BASE_URL={site.url} RESOURCE_ALLOWED_DOMAINS=127.0.0.1 ...")
+    try:
+        site._server.serve_forever()
+    except KeyboardInterrupt:
+        site.stop()
@@ -1,7 +1,9 @@
 from google.cloud import secretmanager
 import json
+from tracing import traced
 
 
+@traced()
 def gcp_get_secret(
     project_id="932734078447", secret_id="runkeeper_cookie", version_id="latest"
 ):
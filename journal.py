@@ -0,0 +1,140 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+# Append-only record of finished (user, month) units for the current run
+JOURNAL_PATH = os.getenv("SCRAPE_JOURNAL_PATH", os.path.join(".cache", "scrape_journal.jsonl"))
+
+
+class ScrapeJournal:
+    """Append-only JSONL checkpoint of every (user, month) unit as it finishes.
+
+    Each line holds one unit: runner name, YYYY-MM month key and the month's
+    activity dicts. Lines are flushed and fsynced as they are written, so a crash or a
+    cancelled CI job loses at most the unit in progress. A torn last line is
+    ignored when loading.
+
+    A later entry for the same unit replaces the earlier one. Month keys carry
+    their year, so a run interrupted in December can be resumed in January.
+    Units that failed after all retries are journaled with their error; they
+    stay pending, so --resume tries them again.
+    """
+
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        self._units = {}
+        self._failures = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Start a fresh journal, discarding any previous one."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self._units = {}
+            self._failures = {}
+            open(self.path, "w", encoding="utf-8").close()
+
+    def load(self):
+        """Load finished units from an existing journal. Returns the number loaded."""
+        units = {}
+        failures = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn write from an interrupted run
+                    unit = (entry["runner"], entry["month"])
+                    if "error" in entry:
+                        units.pop(unit, None)
+                        failures[unit] = entry["error"]
+                    else:
+                        failures.pop(unit, None)
+                        units[unit] = entry["activities"]
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self._units = units
+            self._failures = failures
+        return len(units)
+
+    def _append(self, entry):
+        """Write one line and make it durable before returning (caller holds the lock)."""
+        line = json.dumps(entry, ensure_ascii=False)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record(self, runner, month, activities):
+        """Append one finished unit and make it durable before returning."""
+        entry = {
+            "runner": runner,
+            "month": month,
+            "finishedAt": datetime.now().isoformat(),
+            "activities": activities,
+        }
+        with self._lock:
+            self._append(entry)
+            self._units[(runner, month)] = list(activities)
+            self._failures.pop((runner, month), None)
+
+    def record_failure(self, runner, month, error, attempts):
+        """Append a unit that failed after `attempts` tries; it stays pending."""
+        entry = {
+            "runner": runner,
+            "month": month,
+            "failedAt": datetime.now().isoformat(),
+            "attempts": attempts,
+            "error": str(error),
+        }
+        with self._lock:
+            self._append(entry)
+            self._failures[(runner, month)] = str(error)
+
+    def is_done(self, runner, month):
+        with self._lock:
+            return (runner, month) in self._units
+
+    def pending_months(self, runner, months):
+        """Months of the run not yet journaled for runner, in order."""
+        return [month for month in months if not self.is_done(runner, month)]
+
+    def status(self, runner, months):
+        """{month: "ok" | "failed" | "pending"} for the given months of runner."""
+        with self._lock:
+            return {
+                month: "ok" if (runner, month) in self._units
+                else "failed" if (runner, month) in self._failures
+                else "pending"
+                for month in months
+            }
+
+    def activities(self, runner, months):
+        """All journaled activities of runner for the given months, in month order."""
+        with self._lock:
+            activities = []
+            for month in months:
+                activities.extend(self._units.get((runner, month), []))
+            return activities
+
+    def __len__(self):
+        with self._lock:
+            return len(self._units)
+
+    def finish(self):
+        """Remove the journal after a successful export."""
+        with self._lock:
+            self._units = {}
+            self._failures = {}
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,113 @@
+import json
+import os
+import threading
+
+from logs import log
+
+# Marks a (date, distance, type) key shared by several activities of one runner
+_AMBIGUOUS = object()
+
+
+def activity_key(date, distance, activity_type):
+    """Identity of an activity without a URL: mm/dd/yy date, miles to 0.01 and type."""
+    if not date or distance is None or not activity_type:
+        return None
+    return date, round(float(distance), 2), activity_type.strip().lower()
+
+
+def _has_details(activity):
+    return activity.get("duration", "N/A") != "N/A" and activity.get("pace", "N/A") != "N/A"
+
+
+class RunnerIndex:
+    """Known activities of one runner, looked up by URL or by activity_key."""
+
+    def __init__(self, activities, counters):
+        self._by_url = {}
+        self._by_key = {}
+        self._counters = counters
+        for activity in activities:
+            if not _has_details(activity):
+                continue  # Incomplete earlier scrape: fetch again
+            details = {"duration": activity["duration"], "pace": activity["pace"]}
+            if activity.get("url"):
+                self._by_url[activity["url"]] = details
+            key = activity_key(activity.get("date"), activity.get("distance"), activity.get("type"))
+            if key is not None:
+                self._by_key[key] = _AMBIGUOUS if key in self._by_key else details
+
+    def __len__(self):
+        return len(self._by_key) + len(self._by_url)
+
+    def lookup(self, url, date, distance, activity_type):
+        """Details of a matching known activity, or None if the row is new or changed."""
+        details = self._by_url.get(url)
+        if details is None:
+            details = self._by_key.get(activity_key(date, distance, activity_type))
+            if details is _AMBIGUOUS:
+                details = None
+        self._counters.count(details is not None)
+        return dict(details) if details else None
+
+
+class _Counters:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+class KnownActivityIndex:
+    """Per-runner index of the activities already exported to data.json.
+
+    A list row that matches a known activity (same URL, or same date, distance
+    and type) reuses its stored duration and pace, so a nightly rescan only
+    visits detail pages for new or changed activities. Activities stored with
+    "N/A" details are left out so they are fetched again.
+    """
+
+    def __init__(self, runners=None):
+        self._runners = runners or {}
+        self._indexes = {}
+        self._counters = _Counters()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, filename="data.json"):
+        """Build the index from an exported data file; empty if it is missing or unreadable."""
+        if not os.path.exists(filename):
+            return cls()
+        try:
+            with open(filename, "r", encoding="utf-8") as f:
+                runners = json.load(f).get("runners", {})
+        except (json.JSONDecodeError, OSError, AttributeError) as e:
+            log.warning(f"Ignoring unreadable {filename} for the known-activity index: {e}")
+            return cls()
+        return cls({name: runner.get("activities", []) for name, runner in runners.items()})
+
+    @property
+    def hits(self):
+        return self._counters.hits
+
+    @property
+    def misses(self):
+        return self._counters.misses
+
+    def __len__(self):
+        return sum(len(activities) for activities in self._runners.values())
+
+    def for_runner(self, runner):
+        """RunnerIndex for runner, built on first use."""
+        with self._lock:
+            index = self._indexes.get(runner)
+            if index is None:
+                index = RunnerIndex(self._runners.get(runner, []), self._counters)
+                self._indexes[runner] = index
+            return index
@@ -0,0 +1,117 @@
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import re
+import sys
+from contextlib import contextmanager
+
+# Between INFO and WARNING: one line per finished (user, month) and per user, and the run totals
+SUMMARY = 25
+logging.addLevelName(SUMMARY, "SUMMARY")
+LEVELS = {"debug": logging.DEBUG, "info": logging.INFO, "quiet": SUMMARY}
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
+
+# Every module of the scraper logs through this logger
+log = logging.getLogger("runkeeper")
+
+# Runner whose activities the current thread or asyncio task is scraping
+_runner = contextvars.ContextVar("log_runner", default=None)
+_ANSI = re.compile(r"\033\[[0-9;]*m")
+_listener = None
+
+
+@contextmanager
+def runner_context(name):
+    """Tag every record logged inside the block (in this thread or task) with runner name."""
+    token = _runner.set(name)
+    try:
+        yield
+    finally:
+        _runner.reset(token)
+
+
+def event(name, message, level=SUMMARY, **fields):
+    """Log message together with a machine-readable event name and fields (see --log-events)."""
+    log.log(level, message, extra={"event": name, "fields": fields})
+
+
+class _RunnerFilter(logging.Filter):
+    """Copies the runner context onto the record while still in the logging thread."""
+
+    def filter(self, record):
+        if not hasattr(record, "runner"):
+            record.runner = _runner.get()
+        return True
+
+
+class ConsoleFormatter(logging.Formatter):
+    """The message, prefixed with [runner] inside a runner context."""
+
+    def format(self, record):
+        message = record.getMessage()
+        return f"[{record.runner}] {message}" if getattr(record, "runner", None) else message
+
+
+class EventFormatter(logging.Formatter):
+    """One JSON object per record: time, level, runner, event, message and the event's fields."""
+
+    def format(self, record):
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "runner": getattr(record, "runner", None),
+            "event": getattr(record, "event", None),
+            "message": _ANSI.sub("", record.getMessage()).strip(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(level=LOG_LEVEL, events_file=None):
+    """Send log records through a queue to a background thread that writes them.
+
+    Worker threads and asyncio tasks only enqueue records, so they never block
+    on stdout or interleave partial lines. level is "debug" (every activity),
+    "info" (every step of every month) or "quiet" (SUMMARY: per-month and
+    per-user summaries, warnings and errors). events_file receives records of
+    SUMMARY and above as JSON lines whatever the console level.
+    """
+    global _listener
+    import logging.handlers
+
+    stop_logging()
+    console_level = LEVELS[level] if isinstance(level, str) else level
+    console = logging.StreamHandler(sys.stdout)
+    console.setLevel(console_level)
+    console.setFormatter(ConsoleFormatter())
+    handlers = [console]
+    if events_file:
+        events = logging.FileHandler(events_file, mode="w", encoding="utf-8")
+        events.setLevel(SUMMARY)
+        events.setFormatter(EventFormatter())
+        handlers.append(events)
+
+    records = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    queue_handler.addFilter(_RunnerFilter())
+    log.handlers = [queue_handler]
+    log.setLevel(min(handler.level for handler in handlers))
+    log.propagate = False
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Write out every queued record and close the handlers."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
@@ -0,0 +1,115 @@
+import json
+import os
+from datetime import datetime
+
+from roster import shard_label
+
+# Partial results of sharded scrapes (--shard i/N), combined into data.json by the merge command
+PARTIAL_DIR = os.getenv("PARTIAL_DIR", "partials")
+PARTIAL_VERSION = 1
+
+
+def partial_path(shard, directory=PARTIAL_DIR):
+    return os.path.join(directory, f"shard-{shard[0]}-of-{shard[1]}.json")
+
+
+def write_partial(path, shard, activities, months, incremental, failed_runners, failed_months, month_status):
+    """Write one shard's scrape result, everything export_to_json needs to merge it later.
+
+    Args:
+        path (str): Output file
+        shard (tuple): (i, N) of this shard
+        activities (dict): {runner: activity dicts}, in roster order
+        months (list): YYYY-MM keys that were scanned
+        incremental (bool): Whether the export should merge into the existing data
+        failed_runners (set): Runners whose scrape failed
+        failed_months (dict): {runner: month keys} given up on
+        month_status (dict): {runner: {month: "ok" | "failed"}}
+    """
+    partial = {
+        "version": PARTIAL_VERSION,
+        "shard": shard_label(shard),
+        "createdAt": datetime.now().isoformat(),
+        "months": list(months),
+        "incremental": incremental,
+        "failedRunners": sorted(failed_runners),
+        "failedMonths": {runner: sorted(months_failed) for runner, months_failed in sorted(failed_months.items())},
+        "monthStatus": month_status,
+        "runners": activities,
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(partial, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _load_partial(path):
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            partial = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path} is not valid JSON: {e}")
+    if partial.get("version") != PARTIAL_VERSION:
+        raise ValueError(f"{path} is not a version {PARTIAL_VERSION} partial result")
+    index, count = (int(part) for part in partial["shard"].split("/"))
+    return (index, count), partial
+
+
+def merge_partials(paths):
+    """Combine the partial results of all N shards of one run.
+
+    The merge is deterministic: runners come in shard order, then in the order
+    each shard wrote them, whatever order the files are given in.
+
+    Returns:
+        dict: "activities", "months", "incremental", "failed_runners",
+        "failed_months" and "month_status", in the form export_to_json takes
+
+    Raises:
+        ValueError: If a shard is missing or given twice, the shards disagree on
+            the shard count, months or incremental mode, or a runner is in two shards
+    """
+    if not paths:
+        raise ValueError("No partial results to merge")
+    partials = sorted((_load_partial(path) + (path,) for path in paths), key=lambda item: item[0])
+
+    counts = {shard[1] for shard, _, _ in partials}
+    if len(counts) != 1:
+        raise ValueError(f"Partial results come from different shard counts: {sorted(counts)}")
+    count = counts.pop()
+    indexes = [shard[0] for shard, _, _ in partials]
+    missing = sorted(set(range(1, count + 1)) - set(indexes))
+    duplicated = sorted({index for index in indexes if indexes.count(index) > 1})
+    if missing or duplicated:
+        raise ValueError(
+            f"Need exactly one partial result per shard of {count}"
+            + (f"; missing {', '.join(f'{index}/{count}' for index in missing)}" if missing else "")
+            + (f"; duplicated {', '.join(f'{index}/{count}' for index in duplicated)}" if duplicated else "")
+        )
+
+    _, first, first_path = partials[0]
+    merged = {
+        "activities": {},
+        "months": first["months"],
+        "incremental": first["incremental"],
+        "failed_runners": set(),
+        "failed_months": {},
+        "month_status": {},
+    }
+    owners = {}
+    for _, partial, path in partials:
+        if partial["months"] != merged["months"] or partial["incremental"] != merged["incremental"]:
+            raise ValueError(f"{path} scanned different months or mode than {first_path}")
+        for runner, activities in partial["runners"].items():
+            if runner in owners:
+                raise ValueError(f"{runner} is in both shard {owners[runner]} and shard {partial['shard']}")
+            owners[runner] = partial["shard"]
+            merged["activities"][runner] = activities
+        merged["failed_runners"].update(partial["failedRunners"])
+        for runner, months_failed in partial["failedMonths"].items():
+            merged["failed_months"][runner] = set(months_failed)
+        merged["month_status"].update(partial["monthStatus"])
+    return merged
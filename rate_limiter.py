@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+
+from logs import log
+
+# Requests per second across every worker in the process (0 disables limiting) and the burst allowed above it
+REQUEST_RATE = float(os.getenv("REQUEST_RATE", "5"))
+REQUEST_BURST = int(os.getenv("REQUEST_BURST", "10"))
+# A throttled or failing response halves the rate, down to MIN_REQUEST_RATE
+MIN_REQUEST_RATE = float(os.getenv("MIN_REQUEST_RATE", "0.5"))
+BACKOFF_SECONDS = float(os.getenv("RATE_BACKOFF_SECONDS", "5"))  # Pause when no Retry-After is given
+RECOVERY_SECONDS = 30  # Quiet period before the rate grows back by RECOVERY_FACTOR
+RECOVERY_FACTOR = 1.25
+MAX_RETRY_AFTER = 120
+
+
+def is_throttled(status):
+    """True for responses that mean the site wants fewer requests (429 and 5xx)."""
+    return status is not None and (status == 429 or status >= 500)
+
+
+def _retry_after_seconds(value):
+    try:
+        return min(MAX_RETRY_AFTER, max(0.0, float(value)))
+    except (TypeError, ValueError):
+        return None  # HTTP-date form is not used by the site
+
+
+class RateLimiter:
+    """Process-wide token bucket for every request the scraper sends to the site.
+
+    Every page navigation and detail fetch first takes a token through
+    acquire() (acquire_async() on the event loop). Tokens refill at ``rate`` per
+    second up to ``burst``; callers that find the bucket empty are scheduled
+    one after another, so threads and tasks share one request rate however
+    many workers run.
+
+    Responses are reported through observe(). A 429 or 5xx halves the rate
+    (not below min_rate) and pauses all requests for the Retry-After time, or
+    BACKOFF_SECONDS without one. After RECOVERY_SECONDS without trouble the
+    rate grows back towards the configured one. stats() returns the counters.
+    """
+
+    def __init__(self, rate=REQUEST_RATE, burst=REQUEST_BURST, min_rate=MIN_REQUEST_RATE):
+        self.target_rate = rate
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.min_rate = min(min_rate, rate) if rate > 0 else 0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._last_change = self._updated
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._responses = {}
+        self._waited_seconds = 0.0
+        self._delayed = 0
+        self._backoffs = 0
+        self._lowest_rate = rate
+
+    @property
+    def enabled(self):
+        return self.target_rate > 0
+
+    def _refill(self, now):
+        """Add the tokens earned since the last update at the current rate (caller holds the lock).
+
+        Nothing is earned before the end of a pause, which observe() records as the last update.
+        """
+        self._tokens = min(self.burst, self._tokens + max(0.0, now - self._updated) * self.rate)
+        self._updated = max(self._updated, now)
+
+    def _reserve(self, kind):
+        """Take a token and return how long the caller must wait before sending."""
+        with self._lock:
+            self._requests[kind] = self._requests.get(kind, 0) + 1
+            if not self.enabled:
+                return 0.0
+            now = time.monotonic()
+            self._refill(now)
+            # Tokens may go negative: each waiting caller owns the next free slot, counted from the end of a pause
+            self._tokens -= 1
+            delay = max(0.0, self._paused_until - now) + max(0.0, -self._tokens / self.rate)
+            if delay:
+                self._delayed += 1
+                self._waited_seconds += delay
+            return delay
+
+    def acquire(self, kind="request"):
+        """Block until a request may be sent. Returns the seconds waited."""
+        delay = self._reserve(kind)
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self, kind="request"):
+        """Async counterpart of acquire(): waits without blocking the event loop."""
+        import asyncio  # Only the async engine gets here; importing it up front doubles start-up time
+
+        delay = self._reserve(kind)
+        if delay:
+            await asyncio.sleep(delay)
+        return delay
+
+    def observe(self, status, retry_after=None):
+        """Record a response status; back off on 429/5xx and recover after a quiet period."""
+        with self._lock:
+            self._responses[status] = self._responses.get(status, 0) + 1
+            if not self.enabled:
+                return
+            now = time.monotonic()
+            self._refill(now)
+            if is_throttled(status):
+                old = self.rate
+                self.rate = max(self.min_rate, self.rate / 2)
+                self._lowest_rate = min(self._lowest_rate, self.rate)
+                pause = _retry_after_seconds(retry_after)
+                self._paused_until = max(self._paused_until, now + (BACKOFF_SECONDS if pause is None else pause))
+                self._tokens = min(self._tokens, 0.0)  # No burst straight after being throttled
+                self._updated = max(self._updated, self._paused_until)
+                self._last_change = now
+                self._backoffs += 1
+                log.warning(f"Rate limit {old:.2f} -> {self.rate:.2f} requests/s: HTTP {status}")
+            elif self.rate < self.target_rate and now - self._last_change >= RECOVERY_SECONDS:
+                self.rate = min(self.target_rate, self.rate * RECOVERY_FACTOR)
+                self._last_change = now
+
+    def goto(self, page, url, kind="navigation", **kwargs):
+        """page.goto(url, **kwargs) through the limiter; returns the response."""
+        self.acquire(kind)
+        response = page.goto(url, **kwargs)
+        if response is not None:
+            self.observe(response.status, response.headers.get("retry-after"))
+        return response
+
+    async def goto_async(self, page, url, kind="navigation", **kwargs):
+        """Async counterpart of goto()."""
+        await self.acquire_async(kind)
+        response = await page.goto(url, **kwargs)
+        if response is not None:
+            self.observe(response.status, response.headers.get("retry-after"))
+        return response
+
+    def stats(self):
+        with self._lock:
+            return {
+                "targetRate": self.target_rate,
+                "currentRate": round(self.rate, 3),
+                "lowestRate": round(self._lowest_rate, 3),
+                "burst": self.burst,
+                "requests": dict(self._requests),
+                "responses": {str(status): count for status, count in sorted(self._responses.items(), key=str)},
+                "throttled": sum(count for status, count in self._responses.items() if is_throttled(status)),
+                "backoffs": self._backoffs,
+                "delayedRequests": self._delayed,
+                "waitedSeconds": round(self._waited_seconds, 3),
+            }
+
+
+# Shared by all scraping workers in the process
+rate_limiter = RateLimiter()
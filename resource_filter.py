@@ -0,0 +1,111 @@
+import os
+import threading
+from urllib.parse import urlsplit
+
+# Resource types the scraper needs; everything else (images, fonts, media, ...) is aborted
+DEFAULT_ALLOWED_TYPES = ["document", "script", "stylesheet", "xhr", "fetch"]
+# Only first-party hosts may load; third-party trackers, consent scripts and map tiles are aborted
+DEFAULT_ALLOWED_DOMAINS = ["runkeeper.com"]
+
+# Blocked requests are never downloaded, so their size is estimated per resource type
+ESTIMATED_BYTES = {
+    "image": 40_000,
+    "media": 250_000,
+    "font": 45_000,
+    "script": 60_000,
+    "stylesheet": 20_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+    "document": 30_000,
+}
+DEFAULT_ESTIMATED_BYTES = 10_000
+
+
+def _env_list(name, default):
+    value = os.getenv(name)
+    if not value:
+        return list(default)
+    return [item.strip().lower() for item in value.split(",") if item.strip()]
+
+
+class ResourceFilter:
+    """Allow-list request filter installed on every browser context with context.route().
+
+    A request continues only if its resource type is allowed and its host is one of
+    the allowed domains (or a subdomain of one); everything else is aborted. Counts
+    of blocked requests and an estimate of the bytes saved are kept for the run
+    summary.
+    """
+
+    def __init__(self, allowed_types=None, allowed_domains=None):
+        self.allowed_types = set(allowed_types or _env_list("RESOURCE_ALLOWED_TYPES", DEFAULT_ALLOWED_TYPES))
+        self.allowed_domains = allowed_domains or _env_list("RESOURCE_ALLOWED_DOMAINS", DEFAULT_ALLOWED_DOMAINS)
+        self.allowed_requests = 0
+        self.blocked_requests = 0
+        self.blocked_by_type = {}
+        self.estimated_bytes_saved = 0
+        self._lock = threading.Lock()
+
+    def _allowed_host(self, host):
+        host = host.lower()
+        return any(host == domain or host.endswith(f".{domain}") for domain in self.allowed_domains)
+
+    def allows(self, url, resource_type):
+        """Whether a request for url of the given resource type should load."""
+        if resource_type not in self.allowed_types:
+            return False
+        parts = urlsplit(url)
+        if parts.scheme in ("data", "blob", "about"):
+            return True
+        return self._allowed_host(parts.hostname or "")
+
+    @property
+    def blocks_consent_banner(self):
+        """True when the OneTrust consent script cannot load, so no banner will appear."""
+        return not self.allows("https://cdn.cookielaw.org/scripttemplates/otSDKStub.js", "script")
+
+    def _count(self, allowed, resource_type):
+        with self._lock:
+            if allowed:
+                self.allowed_requests += 1
+                return
+            self.blocked_requests += 1
+            self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+            self.estimated_bytes_saved += ESTIMATED_BYTES.get(resource_type, DEFAULT_ESTIMATED_BYTES)
+
+    def handle_route(self, route):
+        """Route handler for sync Playwright contexts."""
+        request = route.request
+        allowed = self.allows(request.url, request.resource_type)
+        self._count(allowed, request.resource_type)
+        if allowed:
+            route.continue_()
+        else:
+            route.abort()
+
+    async def handle_route_async(self, route):
+        """Route handler for async Playwright contexts."""
+        request = route.request
+        allowed = self.allows(request.url, request.resource_type)
+        self._count(allowed, request.resource_type)
+        if allowed:
+            await route.continue_()
+        else:
+            await route.abort()
+
+    def install(self, context):
+        """Attach the filter to a sync browser context."""
+        context.route("**/*", self.handle_route)
+
+    async def install_async(self, context):
+        """Attach the filter to an async browser context."""
+        await context.route("**/*", self.handle_route_async)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "allowedRequests": self.allowed_requests,
+                "blockedRequests": self.blocked_requests,
+                "blockedByType": dict(self.blocked_by_type),
+                "estimatedBytesSaved": self.estimated_bytes_saved,
+            }
@@ -0,0 +1,60 @@
+import argparse
+import json
+import os
+
+# Runners to scrape: {"runners": [{"id": "<Runkeeper user id>", "name": "<display name>", "active": true}]}
+ROSTER_PATH = os.getenv("ROSTER_PATH", "roster.json")
+
+
+def load_roster(path=ROSTER_PATH):
+    """{user id: name} of the active runners in the roster file, in file order.
+
+    Entries with "active": false are kept in the file but not scraped.
+
+    Raises:
+        ValueError: If the file is not a roster, or an id or name appears twice
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            entries = json.load(f)["runners"]
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            raise ValueError(f"{path} is not a roster file: {e}")
+
+    roster = {}
+    for entry in entries:
+        try:
+            user_id, name = str(entry["id"]), entry["name"]
+        except (KeyError, TypeError):
+            raise ValueError(f"{path}: runner entry {entry!r} needs an id and a name")
+        if user_id in roster or name in roster.values():
+            raise ValueError(f"{path}: runner {name} ({user_id}) is listed twice")
+        if entry.get("active", True):
+            roster[user_id] = name
+    return roster
+
+
+def parse_shard(text):
+    """argparse type for --shard: "i/N" with 1 <= i <= N, returned as (i, N)."""
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid shard {text!r}; use i/N, e.g. 1/3")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {text!r} must have 1 <= i <= N")
+    return index, count
+
+
+def shard_label(shard):
+    return f"{shard[0]}/{shard[1]}"
+
+
+def select_shard(roster, shard):
+    """The runners of roster that belong to shard (i, N).
+
+    Runners are ordered by user id and dealt out round-robin, so every machine
+    with the same roster file picks the same, evenly sized subset, and the N
+    shards together cover the roster exactly once.
+    """
+    index, count = shard
+    selected = {user_id for position, user_id in enumerate(sorted(roster)) if position % count == index - 1}
+    return {user_id: name for user_id, name in roster.items() if user_id in selected}
@@ -0,0 +1,206 @@
+# Site selectors, page scripts and the engine-independent steps of scraping a month,
+# shared by the threaded scraper (update_runkeeper_miles) and the async engine
+# (async_scraper) so that neither has to import the other.
+import logging
+import os
+import random
+
+from activity import Activity, format_export_date, parse_distance, parse_list_date
+from logs import event, log
+
+# ANSI color codes for terminal output
+class Colors:
+    GREEN = '\033[92m'  # ✓
+    RED = '\033[91m'    # ✗
+    YELLOW = '\033[93m' # ⚠️
+    BLUE = '\033[94m'   # →
+    PURPLE = '\033[95m' # 🏃
+    CYAN = '\033[96m'   # 📊
+    WHITE = '\033[97m'  # Regular text
+    BOLD = '\033[1m'    # Bold
+    END = '\033[0m'     # Reset
+
+# Colored symbols
+CHECK = f"{Colors.GREEN}✓{Colors.END}"
+CROSS = f"{Colors.RED}✗{Colors.END}"
+WARNING = f"{Colors.YELLOW}⚠️{Colors.END}"
+ARROW = f"{Colors.BLUE}→{Colors.END}"
+RUNNER = f"{Colors.PURPLE}🏃{Colors.END}"
+CHART = f"{Colors.CYAN}📊{Colors.END}"
+
+# Site to scrape; point at fixture_site.py for offline runs and benchmarks
+BASE_URL = os.getenv("RUNKEEPER_BASE_URL", "https://runkeeper.com").rstrip("/")
+
+# Activity list selectors, tried in order
+ACTIVITY_SELECTORS = [
+    'div[role="tabpanel"][aria-hidden="false"] ul > li',
+    'div[role="tabpanel"] ul > li',
+    '.activity-list li',
+    'ul.activity-list li',
+    'li.activity-item'
+]
+LOAD_MORE_SELECTORS = [
+    'button:has-text("Load More")',
+    'a:has-text("Load More")',
+    'button:has-text("Show More")',
+    'a:has-text("Show More")',
+    '.load-more',
+    '.show-more'
+]
+
+# Extracts every row of the visible month in one round-trip. Activity type is the
+# row text minus the date and distance; a.href is already an absolute URL.
+EXTRACT_ROWS_JS = """
+(selector) => Array.from(document.querySelectorAll(selector), (li) => {
+  const text = (el) => (el ? el.textContent.trim() : "");
+  const dateText = text(li.querySelector("a span.startDate"));
+  const distanceText = text(li.querySelector("a span.unitDistance"));
+  let type = li.textContent;
+  for (const known of [dateText, distanceText]) {
+    if (known) type = type.split(known).join("");
+  }
+  const link = li.querySelector("a");
+  return {
+    date_text: dateText,
+    distance_text: distanceText,
+    type: type.trim(),
+    url: link && link.getAttribute("href") ? link.href : null,
+  };
+})
+"""
+COUNT_ROWS_JS = "(selector) => document.querySelectorAll(selector).length"
+
+# A failed (user, month) unit is retried on a fresh page, waiting MONTH_RETRY_BACKOFF seconds and doubling
+MONTH_RETRIES = int(os.getenv("MONTH_RETRIES", "2"))
+MONTH_RETRY_BACKOFF = float(os.getenv("MONTH_RETRY_BACKOFF", "2"))
+
+
+def clean_activity_rows(raw_rows):
+    """Drop rows without a date, distance or link from EXTRACT_ROWS_JS output."""
+    rows = []
+    for i, row in enumerate(raw_rows or []):
+        if not row.get("date_text") or not row.get("distance_text"):
+            log.debug(f"    {CROSS} Missing date or distance element for activity {i + 1}")
+            continue
+        if not row.get("url"):
+            log.debug(f"{CROSS} No URL found for activity {i + 1}")
+            continue
+        rows.append(row)
+    return rows
+
+
+def fetch_cached_or_http_details(rows, detail_fetcher=None, detail_cache=None):
+    """Resolve activity details from the cache, then over HTTP.
+
+    Args:
+        rows (list): Activity list rows with a "url" key
+        detail_fetcher (DetailFetcher, optional): Shared HTTP fetcher
+        detail_cache (DetailCache, optional): On-disk detail cache
+
+    Returns:
+        dict: Mapping of url to {"duration", "pace"}. Rows missing from it need the
+        browser fallback.
+    """
+    # Activities seen in earlier runs are served from the detail cache
+    details_by_url = {}
+    if detail_cache:
+        for row in rows:
+            cached = detail_cache.get(row["url"])
+            if cached:
+                details_by_url[row["url"]] = cached
+        if details_by_url:
+            log.info(f"  {CHECK} {len(details_by_url)}/{len(rows)} activity details served from cache")
+
+    # Fetch remaining detail pages concurrently over HTTP; the browser is only a fallback
+    uncached_urls = [row["url"] for row in rows if row["url"] not in details_by_url]
+    if detail_fetcher and uncached_urls:
+        log.info(f"  {ARROW} Fetching {len(uncached_urls)} activity details over HTTP...")
+        fetched_details = detail_fetcher.fetch_many(uncached_urls)
+        fetched = sum(1 for details in fetched_details.values() if details)
+        log.info(f"  {CHECK} Fetched {fetched}/{len(uncached_urls)} activity details over HTTP")
+        for url, details in fetched_details.items():
+            if details:
+                details_by_url[url] = details
+                if detail_cache:
+                    detail_cache.put(url, details)
+
+    return details_by_url
+
+
+def find_known_details(rows, known, month_part, year_part):
+    """Details of rows that match activities already in data.json (see KnownActivityIndex).
+
+    Returns:
+        dict: Mapping of url to {"duration", "pace"} for the known rows
+    """
+    known_details = {}
+    for row in rows:
+        day = parse_list_date(row["date_text"], month_part, year_part)
+        details = known.lookup(
+            row["url"],
+            format_export_date(day) if day else None,
+            parse_distance(row["distance_text"]),
+            row["type"],
+        )
+        if details:
+            known_details[row["url"]] = details
+    return known_details
+
+
+def build_activity(row, details, month_part, year_part):
+    """Build the exported activity record from a list row and its details, or None if its date is invalid."""
+    try:
+        activity = Activity.from_row(row, details, month_part, year_part)
+    except ValueError as e:
+        log.warning(f"    {CROSS} Skipping activity {row['url']}: {e}")
+        return None
+    activity_data = activity.to_dict()
+    # Per-activity lines are formatted only when debug logging is on
+    log.debug("    %s Added activity: %s - %smi - %s - %s", CHECK, activity.iso_date, activity.distance,
+              activity_data["duration"], activity_data["pace"])
+    return activity_data
+
+
+class MonthNotLoaded(Exception):
+    """The month tab or its activity list did not appear in time; the month is retried, not treated as empty."""
+
+
+def retry_delay(attempt):
+    """Seconds to wait before retry number attempt (1-based): exponential backoff with up to 25% jitter."""
+    return MONTH_RETRY_BACKOFF * 2 ** (attempt - 1) * (1 + random.random() / 4)
+
+
+def month_retry_delay(month, attempt, error):
+    """Log a failed attempt at month; returns the seconds to wait before retrying it, or None if out of retries."""
+    log.warning(f"  {CROSS} Error processing month {month} (attempt {attempt}): {error}")
+    if attempt > MONTH_RETRIES:
+        return None
+    delay = retry_delay(attempt)
+    log.info(f"  {ARROW} Retrying {month} on a fresh page in {delay:.1f} seconds")
+    return delay
+
+
+def give_up_month(months, index, error, navigation_failed, user_name=None, on_month_failed=None):
+    """Report months[index] as given up on after its last attempt.
+
+    When the activity list itself could not be opened, every remaining month is
+    given up on too. Each month gets a month_failed event and an
+    on_month_failed(user_name, month, error, attempts) call; the export keeps
+    the previous data of all of them.
+
+    Returns:
+        bool: True if the remaining months were given up on and the caller should stop
+    """
+    month = months[index]
+    given_up = months[index:] if navigation_failed else [month]
+    for failed_month in given_up:
+        attempts = MONTH_RETRIES + 1 if failed_month == month else 0
+        message = (f"Gave up on {failed_month} after {attempts} attempts" if attempts
+                   else f"Skipped {failed_month}, the activity list did not open")
+        event("month_failed", f"  {CROSS} {message}: {error}",
+              level=logging.ERROR, month=failed_month, attempts=attempts, error=str(error))
+        if on_month_failed:
+            on_month_failed(user_name, failed_month, error, attempts)
+    if navigation_failed:
+        log.error(f"{CROSS} Could not open the activity list; giving up on {len(given_up)} months")
+    return navigation_failed
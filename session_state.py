@@ -0,0 +1,49 @@
+import json
+import os
+import time
+
+# Playwright storage state (session cookie + cookie consent) shared by every browser context
+STORAGE_STATE_PATH = os.getenv("STORAGE_STATE_PATH", os.path.join(".cache", "storage_state.json"))
+# Capture a new state when any of its cookies expires within this many hours
+STORAGE_STATE_REFRESH_HOURS = float(os.getenv("STORAGE_STATE_REFRESH_HOURS", "24"))
+
+
+def load_storage_state(path=STORAGE_STATE_PATH):
+    """Previously captured storage state, or None if missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return state if isinstance(state, dict) and isinstance(state.get("cookies"), list) else None
+
+
+def save_storage_state(state, path=STORAGE_STATE_PATH):
+    """Write the state atomically, readable only by the owner (it holds the session cookie)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def stale_reason(state, cookie, now=None, refresh_hours=STORAGE_STATE_REFRESH_HOURS):
+    """Why state cannot be reused with the current session cookie, or None if it can.
+
+    The state is stale when it is missing, when its session cookie differs from
+    cookie (the secret was rotated), or when any of its cookies expires within
+    refresh_hours. Session cookies (expires -1) never expire on their own.
+    """
+    if state is None:
+        return "no saved state"
+    stored = next((c for c in state["cookies"] if c.get("name") == cookie["name"]), None)
+    if stored is None or stored.get("value") != cookie["value"]:
+        return f"{cookie['name']} cookie changed"
+    deadline = (now or time.time()) + refresh_hours * 3600
+    expiring = sorted(c["name"] for c in state["cookies"] if 0 < c.get("expires", -1) < deadline)
+    if expiring:
+        return f"expiring cookies: {', '.join(expiring)}"
+    return None
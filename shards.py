@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import re
+
+from activity import month_key, parse_export_date
+
+# Directory for the sharded layout (one file per runner per month plus manifest.json)
+SHARD_DIR = os.getenv("SHARD_DIR", "data")
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def _content_hash(value):
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def runner_slug(runner):
+    """File-system safe directory name for a runner."""
+    return re.sub(r"[^A-Za-z0-9_-]+", "-", runner).strip("-") or "runner"
+
+
+def shard_key(date):
+    """YYYY-MM shard of an mm/dd/yy date, or "unknown" if it cannot be parsed."""
+    day = parse_export_date(date)
+    return month_key(day.year, day.month) if day else "unknown"
+
+
+def _write_json(path, value):
+    """Atomic write: write to a temporary file then replace."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(value, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _load_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def export_shards(formatted_data, directory=SHARD_DIR):
+    """Write formatted export data as one JSON file per runner per month plus a manifest.
+
+    Layout:
+        <directory>/manifest.json
+        <directory>/<runner>/<YYYY-MM>.json   {"runner", "month", "activities"}
+
+    The manifest lists every runner's stats and, per shard, its path, content
+    hash, activity count and distance, so a client can fetch only the months it
+    displays. index.html is not such a client: it loads the published artifact
+    (see artifacts.publish_artifact) or data.json. A shard is rewritten only when its hash differs from the manifest
+    (or the file is missing). Shards that no longer exist are deleted.
+
+    Returns:
+        dict: {"written", "unchanged", "deleted"} shard counts
+    """
+    previous = _load_manifest(directory) or {}
+    previous_shards = {
+        shard["path"]: shard["hash"]
+        for runner in previous.get("runners", {}).values()
+        for shard in runner.get("shards", {}).values()
+    }
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "lastUpdated": formatted_data["metadata"]["lastUpdated"],
+        "totalRunners": formatted_data["metadata"]["totalRunners"],
+        "totalActivities": formatted_data["metadata"]["totalActivities"],
+        "runners": {},
+    }
+    counts = {"written": 0, "unchanged": 0, "deleted": 0}
+    current_paths = set()
+
+    for runner, runner_data in formatted_data["runners"].items():
+        by_month = {}
+        for activity in runner_data["activities"]:
+            by_month.setdefault(shard_key(activity["date"]), []).append(activity)
+
+        shards = {}
+        for month, activities in sorted(by_month.items()):
+            path = f"{runner_slug(runner)}/{month}.json"
+            content = {"runner": runner, "month": month, "activities": activities}
+            content_hash = _content_hash(content)
+            full_path = os.path.join(directory, path)
+            if previous_shards.get(path) == content_hash and os.path.exists(full_path):
+                counts["unchanged"] += 1
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                _write_json(full_path, content)
+                counts["written"] += 1
+            current_paths.add(path)
+            shards[month] = {
+                "path": path,
+                "hash": content_hash,
+                "activities": len(activities),
+                "distance": round(sum(a["distance"] for a in activities if a["distance"]), 2),
+            }
+
+        manifest["runners"][runner] = {"stats": runner_data["stats"], "shards": shards}
+
+    for path in set(previous_shards) - current_paths:
+        try:
+            os.remove(os.path.join(directory, path))
+            counts["deleted"] += 1
+        except FileNotFoundError:
+            pass
+
+    # Leave the manifest alone when only its timestamp would change
+    unchanged = previous and {**previous, "lastUpdated": None} == {**manifest, "lastUpdated": None}
+    if not unchanged:
+        os.makedirs(directory, exist_ok=True)
+        _write_json(os.path.join(directory, MANIFEST_NAME), manifest)
+    return counts
+
@@ -0,0 +1,75 @@
+import json
+from datetime import date, datetime
+
+import pytest
+
+import update_runkeeper_miles
+import years
+
+
+def _activity(day, distance):
+    return {"date": day, "distance": distance, "type": "Running", "duration": "30:00", "pace": "10:00"}
+
+
+@pytest.fixture
+def january(monkeypatch):
+    """Run as if today were the given day of January 2026."""
+    def set_today(day):
+        class FakeDate(date):
+            @classmethod
+            def today(cls):
+                return date(2026, 1, day)
+
+        class FakeDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime(2026, 1, day, 12, 0)
+
+        monkeypatch.setattr(years, "date", FakeDate)
+        monkeypatch.setattr(update_runkeeper_miles, "datetime", FakeDatetime)
+    return set_today
+
+
+@pytest.fixture
+def exported(tmp_path):
+    """A data.json holding 2025, and a full scrape of December 2025 and January 2026."""
+    filename = tmp_path / "data.json"
+    existing = {
+        "Ann": [_activity("03/02/25", 3.0), _activity("12/01/25", 4.0)],
+        "Bob": [_activity("06/15/25", 5.0)],
+    }
+    update_runkeeper_miles.export_to_json({runner: list(a) for runner, a in existing.items()}, str(filename),
+                                          year_dir=None)
+    scraped = {"Ann": [_activity("12/01/25", 4.5), _activity("01/05/26", 2.0)], "Bob": [_activity("01/06/26", 1.0)]}
+    return filename, scraped
+
+
+def _dates(activities):
+    return [activity["date"] for activity in activities]
+
+
+def test_full_scrape_in_january_archives_the_whole_previous_year(tmp_path, january, exported):
+    january(10)
+    filename, scraped = exported
+    update_runkeeper_miles.export_to_json(scraped, str(filename), scanned_months=["2025-12", "2026-01"],
+                                          year_dir=str(tmp_path / "years"))
+
+    archive = years.load_year(2025, str(tmp_path / "years"))
+    assert _dates(archive["Ann"]) == ["03/02/25", "12/01/25"]
+    assert archive["Ann"][1]["distance"] == 4.5
+    assert _dates(archive["Bob"]) == ["06/15/25"]
+    data = json.loads(filename.read_text())
+    assert _dates(data["runners"]["Ann"]["activities"]) == ["03/02/25", "12/01/25", "01/05/26"]
+    assert _dates(data["runners"]["Bob"]["activities"]) == ["06/15/25", "01/06/26"]
+
+
+def test_full_scrape_in_grace_period_keeps_earlier_months(tmp_path, january, exported):
+    january(3)
+    filename, scraped = exported
+    update_runkeeper_miles.export_to_json(scraped, str(filename), scanned_months=["2025-12", "2026-01"],
+                                          year_dir=str(tmp_path / "years"))
+
+    assert years.archived_years(str(tmp_path / "years")) == set()
+    data = json.loads(filename.read_text())
+    assert _dates(data["runners"]["Ann"]["activities"]) == ["03/02/25", "12/01/25", "01/05/26"]
+    assert _dates(data["runners"]["Bob"]["activities"]) == ["06/15/25", "01/06/26"]
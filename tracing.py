@@ -0,0 +1,170 @@
+import argparse
+import contextvars
+import functools
+import itertools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Innermost open span of the current thread or asyncio task
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Lightweight hierarchical span tracer writing one JSON line per finished span.
+
+    Spans nest through a context variable, so nesting follows both threads and
+    asyncio tasks. A span opened where no span is active (e.g. in a worker thread)
+    is attached to the run's root span. When no trace file is open, spans are
+    no-ops apart from the bookkeeping dict they yield.
+
+    Each record: id, parent, name, start (epoch seconds), duration (seconds),
+    outcome ("ok", "error" or a value set on the span), thread and attrs.
+    """
+
+    def __init__(self):
+        self._file = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._root_id = None
+
+    @property
+    def enabled(self):
+        return self._file is not None
+
+    def start(self, filename):
+        """Start writing spans to filename (truncated)."""
+        self._file = open(filename, "w", encoding="utf-8")
+        self._root_id = None
+
+    def stop(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def current_id(self):
+        span = _current_span.get()
+        return span["id"] if span else self._root_id
+
+    def set_outcome(self, outcome):
+        """Set the outcome of the innermost open span, if any."""
+        span = _current_span.get()
+        if span is not None:
+            span["outcome"] = outcome
+
+    def _write(self, record):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._file:
+                self._file.write(line + "\n")
+                self._file.flush()
+
+    @contextmanager
+    def span(self, name, parent=None, **attrs):
+        """Time a block as a span. Set span["outcome"] or span["attrs"][...] inside it."""
+        span = {"id": next(self._ids), "name": name, "outcome": "ok", "attrs": attrs}
+        if not self.enabled:
+            yield span
+            return
+
+        span["parent"] = parent if parent is not None else self.current_id()
+        if span["parent"] is None:
+            self._root_id = span["id"]
+        token = _current_span.set(span)
+        start = time.time()
+        perf_start = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span["outcome"] = "error"
+            raise
+        finally:
+            _current_span.reset(token)
+            self._write({
+                "id": span["id"],
+                "parent": span["parent"],
+                "name": name,
+                "start": round(start, 6),
+                "duration": round(time.perf_counter() - perf_start, 6),
+                "outcome": span["outcome"],
+                "thread": threading.current_thread().name,
+                "attrs": span["attrs"],
+            })
+
+    def traced(self, name=None):
+        """Decorator recording every call of a function as a span."""
+        def decorator(func):
+            span_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+# Process-wide tracer; enabled with tracer.start(filename)
+tracer = Tracer()
+span = tracer.span
+traced = tracer.traced
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize_trace(filename):
+    """Aggregate a trace file into per-phase statistics.
+
+    Returns:
+        dict: span name -> {count, errors (outcome not "ok"), total, p50, p95, max} (seconds)
+    """
+    durations = {}
+    errors = {}
+    with open(filename, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            durations.setdefault(record["name"], []).append(record["duration"])
+            if record["outcome"] != "ok":
+                errors[record["name"]] = errors.get(record["name"], 0) + 1
+
+    summary = {}
+    for name, values in durations.items():
+        values.sort()
+        summary[name] = {
+            "count": len(values),
+            "errors": errors.get(name, 0),
+            "total": sum(values),
+            "p50": _percentile(values, 0.5),
+            "p95": _percentile(values, 0.95),
+            "max": values[-1],
+        }
+    return summary
+
+
+def print_trace_summary(filename):
+    """Print p50/p95 per phase, slowest total first."""
+    summary = summarize_trace(filename)
+    print(f"{'phase':<24} {'count':>6} {'non-ok':>6} {'total s':>9} {'p50 s':>8} {'p95 s':>8} {'max s':>8}")
+    for name, stats in sorted(summary.items(), key=lambda item: item[1]["total"], reverse=True):
+        print(
+            f"{name:<24} {stats['count']:>6} {stats['errors']:>6} {stats['total']:>9.2f} "
+            f"{stats['p50']:>8.3f} {stats['p95']:>8.3f} {stats['max']:>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect scraper trace files")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    summary_parser = subparsers.add_parser("summary", help="Print p50/p95 durations per phase")
+    summary_parser.add_argument("trace_file", help="JSONL trace written with --trace")
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        print_trace_summary(args.trace_file)
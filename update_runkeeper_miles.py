@@ -1,50 +1,53 @@
 #!/usr/bin/env python3
-import browser_cookie3
+# Browser, cookie-jar and cloud SDK imports are deferred to the scrape path so that
+# `export` and `stats` (and modules importing this one) start without them.
 import json
-from playwright.sync_api import sync_playwright
+import logging
 from datetime import datetime
 # from pprint import pprint  # Commented out since we disabled pprint output
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 import time
 import argparse
+import hashlib
 import os
-from gcp_secret import gcp_get_secret
-
-# ANSI color codes for terminal output
-class Colors:
-    GREEN = '\033[92m'  # ✓
-    RED = '\033[91m'    # ✗
-    YELLOW = '\033[93m' # ⚠️
-    BLUE = '\033[94m'   # →
-    PURPLE = '\033[95m' # 🏃
-    CYAN = '\033[96m'   # 📊
-    WHITE = '\033[97m'  # Regular text
-    BOLD = '\033[1m'    # Bold
-    END = '\033[0m'     # Reset
-
-# Colored symbols
-CHECK = f"{Colors.GREEN}✓{Colors.END}"
-CROSS = f"{Colors.RED}✗{Colors.END}"
-WARNING = f"{Colors.YELLOW}⚠️{Colors.END}"
-ARROW = f"{Colors.BLUE}→{Colors.END}"
-RUNNER = f"{Colors.PURPLE}🏃{Colors.END}"
-CHART = f"{Colors.CYAN}📊{Colors.END}"
-
-# from gcp_secret import gcp_get_secret  # Unused in current implementation
+import sys
+from detail_cache import DetailCache
+from concurrency import AdaptiveConcurrency
+from journal import JOURNAL_PATH, ScrapeJournal
+from known_activities import KnownActivityIndex, activity_key
+from activity import month_key, month_tab_date, normalize_activities, parse_export_date, parse_month_key
+from scraping import (
+    ACTIVITY_SELECTORS, ARROW, BASE_URL, CHART, CHECK, COUNT_ROWS_JS, CROSS, EXTRACT_ROWS_JS, LOAD_MORE_SELECTORS,
+    MONTH_RETRIES, RUNNER, WARNING, MonthNotLoaded, build_activity, clean_activity_rows, fetch_cached_or_http_details,
+    find_known_details, give_up_month, month_retry_delay,
+)
+from years import YEAR_DIR, activity_month, apply_year_archives, archived_years
+from session_state import STORAGE_STATE_PATH, load_storage_state, save_storage_state, stale_reason
+from shards import SHARD_DIR, export_shards
+from columnar import COLUMNAR_PATH, export_columnar
+from aggregates import AGGREGATES_PATH, export_aggregates
+from artifacts import ARTIFACT_DIR, POINTER_NAME, publish_artifact
+from roster import ROSTER_PATH, load_roster, parse_shard, select_shard, shard_label
+from partials import PARTIAL_DIR, merge_partials, partial_path, write_partial
+from wait_policy import wait_policy
+from rate_limiter import rate_limiter
+from resource_filter import ResourceFilter
+from tracing import span, traced, tracer
+from logs import LOG_LEVEL, SUMMARY, event, log, runner_context, setup_logging
 
 ESSENTIAL_COOKIE_NAME = "checker"
 TARGET_URL = "runkeeper.com"
 TRACKED_ACTIVITIES = ["running", "hiking", "walking", "trail running"]
 
 # Configuration for concurrent scraping
-MAX_WORKERS = int(os.getenv("MAX_WORKERS", "4"))  # Number of concurrent browser sessions (2 users at a time)
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "4"))  # Upper bound on concurrent browser sessions
 HEADLESS_MODE = True  # Set to False for debugging (shows browser windows)
 
 # Performance notes:
-# - Higher MAX_WORKERS = faster scraping but more resource usage
-# - Recommended: 2-4 workers for most systems
-# - Each worker runs its own browser instance
+# - Active sessions start at INITIAL_WORKERS and adapt between MIN_WORKERS and MAX_WORKERS
+#   from page latency, timeouts and CPU/memory headroom (--fixed-workers disables this)
+# - Each worker owns one long-lived browser; users get a fresh context per task
+# - Activity detail pages are fetched over HTTP by DETAIL_WORKERS shared connections
 
 
 def cookie_to_dict(cookie):
@@ -73,117 +76,61 @@ def cookie_to_dict(cookie):
     }
 
 
-def convert_distance_to_float(distance_string):
-    """Converts a distance string (e.g., "2.19 mi", "5 km") to miles int/float."""
-    if not distance_string:
-        return None
-
+def parse_month_argument(text):
+    """argparse type for a month: "3" (this year) or "2025-03"."""
     try:
-        value, unit = distance_string.split()
-        value = float(value)
-
-        if unit.lower() == "mi":
-            return value
-        elif unit.lower() == "km":
-            return value * 0.621371
+        if "-" in text:
+            year, month = parse_month_key(text)
         else:
-            print(f"Unknown unit: {distance_string}")
-            return None
+            year, month = datetime.now().year, int(text)
     except ValueError:
-        return None
-
-
-def normalize_date(date_text, month_part, year_part):
-    """Normalize date to mm/dd/yy format using month context."""
-    try:
-        # If date already has slashes, it might be in mm/dd format
-        if "/" in date_text:
-            parts = date_text.split("/")
-            if len(parts) == 2:
-                month_num, day = parts
-                # Use the year from the month context
-                year_short = year_part[-2:]  # Get last 2 digits of year
-                return f"{month_num.zfill(2)}/{day.zfill(2)}/{year_short}"
-        
-        # If date is in format like "Jan 15" or "15"
-        if " " in date_text:
-            # Format like "Jan 15" - extract just the day
-            day = date_text.split()[-1]
-        else:
-            # Format like "15" - just the day
-            day = date_text
-        
-        # Convert month abbreviation to number
-        month_abbrev = month_part
-        month_map = {
-            'Jan': '01', 'Feb': '02', 'Mar': '03', 'Apr': '04',
-            'May': '05', 'Jun': '06', 'Jul': '07', 'Aug': '08',
-            'Sep': '09', 'Oct': '10', 'Nov': '11', 'Dec': '12'
-        }
-        
-        month_num = month_map.get(month_abbrev, '01')
-        year_short = year_part[-2:]  # Get last 2 digits of year
-        
-        return f"{month_num}/{day.zfill(2)}/{year_short}"
-        
-    except Exception as e:
-        print(f"    {WARNING} Error normalizing date '{date_text}': {e}")
-        # Fallback to original date with year
-        return f"{date_text}/{year_part[-2:]}"
+        raise argparse.ArgumentTypeError(f"invalid month {text!r}; use 1-12 or YYYY-MM")
+    if not 1 <= month <= 12:
+        raise argparse.ArgumentTypeError(f"month {text!r} must be between 1 and 12")
+    return year, month
 
 
 def get_months_until_now(start_month=None, end_month=None):
-    """Returns a list of abbreviated month names from start_month to end_month.
+    """Returns the YYYY-MM keys of every month from start_month to end_month.
     
     Args:
-        start_month (int, optional): Start month number (1-12). If None, starts from January.
-        end_month (int, optional): End month number (1-12). If None, goes until current month.
+        start_month (tuple, optional): (year, month) to start from. If None, starts from January of this year.
+        end_month (tuple, optional): (year, month) to end at. If None, goes until the current month.
     
     Returns:
-        list: List of month abbreviations
+        list: Month keys in order, possibly spanning several years
     """
     current = datetime.now()
-    
-    # If no start_month provided, start from January
-    if start_month is None:
-        start_month_num = 1
-    else:
-        start_month_num = start_month
-    
-    # If no end_month provided, go until current month
-    if end_month is None:
-        end_month_num = current.month
-    else:
-        end_month_num = end_month
-    
+    start_year, start_month_num = start_month or (current.year, 1)
+    end_year, end_month_num = end_month or (current.year, current.month)
+
     # Validate month numbers
     if not (1 <= start_month_num <= 12):
-        raise ValueError(f"Start month ({start_month}) must be between 1 and 12")
+        raise ValueError(f"Start month ({start_month_num}) must be between 1 and 12")
     if not (1 <= end_month_num <= 12):
-        raise ValueError(f"End month ({end_month}) must be between 1 and 12")
+        raise ValueError(f"End month ({end_month_num}) must be between 1 and 12")
     
     # Ensure start_month is not after end_month
-    if start_month_num > end_month_num:
-        raise ValueError(f"Start month ({start_month}) cannot be after end month ({end_month})")
-    
-    # Special case: if scanning only the current month, also include the previous month
-    # This helps with websites that might not have current month data ready
-    months_to_scan = []
-    for month in range(start_month_num, end_month_num + 1):
-        months_to_scan.append(month)
+    if (start_year, start_month_num) > (end_year, end_month_num):
+        raise ValueError(f"Start month ({month_key(start_year, start_month_num)}) cannot be after "
+                         f"end month ({month_key(end_year, end_month_num)})")
     
+    # Months are counted from year 0 so ranges can cross New Year
+    first = start_year * 12 + start_month_num - 1
+    last = end_year * 12 + end_month_num - 1
+
     # If we're only scanning the current month, also include the previous month
-    if (start_month_num == current.month and end_month_num == current.month and 
-        current.month > 1):
-        months_to_scan.insert(0, current.month - 1)
-        print(f"{WARNING} Including previous month ({current.month - 1}) to ensure data availability")
-    
-    return [
-        datetime(current.year, month, 1).strftime("%b") 
-        for month in months_to_scan
-    ]
+    # This helps with websites that might not have current month data ready
+    # (in January that is December of the previous year)
+    if first == last == current.year * 12 + current.month - 1:
+        first -= 1
+        log.info(f"{WARNING} Including previous month ({month_key(first // 12, first % 12 + 1)}) "
+                 "to ensure data availability")
+
+    return [month_key(index // 12, index % 12 + 1) for index in range(first, last + 1)]
 
 
+@traced()
 def handle_cookie_modal(page, timeout=5000):
     """Handle cookie consent modal if it appears on the page."""
     try:
@@ -195,18 +142,22 @@ def handle_cookie_modal(page, timeout=5000):
             )
             if accept_button:
                 accept_button.click()
-                print("Cookie consent accepted")
-                # Wait for any animations/transitions to complete
-                page.wait_for_load_state("networkidle", timeout=timeout)
+                log.info("Cookie consent accepted")
+                # Wait for the banner to go away rather than for the network to idle
+                wait_policy.wait_for_selector(
+                    page, "cookie_banner_closed", "#onetrust-banner-sdk", state="hidden"
+                )
                 return True
     except Exception as e:
-        print(f"{WARNING} No cookie consent modal found or already accepted: {str(e)}")
+        log.warning(f"{WARNING} No cookie consent modal found or already accepted: {str(e)}")
 
     return False
 
 
 def get_essential_cookie(url, browser="firefox"):
     """Get only the essential cookie from the browser"""
+    import browser_cookie3
+
     try:
         cookie_jar = (
             browser_cookie3.firefox(domain_name=url)
@@ -217,19 +168,19 @@ def get_essential_cookie(url, browser="firefox"):
         # Find the essential cookie
         for cookie in cookie_jar:
             if cookie.name == ESSENTIAL_COOKIE_NAME:
-                print(f"{CHECK} Found essential cookie: {cookie.name}")
+                log.info(f"{CHECK} Found essential cookie: {cookie.name}")
                 if hasattr(cookie, "expires") and cookie.expires:
                     try:
                         expiry_date = datetime.fromtimestamp(cookie.expires)
-                        print(f"{CHECK} Expires: {expiry_date}")
+                        log.info(f"{CHECK} Expires: {expiry_date}")
                     except (ValueError, OSError) as e:
-                        print(f"{WARNING} Invalid expiry date: {e}")
+                        log.warning(f"{WARNING} Invalid expiry date: {e}")
                 return cookie_to_dict(cookie)
 
-        print(f"{WARNING} Warning: Could not find essential cookie: {ESSENTIAL_COOKIE_NAME}")
+        log.warning(f"{WARNING} Warning: Could not find essential cookie: {ESSENTIAL_COOKIE_NAME}")
         return None
     except Exception as e:
-        print(f"{CROSS} Error getting cookies: {e}")
+        log.error(f"{CROSS} Error getting cookies: {e}")
         return None
 
 
@@ -253,271 +204,280 @@ def format_cookie_for_playwright(cookie):
     }
 
 
-def scrape_activities(page, user_id, months, user_name=None):
-    """Scrape activities for a specific user"""
-    activities = []
-    name_prefix = f"[{user_name}] " if user_name else ""
+@traced()
+def prepare_storage_state(cookie, path=STORAGE_STATE_PATH, headless=True):
+    """Storage state with the session cookie and cookie consent, for creating every browser context.
+
+    The state saved by an earlier run is reused until its session cookie changes
+    or one of its cookies is about to expire (see session_state.stale_reason);
+    only then is the homepage loaded once to accept the consent banner and a new
+    state captured. Returns None if it cannot be captured.
+    """
+    state = load_storage_state(path)
+    reason = stale_reason(state, cookie)
+    if reason is None:
+        log.info(f"{CHECK} Reusing session state from {path}")
+        return state
+
+    log.info(f"{ARROW} Capturing session state ({reason})...")
+    from playwright.sync_api import sync_playwright
 
     try:
-        print(f"{name_prefix}{ARROW} Navigating to user activity list...")
-        page.goto(f"https://runkeeper.com/user/{user_id}/activitylist")
-        page.wait_for_load_state("networkidle")
-        print(f"{name_prefix}{CHECK} Successfully loaded user activity page")
+        with sync_playwright() as playwright:
+            browser = playwright.firefox.launch(headless=headless)
+            try:
+                context = browser.new_context()
+                context.add_cookies([cookie])
+                page = context.new_page()
+                rate_limiter.goto(page, BASE_URL)
+                handle_cookie_modal(page)
+                state = context.storage_state()
+            finally:
+                browser.close()
     except Exception as e:
-        print(f"{name_prefix}{CROSS} Error navigating to user page: {e}")
-        return activities
+        log.warning(f"{WARNING} Could not capture session state, each session will load the homepage: {e}")
+        return None
+    save_storage_state(state, path)
+    log.info(f"{CHECK} Session state saved to {path}")
+    return state
 
-    for month in months:
-        try:
-            print(f"{name_prefix}Processing month: {month}")
-            current_year = datetime.now().year
-            cur_month = f'[data-date="{month}-01-{current_year}"]'
 
-            try:
-                print(f"{name_prefix}  {ARROW} Looking for month selector: {cur_month}")
-                month_selector = page.wait_for_selector(cur_month, timeout=5000)
-                if not month_selector:
-                    print(f"{name_prefix}  {CROSS} No month selector found for {month}")
-                    continue
-                print(f"{name_prefix}  {CHECK} Found month selector for {month}")
-            except Exception as e:
-                print(f"{name_prefix}  {CROSS} Error finding month selector for {month}: {e}")
-                continue
+@traced("activity_browser")
+def scrape_activity_details(page, activity_url):
+    """Open an activity in a new browser tab and read its duration and pace.
 
-            print(f"{name_prefix}  {ARROW} Clicking month {month}...")
-            month_selector.click()
-            page.wait_for_timeout(2000)
-            print(f"{name_prefix}  {CHECK} Clicked month {month}")
+    Used as the fallback when the HTTP detail fetcher cannot parse the page.
+    """
+    log.debug(f"    {ARROW} Opening activity in new tab...")
 
-            # Wait for content to load with better error handling
+    new_page = page.context.new_page()
+    try:
+        log.debug(f"    {ARROW} Loading activity details...")
+        rate_limiter.goto(new_page, activity_url, kind="detail", wait_until="domcontentloaded")
+
+        # Get duration and pace with error handling; both render together, so the
+        # pace lookup is normally immediate once the duration is present
+        duration_text = "N/A"
+        average_pace_text = "N/A"
+
+        duration_element = wait_policy.wait_for_selector(new_page, "detail_ready", "#totalDuration > h1 > span")
+        if duration_element:
+            duration_text = duration_element.inner_text()
+        else:
+            log.warning("Could not find duration element")
+
+        pace_element = wait_policy.wait_for_selector(new_page, "detail_ready", "#averagePace > h1 > span")
+        if pace_element:
+            average_pace_text = pace_element.inner_text()
+        else:
+            log.warning("Could not find pace element")
+
+        return {"duration": duration_text, "pace": average_pace_text}
+    finally:
+        # Always close the new tab
+        log.debug(f"    {ARROW} Closing activity tab...")
+        new_page.close()
+
+
+def extract_activity_rows(page, selector):
+    """Return date, distance, type and URL for every row matching selector as plain data."""
+    return clean_activity_rows(page.evaluate(EXTRACT_ROWS_JS, selector))
+
+
+def scrape_month(page, month, detail_fetcher=None, detail_cache=None, known=None):
+    """Scrape one month of the activity list page that is already open.
+
+    Returns:
+        list: Activity dicts for the month (empty if the month has no activities)
+
+    Raises:
+        MonthNotLoaded: If the month tab or the activity list times out
+    """
+    log.info(f"Processing month: {month}")
+    cur_month = f'[data-date="{month_tab_date(month)}"]'
+
+    log.debug(f"  {ARROW} Looking for month selector: {cur_month}")
+    month_selector = wait_policy.wait_for_selector(page, "month_tab", cur_month)
+    if not month_selector:
+        raise MonthNotLoaded(f"No month selector found for {month}")
+    log.debug(f"  {CHECK} Found month selector for {month}")
+
+    log.debug(f"  {ARROW} Clicking month {month}...")
+    previous_list = wait_policy.list_signature(page, ACTIVITY_SELECTORS[0])
+    month_selector.click()
+    log.debug(f"  {CHECK} Clicked month {month}")
+
+    # Wait for the visible list to switch to this month and stop growing
+    log.debug(f"  {ARROW} Waiting for activity list to load...")
+    wait_policy.wait_for_list_change(page, ACTIVITY_SELECTORS[0], previous_list)
+    if not wait_policy.wait_for_selector(
+        page, "list_ready", 'div[role="tabpanel"][aria-hidden="false"] ul', state="attached"
+    ):
+        raise MonthNotLoaded(f"Activity list for {month} did not appear")
+    wait_policy.wait_for_stable_count(page, ACTIVITY_SELECTORS[0])
+    log.debug(f"  {CHECK} Activity list loaded for {month}")
+
+    # Read every row of the month in one page.evaluate round-trip
+    # Try multiple selectors for activities
+    rows = []
+    row_selector = ACTIVITY_SELECTORS[0]
+    for selector in ACTIVITY_SELECTORS:
+        rows = extract_activity_rows(page, selector)
+        if rows:
+            row_selector = selector
+            log.debug(f"{CHECK} Found activities using selector: {selector}")
+            break
+    
+    # If still no activities, try scrolling to load more
+    if not rows:
+        log.info(f"{WARNING} No activities found with standard selectors for {month}, trying scroll...")
+        page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        wait_policy.wait_for_stable_count(page, row_selector)
+        rows = extract_activity_rows(page, row_selector)
+    
+    # Try to load more activities if there's a "Load More" button. The list is
+    # already stable here, so the button is either present now or not at all.
+    if rows:
+        try:
+            for load_selector in LOAD_MORE_SELECTORS:
+                try:
+                    load_more_button = page.query_selector(load_selector)
+                    if load_more_button and load_more_button.is_visible():
+                        log.debug(f"{CHECK} Found load more button: {load_selector}")
+                        row_count = page.evaluate(COUNT_ROWS_JS, row_selector)
+                        load_more_button.click()
+                        wait_policy.wait_for_growth(page, row_selector, row_count)
+                        # Get updated activities after loading more
+                        rows = extract_activity_rows(page, row_selector)
+                        log.info(f"{CHECK} After loading more: {len(rows)} activities")
+                        break
+                except Exception:
+                    continue
+        except Exception as e:
+            log.warning(f"{CROSS} Error trying to load more activities: {e}")
+
+    if not rows:
+        log.info(f"{CROSS} No activities found for {month}")
+        tracer.set_outcome("empty")
+        return []
+
+    log.info(f"  {CHECK} Found {len(rows)} activities for {month}")
+
+    # Month context used to normalize dates
+    month_year = cur_month.split('"')[1]  # Extract "Jan-01-2025" from '[data-date="Jan-01-2025"]'
+    month_part = month_year.split('-')[0]  # Extract "Jan"
+    year_part = month_year.split('-')[2]  # Extract current year
+
+    with span("details", rows=len(rows)) as details_span:
+        # Rows already in data.json keep their stored details; only new or changed rows are fetched
+        details_by_url = find_known_details(rows, known, month_part, year_part) if known else {}
+        if details_by_url:
+            log.info(f"  {CHECK} {len(details_by_url)}/{len(rows)} activities already known")
+            details_span["attrs"]["known"] = len(details_by_url)
+        new_rows = [row for row in rows if row["url"] not in details_by_url]
+        details_by_url.update(fetch_cached_or_http_details(new_rows, detail_fetcher, detail_cache))
+
+    month_activities = []
+    for i, row in enumerate(rows):
+        details = details_by_url.get(row["url"])
+        if not details:
             try:
-                print(f"{name_prefix}  {ARROW} Waiting for activity list to load...")
-                # Wait for network activity to complete
-                page.wait_for_load_state("networkidle", timeout=10000)
-                
-                # Wait for the activity list to be visible
-                page.wait_for_selector(
-                    'div[role="tabpanel"][aria-hidden="false"] ul',
-                    state="attached",
-                    timeout=10000,
-                )
-                print(f"{name_prefix}  {CHECK} Activity list loaded for {month}")
+                details = scrape_activity_details(page, row["url"])
+                if detail_cache:
+                    detail_cache.put(row["url"], details)
             except Exception as e:
-                print(f"{name_prefix}  {CROSS} Error loading activity list for {month}: {e}")
+                log.warning(f"    {CROSS} Error getting detailed info for activity {i + 1}: {e}")
                 continue
 
-            # Get fresh references to activities each time
-            try:
-                # Try multiple selectors for activities
-                activity_selectors = [
-                    'div[role="tabpanel"][aria-hidden="false"] ul > li',
-                    'div[role="tabpanel"] ul > li',
-                    '.activity-list li',
-                    'ul.activity-list li',
-                    'li.activity-item'
-                ]
-                
-                monthly_activities = []
-                for selector in activity_selectors:
-                    monthly_activities = page.query_selector_all(selector)
-                    if monthly_activities:
-                        print(f"{name_prefix}{CHECK} Found activities using selector: {selector}")
-                        break
-                
-                # If still no activities, try scrolling to load more
-                if not monthly_activities:
-                    print(f"{name_prefix}{WARNING} No activities found with standard selectors for {month}, trying scroll...")
-                    page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                    page.wait_for_timeout(2000)
-                    monthly_activities = page.query_selector_all('div[role="tabpanel"][aria-hidden="false"] ul > li')
-                
-                # Try to load more activities if there's a "Load More" button
-                if monthly_activities:
-                    try:
-                        load_more_selectors = [
-                            'button:has-text("Load More")',
-                            'a:has-text("Load More")',
-                            'button:has-text("Show More")',
-                            'a:has-text("Show More")',
-                            '.load-more',
-                            '.show-more'
-                        ]
-                        
-                        for load_selector in load_more_selectors:
-                            try:
-                                load_more_button = page.wait_for_selector(load_selector, timeout=2000)
-                                if load_more_button and load_more_button.is_visible():
-                                    print(f"{name_prefix}{CHECK} Found load more button: {load_selector}")
-                                    load_more_button.click()
-                                    page.wait_for_timeout(3000)
-                                    # Get updated activities after loading more
-                                    monthly_activities = page.query_selector_all('div[role="tabpanel"][aria-hidden="false"] ul > li')
-                                    print(f"{name_prefix}{CHECK} After loading more: {len(monthly_activities)} activities")
-                                    break
-                            except Exception:
-                                continue
-                    except Exception as e:
-                        print(f"{name_prefix}{CROSS} Error trying to load more activities: {e}")
-
-                if not monthly_activities:
-                    print(f"{name_prefix}{CROSS} No activities found for {month}")
-                    continue
+        activity = build_activity(row, details, month_part, year_part)
+        if activity:
+            month_activities.append(activity)
 
-                print(f"{name_prefix}  {CHECK} Found {len(monthly_activities)} activities for {month}")
-                
-                # Additional wait to ensure all activities are loaded
-                page.wait_for_timeout(2000)
+    event("month_done", f"  {CHECK} Completed {month}: {len(month_activities)} activities scraped",
+          month=month, activities=len(month_activities))
+    return month_activities
 
-                # Process each activity one at a time to avoid stale element issues
-                print(f"{name_prefix}  {ARROW} Starting to process {len(monthly_activities)} activities...")
-                for i in range(len(monthly_activities)):
-                    try:
-                        print(f"{name_prefix}    [{i + 1}/{len(monthly_activities)}] {ARROW} Processing activity...")
-                        
-                        # Get fresh activity list each time to avoid stale elements
-                        current_activities = page.query_selector_all(
-                            'div[role="tabpanel"][aria-hidden="false"] ul > li'
-                        )
-                        
-                        if i >= len(current_activities):
-                            print(f"{name_prefix}    {CROSS} No more activities found, stopping at {i}")
-                            break
-                            
-                        activity = current_activities[i]
-
-                        # Get fresh selectors for each activity to avoid stale references
-                        date_element = activity.query_selector("a span.startDate")
-                        distance_element = activity.query_selector(
-                            "a span.unitDistance"
-                        )
-
-                        if not date_element or not distance_element:
-                            print(f"{name_prefix}    {CROSS} Missing date or distance element for activity {i + 1}")
-                            continue
-
-                        # Extract text content before clicking
-                        date_text = date_element.text_content().strip()
-                        distance_text = distance_element.text_content().strip()
-
-                        # Get activity type by getting all text and removing known parts
-                        all_content = activity.text_content()
-                        activity_type = (
-                            all_content.replace(date_text, "")
-                            .replace(distance_text, "")
-                            .strip()
-                        )
-                        
-                        # Get the month from the current month selector to normalize the date
-                        month_year = cur_month.split('"')[1]  # Extract "Jan-01-2025" from '[data-date="Jan-01-2025"]'
-                        month_part = month_year.split('-')[0]  # Extract "Jan"
-                        year_part = month_year.split('-')[2]  # Extract current year
-                        
-                        # Debug: Print what we found
-                        print(f"{name_prefix}    {ARROW} Found: {date_text}, {distance_text}, {activity_type}")
-                        print(f"{name_prefix}    {ARROW} Month context: {month_part} {year_part}")
-
-                        # Open activity in new tab to get detailed information
-                        try:
-                            # Get the activity URL first
-                            activity_link = activity.query_selector("a")
-                            if not activity_link:
-                                print(f"{name_prefix}{CROSS} No activity link found for activity {i + 1}")
-                                continue
-                            
-                            # Get the href attribute
-                            activity_url = activity_link.get_attribute("href")
-                            if not activity_url:
-                                print(f"{name_prefix}{CROSS} No URL found for activity {i + 1}")
-                                continue
-                            
-                            # Make sure it's a full URL
-                            if activity_url.startswith("/"):
-                                activity_url = f"https://runkeeper.com{activity_url}"
-                            
-                            print(f"{name_prefix}    {ARROW} Opening activity in new tab...")
-                            
-                            # Small delay to avoid overwhelming the browser
-                            page.wait_for_timeout(500)
-                            
-                            # Open new tab
-                            new_page = page.context.new_page()
-                            
-                            try:
-                                # Navigate to the activity page
-                                print(f"{name_prefix}    {ARROW} Loading activity details...")
-                                new_page.goto(activity_url)
-                                new_page.wait_for_load_state("networkidle", timeout=10000)
-
-                                # Get duration and pace with error handling
-                                duration_text = "N/A"
-                                average_pace_text = "N/A"
-
-                                try:
-                                    duration_element = new_page.wait_for_selector(
-                                        "#totalDuration > h1 > span", timeout=5000
-                                    )
-                                    if duration_element:
-                                        duration_text = duration_element.inner_text()
-                                except Exception:
-                                    print("Could not find duration element")
-
-                                try:
-                                    pace_element = new_page.wait_for_selector(
-                                        "#averagePace > h1 > span", timeout=5000
-                                    )
-                                    if pace_element:
-                                        average_pace_text = pace_element.inner_text()
-                                except Exception:
-                                    print("Could not find pace element")
-
-                                # Convert distance and add to activities
-                                distance_float = convert_distance_to_float(distance_text)
-                                
-                                # Normalize date to mm/dd/yy format using month context
-                                formatted_date = normalize_date(date_text, month_part, year_part)
-                                print(f"{name_prefix}    {ARROW} Normalized date: {date_text} → {formatted_date}")
-                                
-                                activity_data = {
-                                    "date": formatted_date,
-                                    "distance": distance_float,
-                                    "type": activity_type,
-                                    "duration": duration_text,
-                                    "pace": average_pace_text,
-                                }
-                                activities.append(activity_data)
-                                print(f"{name_prefix}    {CHECK} Added activity: {formatted_date} - {distance_float}mi - {duration_text} - {average_pace_text}")
-
-                            finally:
-                                # Always close the new tab
-                                print(f"{name_prefix}    {ARROW} Closing activity tab...")
-                                new_page.close()
-
-                        except Exception as e:
-                            print(f"{name_prefix}    {CROSS} Error getting detailed info for activity {i + 1}: {e}")
-                            # Make sure to close any open tabs
-                            try:
-                                if 'new_page' in locals():
-                                    new_page.close()
-                            except Exception:
-                                pass
-                            continue
-
-                    except Exception as e:
-                        print(f"{name_prefix}    {CROSS} Error processing activity {i + 1}: {e}")
-                        continue
-
-                monthly_count = len([a for a in activities if month.lower() in a.get('date', '').lower()])
-                print(f"{name_prefix}  {CHECK} Completed {month}: {monthly_count} activities scraped")
 
-            except Exception as e:
-                print(f"{name_prefix}  {CROSS} Error getting activities for month {month}: {e}")
-                continue
+def fresh_page(page):
+    """Replace page with a new page in the same context."""
+    new_page = page.context.new_page()
+    try:
+        page.close()
+    except Exception:
+        pass
+    return new_page
 
-        except Exception as e:
-            print(f"{name_prefix}  {CROSS} Error processing month {month}: {e}")
+
+def open_activity_list(page, user_id):
+    """Navigate to the user's activity list; raises if the page cannot be loaded."""
+    log.info(f"{ARROW} Navigating to user activity list...")
+    rate_limiter.goto(page, f"{BASE_URL}/user/{user_id}/activitylist", wait_until="domcontentloaded")
+    # The page is usable once the month tabs are rendered
+    if not wait_policy.wait_for_selector(page, "page_ready", "[data-date]", state="attached"):
+        log.warning(f"{WARNING} Month tabs did not appear; continuing anyway")
+    log.info(f"{CHECK} Successfully loaded user activity page")
+
+
+def scrape_activities(page, user_id, months, user_name=None, detail_fetcher=None, detail_cache=None,
+                      on_month=None, known_activities=None, on_month_failed=None):
+    """Scrape activities for a specific user
+
+    Each month is one unit: a failure is retried up to MONTH_RETRIES times on a
+    fresh page (reopening the activity list) after an exponential backoff. A
+    month that still fails is reported through on_month_failed and skipped; if
+    the activity list itself cannot be opened, the remaining months are too.
+
+    Args:
+        page: Playwright page with the session cookie set
+        user_id (str): Runkeeper user id
+        months (list): YYYY-MM month keys to scrape
+        user_name (str, optional): Display name used in log output
+        detail_fetcher (DetailFetcher, optional): Shared HTTP fetcher for activity
+            detail pages. Without it every detail page is opened in a browser tab.
+        detail_cache (DetailCache, optional): On-disk cache of details keyed by
+            activity URL. Cached activities are not fetched again.
+        on_month (callable, optional): Called with (user_name, month, activities)
+            as each month finishes, e.g. ScrapeJournal.record
+        known_activities (KnownActivityIndex, optional): Activities already exported;
+            matching rows skip the detail fetch
+        on_month_failed (callable, optional): Called with (user_name, month, error,
+            attempts) for each month given up on, e.g. ScrapeJournal.record_failure
+    """
+    activities = []
+    known = known_activities.for_runner(user_name) if known_activities else None
+
+    page_ready = False
+    for index, month in enumerate(months):
+        month_activities = None
+        for attempt in range(1, MONTH_RETRIES + 2):
+            try:
+                if not page_ready:
+                    with span("navigate", user=user_name):
+                        open_activity_list(page, user_id)
+                    page_ready = True
+                with span("month", user=user_name, month=month, attempt=attempt) as month_span:
+                    month_activities = scrape_month(page, month, detail_fetcher, detail_cache, known)
+                    month_span["attrs"]["activities"] = len(month_activities)
+                break
+            except Exception as e:
+                error = e
+                navigation_failed = not page_ready
+                delay = month_retry_delay(month, attempt, e)
+                page = fresh_page(page)
+                page_ready = False
+                if delay is not None:
+                    time.sleep(delay)
+
+        if month_activities is None:
+            if give_up_month(months, index, error, navigation_failed, user_name, on_month_failed):
+                break
             continue
 
-    print(f"{name_prefix}  {CHECK} Finished scraping all months. Total activities: {len(activities)}")
+        activities.extend(month_activities)
+        if on_month:
+            on_month(user_name, month, month_activities)
+
+    log.info(f"  {CHECK} Finished scraping all months. Total activities: {len(activities)}")
     return activities
 
 
@@ -528,134 +488,170 @@ def load_existing_data(filename="data.json"):
             with open(filename, "r", encoding="utf-8") as f:
                 return json.load(f)
         except (json.JSONDecodeError, FileNotFoundError) as e:
-            print(f"{WARNING} Could not load existing data from {filename}: {e}")
+            log.warning(f"{WARNING} Could not load existing data from {filename}: {e}")
             return None
     return None
 
 
-def get_activity_month(activity):
-    """Extract month number from activity date"""
-    try:
-        # Parse the date and return month number
-        date_parts = activity['date'].split('/')
-        if len(date_parts) >= 2:
-            month = int(date_parts[0])  # Month is first part
-            # Validate month is in reasonable range
-            if 1 <= month <= 12:
-                return month
-        return None
-    except (ValueError, KeyError):
-        return None
+def index_activities_by_month(activities):
+    """Group activities by month key (None for unparseable dates)."""
+    by_month = {}
+    for activity in activities:
+        by_month.setdefault(activity_month(activity), []).append(activity)
+    return by_month
 
 
-def merge_activities_by_month(existing_activities, new_activities, scanned_months):
-    """Merge activities by replacing entire months when scanned, keeping unscanned months intact"""
-    if not existing_activities:
-        return new_activities
-    
-    # Convert scanned month abbreviations to numbers
-    month_abbr_to_num = {
-        'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
-        'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
-    }
-    scanned_month_nums = {month_abbr_to_num[month] for month in scanned_months}
-    
-    print(f"{ARROW} Scanned months (numbers): {scanned_month_nums}")
-    print(f"{ARROW} Original activities: {len(existing_activities)}")
-    print(f"{ARROW} New activities: {len(new_activities)}")
-    
-    # Keep activities from months that weren't scanned
+def merge_activities_by_month(existing_by_month, new_activities, scanned_month_keys):
+    """Merge activities by replacing entire months when scanned, keeping unscanned months intact
+
+    Args:
+        existing_by_month (dict): Existing activities from index_activities_by_month
+        new_activities (list): Activities scraped for the scanned months
+        scanned_month_keys (set): YYYY-MM keys of the months that were scanned
+
+    New activities are de-duplicated by URL; rows without one are all kept.
+    """
     kept_activities = []
     removed_activities = []
-    for activity in existing_activities:
-        activity_month = get_activity_month(activity)
-        if activity_month and activity_month not in scanned_month_nums:
-            kept_activities.append(activity)
+    for month, activities in existing_by_month.items():
+        if month and month not in scanned_month_keys:
+            kept_activities.extend(activities)
         else:
-            removed_activities.append(activity)
-    
-    # Add all new activities (from scanned months)
+            removed_activities.extend(activities)
+
+    # Later rows win when the same activity was scraped twice
+    unique_new = {}
+    for activity in new_activities:
+        unique_new[activity.get("url") or id(activity)] = activity
+    new_activities = list(unique_new.values())
+
+    # Compare by date, distance and type, which older exports without URLs also have
+    removed_keys = {activity_key(a["date"], a["distance"], a["type"]) for a in removed_activities}
+    new_keys = {activity_key(a["date"], a["distance"], a["type"]) for a in new_activities}
     merged_activities = kept_activities + new_activities
-    
-    print(f"{CHART} Kept {len(kept_activities)} activities from unscanned months")
-    print(f"{CHART} Removed {len(removed_activities)} activities from scanned months")
-    print(f"{CHART} Added {len(new_activities)} activities from scanned months")
-    print(f"{CHART} Final merged activities: {len(merged_activities)}")
-    
+
+    log.info(f"{CHART} Kept {len(kept_activities)} activities from unscanned months")
+    log.info(f"{CHART} Scanned months: {len(new_keys & removed_keys)} unchanged, {len(new_keys - removed_keys)} new, "
+             f"{len(removed_keys - new_keys)} gone")
+    log.info(f"{CHART} Final merged activities: {len(merged_activities)}")
+
     return merged_activities
 
 
-def export_to_json(activities_data, filename="data.json", incremental=False, scanned_months=None, failed_runners=None):
+def runner_hash(runner_data):
+    """Content hash of one runner's exported data, used to detect unchanged runners."""
+    payload = json.dumps(runner_data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+@traced()
+def export_to_json(activities_data, filename="data.json", incremental=False, scanned_months=None, failed_runners=None,
+                   shard_dir=None, columnar_file=None, aggregates_file=None, artifacts_dir=None,
+                   year_dir=YEAR_DIR, failed_months=None, month_status=None):
     """Export activities data to a JSON file
     
     Args:
         activities_data (dict): New activities data to export
         filename (str): Output filename
         incremental (bool): If True, merge with existing data instead of overwriting
-        scanned_months (list): List of month abbreviations that were scanned
+        scanned_months (list): YYYY-MM keys of the months that were scanned
         failed_runners (set|list|None): Runners whose scrape failed; preserve their existing data
+        shard_dir (str|None): Also write the per-runner, per-month layout here (see shards.export_shards)
+        columnar_file (str|None): Also write the columnar schema here (see columnar.to_columnar)
+        aggregates_file (str|None): Also write precomputed chart series and achievements here
+            (see aggregates.build_aggregates)
+        artifacts_dir (str|None): Also publish minified, gzip/brotli-compressed, content-hashed
+            copies of the data here (see artifacts.publish_artifact)
+        year_dir (str|None): Directory of closed-year archives (see years.apply_year_archives);
+            None disables year partitioning
+        failed_months (dict|None): {runner: month keys} given up on after retries; those
+            months keep their existing data while the runner's other months are updated
+        month_status (dict|None): {runner: {month: "ok" | "failed"}} of this run, written to
+            metadata.monthStatus; None keeps the existing file's
+
+    The existing file is parsed once; its runners are indexed by month only when
+    they are merged, and per-runner content hashes decide whether to write.
     """
     if failed_runners is None:
         failed_runners = set()
+    if failed_months is None:
+        failed_months = {}
+
+    existing_data = load_existing_data(filename)
+    existing_runners = (existing_data or {}).get("runners", {})
 
+    scanned_month_keys = None
     if incremental and scanned_months:
-        # Load existing data
-        existing_data = load_existing_data(filename)
-        
         if existing_data:
-            print(f"{ARROW} Performing incremental update to {filename}")
-            print(f"{ARROW} Scanned months: {scanned_months}")
-            
-            # First, preserve all runners from existing data that weren't in the new scan
-            for runner, runner_data in existing_data["runners"].items():
+            log.info(f"{ARROW} Performing incremental update to {filename}")
+            log.info(f"{ARROW} Scanned months: {scanned_months}")
+            scanned_month_keys = set(scanned_months)
+
+            # Preserve all runners from existing data that weren't in the new scan
+            for runner, runner_data in existing_runners.items():
                 if runner not in activities_data:
-                    # Runner wasn't in the new scan, so preserve their existing data
-                    print(f"{ARROW} Preserving existing data for {runner} (no activities in scanned months)")
+                    log.info(f"{ARROW} Preserving existing data for {runner} (no activities in scanned months)")
                     activities_data[runner] = runner_data["activities"]
-            
-            # Then, merge activities for runners that were in the new scan
-            for runner, new_activities in list(activities_data.items()):
-                if runner in failed_runners and runner in existing_data["runners"]:
-                    # Preserve entire existing runner data on failure
-                    activities_data[runner] = existing_data["runners"][runner]["activities"]
-                    print(f"{WARNING} Preserved existing data for {runner} due to scrape failure")
-                elif runner in existing_data["runners"]:
-                    # If scrape returned no activities for this runner, keep existing data unchanged
-                    if not new_activities:
-                        activities_data[runner] = existing_data["runners"][runner]["activities"]
-                        print(f"{WARNING} No new activities found for {runner}; preserved existing data")
-                        continue
-                    existing_activities = existing_data["runners"][runner]["activities"]
-                    merged_activities = merge_activities_by_month(existing_activities, new_activities, scanned_months)
-                    activities_data[runner] = merged_activities
-                    print(f"{ARROW} Merged activities for {runner}")
-                else:
-                    print(f"{ARROW} Adding new runner: {runner}")
-            
-            # After merging, we need to recalculate ALL statistics since they may be inaccurate
-            print(f"{ARROW} Recalculating statistics after incremental merge...")
         else:
-            print(f"{ARROW} No existing data found, performing full export")
+            log.info(f"{ARROW} No existing data found, performing full export")
     elif incremental:
-        print(f"{WARNING} Incremental mode requested but no scanned months provided, performing full export")
-    elif failed_runners:
-        # Full export but some runners failed; try to preserve their existing data
-        existing_data = load_existing_data(filename)
-        if existing_data:
-            for runner in failed_runners:
-                if runner in existing_data.get("runners", {}):
-                    activities_data[runner] = existing_data["runners"][runner]["activities"]
-                    print(f"{WARNING} Full export: preserved existing data for failed runner {runner}")
-
-    # In full export mode, if a runner has no activities from the scrape but exists in
-    # existing data, preserve their existing activities to avoid overwriting with nothing.
-    if not incremental:
-        existing_data_for_preserve = load_existing_data(filename)
-        if existing_data_for_preserve and "runners" in existing_data_for_preserve:
-            for runner, runner_payload in list(activities_data.items()):
-                if not runner_payload and runner in existing_data_for_preserve["runners"]:
-                    activities_data[runner] = existing_data_for_preserve["runners"][runner]["activities"]
-                    print(f"{WARNING} No activities scraped for {runner} in full export; preserved existing data")
+        log.warning(f"{WARNING} Incremental mode requested but no scanned months provided, performing full export")
+
+    for runner, new_activities in list(activities_data.items()):
+        existing_runner = existing_runners.get(runner)
+        if existing_runner is None:
+            if scanned_month_keys is not None:
+                log.info(f"{ARROW} Adding new runner: {runner}")
+            continue
+        if new_activities is existing_runner["activities"]:
+            continue  # Preserved above
+        if runner in failed_runners:
+            # Preserve entire existing runner data on failure
+            activities_data[runner] = existing_runner["activities"]
+            log.warning(f"{WARNING} Preserved existing data for {runner} due to scrape failure")
+        elif not new_activities:
+            # If scrape returned no activities for this runner, keep existing data unchanged
+            activities_data[runner] = existing_runner["activities"]
+            log.warning(f"{WARNING} No new activities found for {runner}; preserved existing data")
+        elif scanned_month_keys is not None:
+            existing_by_month = index_activities_by_month(existing_runner["activities"])
+            replaced_months = scanned_month_keys - set(failed_months.get(runner, ()))
+            activities_data[runner] = merge_activities_by_month(existing_by_month, new_activities, replaced_months)
+            log.info(f"{ARROW} Merged activities for {runner}")
+        elif failed_months.get(runner) or scanned_months:
+            # Full export: months that failed, and the unscanned months of earlier years, keep what the
+            # previous export had for them; the rest of the current year is replaced by this run
+            existing_by_month = index_activities_by_month(existing_runner["activities"])
+            kept_months = set(failed_months.get(runner, ()))
+            if scanned_months:
+                kept_months.update(
+                    month for month in existing_by_month
+                    if month and month not in scanned_months and parse_month_key(month)[0] < datetime.now().year
+                )
+            kept = [a for month in sorted(kept_months) for a in existing_by_month.get(month, [])]
+            activities_data[runner] = new_activities + kept
+            if failed_months.get(runner):
+                log.warning(f"{WARNING} Kept {len(kept)} existing activities for {runner} from "
+                            f"{len(failed_months[runner])} failed months")
+            elif kept:
+                log.info(f"{ARROW} Kept {len(kept)} existing activities for {runner} from unscanned earlier years")
+
+    if scanned_month_keys is not None:
+        # After merging, we need to recalculate ALL statistics since they may be inaccurate
+        log.info(f"{ARROW} Recalculating statistics after incremental merge...")
+
+    # Finished years come from their archives, never from this run's data
+    if year_dir:
+        # Only months scraped for every runner may close a year
+        covered_months = set() if failed_runners else set(scanned_months or []).difference(*failed_months.values())
+        closed_years, newly_closed = apply_year_archives(
+            activities_data, covered_months, year_dir,
+            {runner: runner_data["activities"] for runner, runner_data in existing_runners.items()},
+        )
+        for year in newly_closed:
+            log.info(f"{CHECK} Closed {year}: archived to {os.path.join(year_dir, f'{year}.json')}")
+        if closed_years:
+            log.info(f"{ARROW} Closed years (read-only): {', '.join(map(str, sorted(closed_years)))}")
     
     # Calculate some useful statistics while formatting the data
     formatted_data = {
@@ -668,10 +664,20 @@ def export_to_json(activities_data, filename="data.json", incremental=False, sca
             ),
         },
     }
+    if month_status is None:
+        month_status = (existing_data or {}).get("metadata", {}).get("monthStatus")
+    if month_status is not None:
+        formatted_data["metadata"]["monthStatus"] = month_status
 
     for runner, activities in activities_data.items():
+        # Parse once: records come out canonical and sorted by date (not by the mm/dd/yy string)
+        parsed, rejected = normalize_activities(activities)
+        for record, reason in rejected:
+            log.warning(f"{WARNING} {runner}: keeping unparseable activity {record} at the end ({reason})")
+        activities = [activity.to_dict() for activity in parsed] + [record for record, _ in rejected]
+
         # Calculate runner statistics from the merged data
-        total_distance = sum(act["distance"] for act in activities if act["distance"])
+        total_distance = sum(act["distance"] for act in activities if isinstance(act.get("distance"), (int, float)))
         # Use sorted list to maintain consistent ordering
         activity_types = sorted(set(act["type"] for act in activities))
 
@@ -682,19 +688,52 @@ def export_to_json(activities_data, filename="data.json", incremental=False, sca
                 "totalDistance": round(total_distance, 2),
                 "activityTypes": activity_types,
             },
-            "activities": sorted(activities, key=lambda x: x["date"]),
+            "activities": activities,
         }
 
-    # If there are no meaningful changes, skip writing to preserve existing file
-    existing_data_for_compare = load_existing_data(filename)
-    if existing_data_for_compare and "runners" in existing_data_for_compare:
-        try:
-            if formatted_data.get("runners") == existing_data_for_compare.get("runners"):
-                print(f"{ARROW} No changes detected in runner data. Skipping write to {filename}.")
-                return
-        except Exception:
-            # If comparison fails for any reason, proceed with write
-            pass
+    if shard_dir:
+        shard_counts = export_shards(formatted_data, shard_dir)
+        log.info(f"{CHART} Shards in {shard_dir}: {shard_counts['written']} written, "
+                 f"{shard_counts['unchanged']} unchanged, {shard_counts['deleted']} deleted")
+
+    # If no runner's content hash changed, skip writing to preserve the existing file
+    unchanged = False
+    if existing_runners:
+        changed_runners = [
+            runner for runner, runner_data in formatted_data["runners"].items()
+            if runner not in existing_runners or runner_hash(runner_data) != runner_hash(existing_runners[runner])
+        ]
+        removed_runners = set(existing_runners) - set(formatted_data["runners"])
+        status_changed = month_status != existing_data.get("metadata", {}).get("monthStatus")
+        unchanged = not changed_runners and not removed_runners and not status_changed
+        if unchanged:
+            # The derived outputs below describe the data.json that stays on disk
+            formatted_data["metadata"]["lastUpdated"] = existing_data.get("metadata", {}).get(
+                "lastUpdated", formatted_data["metadata"]["lastUpdated"]
+            )
+        else:
+            log.info(f"{ARROW} Changed runners: {', '.join(changed_runners) or 'none'}"
+                     + (f"; removed: {', '.join(sorted(removed_runners))}" if removed_runners else "")
+                     + ("; month status changed" if status_changed else ""))
+
+    if columnar_file and not (unchanged and os.path.exists(columnar_file)):
+        columnar_size = export_columnar(formatted_data, columnar_file)
+        log.info(f"{CHART} Columnar export: {columnar_file} ({columnar_size / 1024:.0f} KB)")
+
+    # Averages depend on today's date, so the aggregates are rebuilt on every export and written when they change
+    if aggregates_file:
+        aggregates_size, aggregates_written = export_aggregates(formatted_data, TRACKED_ACTIVITIES, aggregates_file)
+        log.info(f"{CHART} Aggregates: {aggregates_file} ({aggregates_size / 1024:.0f} KB"
+                 f"{'' if aggregates_written else ', unchanged'})")
+
+    if artifacts_dir and not (unchanged and os.path.exists(os.path.join(artifacts_dir, POINTER_NAME))):
+        artifact = publish_artifact(formatted_data, "data", artifacts_dir)
+        sizes = ", ".join(f"{encoding} {size / 1024:.0f} KB" for encoding, size in artifact["bytes"].items())
+        log.info(f"{CHART} Artifact: {os.path.join(artifacts_dir, artifact['path'])} ({sizes})")
+
+    if unchanged:
+        log.info(f"{ARROW} No changes detected in runner data. Skipping write to {filename}.")
+        return
 
     # Atomic write: write to a temporary file then replace
     tmp_filename = f"{filename}.tmp"
@@ -702,134 +741,376 @@ def export_to_json(activities_data, filename="data.json", incremental=False, sca
         json.dump(formatted_data, f, indent=2, ensure_ascii=False)
     os.replace(tmp_filename, filename)
 
-    # pprint(formatted_data)
-    print(f"{CHART} Total runners: {formatted_data['metadata']['totalRunners']}")
-    print(f"{CHART} Total activities: {formatted_data['metadata']['totalActivities']}")
+    log.info(f"{CHART} Total runners: {formatted_data['metadata']['totalRunners']}")
+    log.info(f"{CHART} Total activities: {formatted_data['metadata']['totalActivities']}")
     
     if incremental and scanned_months:
-        print(f"{ARROW} Statistics recalculated for all runners after incremental merge")
+        log.info(f"{ARROW} Statistics recalculated for all runners after incremental merge")
+
+
+def recompute_export(filename="data.json", **outputs):
+    """Re-run export_to_json over the data already in filename, without scraping.
+
+    Recalculates stats and ordering, applies the year archives and writes any
+    requested derived outputs (shard_dir, columnar_file, aggregates_file,
+    artifacts_dir). Needs neither a browser nor the cloud SDK.
+    """
+    existing_data = load_existing_data(filename)
+    if existing_data is None:
+        raise ValueError(f"No exported data in {filename}")
+    activities_data = {runner: runner_data["activities"] for runner, runner_data in existing_data["runners"].items()}
+    export_to_json(activities_data, filename, **outputs)
+
 
+def merge_export(paths, filename="data.json", **outputs):
+    """Combine the partial results of a sharded scrape (see partials.merge_partials) into filename.
 
-def scrape_user_activities(user_id, name, months, cookie):
-    """Scrape activities for a single user in their own browser session"""
+    The merged runners go through export_to_json exactly like a single-machine
+    run, with the months, mode and failures the shards recorded.
+    """
+    merged = merge_partials(paths)
+    if not merged["months"]:
+        log.info(f"{CHECK} Nothing to merge: the shards scanned no months")
+        return
+    log.info(f"{ARROW} Merging {len(paths)} partial results: {len(merged['activities'])} runners, "
+             f"months {merged['months'][0]} to {merged['months'][-1]}")
+    export_to_json(
+        merged["activities"], filename, incremental=merged["incremental"], scanned_months=merged["months"],
+        failed_runners=merged["failed_runners"], failed_months=merged["failed_months"],
+        month_status=merged["month_status"], **outputs,
+    )
+
+
+def print_stats(filename="data.json"):
+    """Print per-runner, per-year activity counts and tracked miles from an exported data file."""
+    existing_data = load_existing_data(filename)
+    if existing_data is None:
+        raise ValueError(f"No exported data in {filename}")
+    tracked = {activity_type.lower() for activity_type in TRACKED_ACTIVITIES}
+
+    print(f"{'Runner':<16} {'Year':>4} {'Activities':>10} {'Tracked mi':>10}  Last activity")
+    for runner, runner_data in sorted(existing_data["runners"].items()):
+        activities, rejected = normalize_activities(runner_data["activities"])
+        by_year = {}
+        for activity in activities:
+            by_year.setdefault(activity.date.year, []).append(activity)
+        for year, year_activities in sorted(by_year.items()):
+            miles = sum(a.distance or 0 for a in year_activities if a.type.lower() in tracked)
+            print(f"{runner:<16} {year:>4} {len(year_activities):>10} {miles:>10.2f}  {year_activities[-1].iso_date}")
+        if rejected:
+            print(f"{runner:<16} {WARNING} {len(rejected)} activities with unparseable dates or distances")
+    metadata = existing_data.get("metadata", {})
+    print(f"{CHART} {metadata.get('totalRunners', len(existing_data['runners']))} runners, "
+          f"{metadata.get('totalActivities', 0)} activities, last updated {metadata.get('lastUpdated', 'unknown')}")
+
+
+def scrape_user_activities(context, user_id, name, months, detail_fetcher=None, detail_cache=None,
+                           skip_cookie_modal=False, on_month=None, known_activities=None, on_month_failed=None):
+    """Scrape activities for a single user in a browser context from the BrowserPool"""
     thread_id = threading.current_thread().name
-    print(f"\n{RUNNER} [Thread-{thread_id}] Starting scraping for {name} ({user_id})")
+    log.info(f"{RUNNER} [Thread-{thread_id}] Starting scraping for {name} ({user_id})")
     
-    try:
-        with sync_playwright() as p:
-            browser = p.firefox.launch(headless=HEADLESS_MODE)
-            context = browser.new_context()
-            context.add_cookies([cookie])
+    with span("user", user=name) as user_span, runner_context(name):
+        try:
             page = context.new_page()
 
-            # Handle cookie modal
-            page.goto("https://runkeeper.com")
-            handle_cookie_modal(page)
+            # Handle cookie modal, unless consent comes from the storage state or the banner is blocked
+            if not skip_cookie_modal:
+                with span("homepage"):
+                    rate_limiter.goto(page, BASE_URL)
+                handle_cookie_modal(page)
 
             # Scrape activities for this user
-            user_activities = scrape_activities(page, user_id, months, name)
-            print(f"{CHECK} [Thread-{thread_id}] Completed {name}: {len(user_activities)} activities found")
+            user_activities = scrape_activities(
+                page, user_id, months, name, detail_fetcher, detail_cache, on_month, known_activities,
+                on_month_failed,
+            )
+            log.info(f"{CHECK} [Thread-{thread_id}] Completed {name}: {len(user_activities)} activities found")
+            user_span["attrs"]["activities"] = len(user_activities)
             
-            browser.close()
             return name, user_activities, True
-            
-    except Exception as e:
-        print(f"{CROSS} [Thread-{thread_id}] Error scraping {name}: {e}")
-        return name, [], False
+                
+        except Exception as e:
+            log.error(f"{CROSS} [Thread-{thread_id}] Error scraping {name}: {e}")
+            user_span["outcome"] = "failed"
+            return name, [], False
+
+
+def write_shard_result(shard, partial_dir, activities, months, incremental, failed_runners, failed_months,
+                       month_status):
+    """Write this shard's partial result for the merge command (see partials.write_partial)."""
+    path = partial_path(shard, partial_dir)
+    write_partial(path, shard, activities, months, incremental, failed_runners, failed_months, month_status)
+    log.log(SUMMARY, f"{CHECK} Partial result for shard {shard_label(shard)} written to {path}; "
+                     f"combine all shards with the merge command")
 
 
-def main(start_month=None, end_month=None, incremental=False):
+@traced("run")
+def main(start_month=None, end_month=None, *, incremental=False, use_detail_cache=True, engine="threads",
+         wait_stats_file=None, filter_resources=True, adaptive_workers=True, resume=False,
+         use_known_activities=True, shard_dir=None, columnar_file=None, aggregates_file=None,
+         artifacts_dir=None, use_session_state=True, roster_file=ROSTER_PATH, shard=None, partial_dir=PARTIAL_DIR):
     start_time = time.time()
+
+    # With --shard i/N this machine scrapes its share of the roster and writes a partial result
+    runners = load_roster(roster_file)
+    if shard:
+        runners = select_shard(runners, shard)
+        log.info(f"{ARROW} Shard {shard_label(shard)}: {len(runners)} runners ({', '.join(runners.values())})")
     
-    # Get months to scan
+    # Get months to scan; closed years are read-only and never scraped again
     months = get_months_until_now(start_month, end_month)
-    print(f"{ARROW} Scraping months: {months}")
+    closed_years = archived_years(YEAR_DIR)
+    closed_months = [month for month in months if parse_month_key(month)[0] in closed_years]
+    if closed_months:
+        log.info(f"{WARNING} Skipping {len(closed_months)} months of closed years "
+                 f"(delete {YEAR_DIR}/<year>.json to reopen one): {closed_months[0]} to {closed_months[-1]}")
+        months = [month for month in months if month not in closed_months]
+    if not months:
+        log.info(f"{CHECK} Nothing to scan: every requested month belongs to a closed year")
+        if shard:
+            # The merge still needs one partial per shard
+            write_shard_result(shard, partial_dir, {}, months, incremental, set(), {}, {})
+        return
+    log.info(f"{ARROW} Scraping months: {months}")
     
     # Try to get cookies from GCP first
     # export GOOGLE_APPLICATION_CREDENTIALS="sixth-emissary-453222-e7-8f56d80eb955.json"
+    from gcp_secret import gcp_get_secret
+
     cookie = gcp_get_secret()
 
     # If no cookies from GCP, get from browser and update GCP
     if not cookie:
-        print("Getting cookie from local browser")
+        log.info("Getting cookie from local browser")
         cookie = get_essential_cookie(TARGET_URL)
         if not cookie:
-            print("Failed to get essential cookie. Exiting.")
-            return
+            if shard:
+                # Every runner of the shard failed: the merge keeps their existing data
+                write_shard_result(
+                    shard, partial_dir, {name: [] for name in runners.values()}, months, incremental,
+                    set(runners.values()), {}, {name: {month: "failed" for month in months} for name in runners.values()},
+                )
+            raise ValueError("Failed to get essential cookie")
 
         # Update GCP with new cookie
         formatted_cookie = format_cookie_for_playwright(cookie)
         # gcp_update_secret(formatted_cookie)
-        print("Exported cookie to GCP Secrets")
+        log.info("Exported cookie to GCP Secrets")
     else:
-        print("Using cookie from GCP Secrets")
+        log.info("Using cookie from GCP Secrets")
         formatted_cookie = format_cookie_for_playwright(cookie)
         # formatted_cookie = cookie
 
     all_activities = {}
+
+    # Every finished (user, month) is journaled; --resume skips the units already there
+    journal_path = JOURNAL_PATH
+    if shard:
+        root, extension = os.path.splitext(JOURNAL_PATH)
+        journal_path = f"{root}.shard-{shard[0]}-of-{shard[1]}{extension}"
+    journal = ScrapeJournal(journal_path)
+    if resume:
+        log.info(f"{ARROW} Resuming: {journal.load()} user-months already journaled in {journal.path}")
+    else:
+        journal.reset()
+    pending_months = {user_id: journal.pending_months(name, months) for user_id, name in runners.items()}
+    pending_users = {user_id: name for user_id, name in runners.items() if pending_months[user_id]}
+
+    # Shared pool of HTTP connections for activity detail pages (0 disables it)
+    from activity_details import DetailFetcher, DETAIL_WORKERS
+
+    detail_fetcher = DetailFetcher(formatted_cookie, DETAIL_WORKERS) if DETAIL_WORKERS > 0 else None
+    detail_cache = DetailCache() if use_detail_cache else None
+    # Activities already in data.json only need their list row, not their detail page
+    known_activities = KnownActivityIndex.from_file() if use_known_activities else None
+
+    # Abort images, fonts, map tiles and third-party scripts in every browser context
+    resource_filter = ResourceFilter() if filter_resources else None
+    # Contexts start from a captured storage state, so no session loads the homepage for the consent banner
+    session_state = prepare_storage_state(formatted_cookie, headless=HEADLESS_MODE) if use_session_state else None
+    skip_cookie_modal = bool(session_state or (resource_filter and resource_filter.blocks_consent_banner))
     
     # Configure concurrent scraping
-    print(f"{RUNNER} Starting concurrent scraping with {MAX_WORKERS} workers")
-    print(f"{WARNING} Headless mode: {HEADLESS_MODE}")
-    print(f"{CHART} Users to process: {len(spartans)}")
-    print(f"{CHART} Incremental update: {incremental}")
-    
-    # Use ThreadPoolExecutor for concurrent scraping
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        # Submit all scraping tasks
-        future_to_user = {
-            executor.submit(scrape_user_activities, user_id, name, months, formatted_cookie): (user_id, name)
-            for user_id, name in spartans.items()
-        }
-        
-        # Collect results as they complete
-        completed_count = 0
-        failed_runners = set()
-        for future in as_completed(future_to_user):
-            user_id, name = future_to_user[future]
-            try:
-                name, user_activities, success = future.result()
-                all_activities[name] = user_activities
-                completed_count += 1
-                elapsed = time.time() - start_time
-                print(f"{CHART} [{completed_count}/{len(spartans)}] Collected data for {name}: {len(user_activities)} activities (Elapsed: {elapsed:.1f}s)")
-                if not success:
+    log.info(f"{RUNNER} Starting concurrent scraping with the {engine} engine (up to {MAX_WORKERS} workers)")
+    log.info(f"{WARNING} Headless mode: {HEADLESS_MODE}")
+    log.info(f"{CHART} Detail fetch workers: {DETAIL_WORKERS}")
+    if rate_limiter.enabled:
+        log.info(f"{CHART} Request rate limit: {rate_limiter.target_rate:g}/s, burst {rate_limiter.burst} (all workers)")
+    if detail_cache:
+        log.info(f"{CHART} Detail cache: {len(detail_cache)} activities in {detail_cache.path}")
+    if known_activities:
+        log.info(f"{CHART} Known activities: {len(known_activities)} in data.json")
+    if resource_filter:
+        log.info(f"{CHART} Resource filter: types {sorted(resource_filter.allowed_types)}, domains {resource_filter.allowed_domains}")
+    log.info(f"{CHART} Users to process: {len(runners)}")
+    log.info(f"{CHART} Incremental update: {incremental}")
+    
+    completed_count = 0
+    failed_runners = set()
+
+    def record_result(name, user_activities, success):
+        nonlocal completed_count
+        # The export is built from the journal, which also holds resumed months
+        all_activities[name] = journal.activities(name, months) if success else user_activities
+        completed_count += 1
+        elapsed = time.time() - start_time
+        event(
+            "runner_done",
+            f"{CHART} [{completed_count}/{len(runners)}] Collected data for {name}: {len(user_activities)} activities "
+            f"(Elapsed: {elapsed:.1f}s)",
+            level=SUMMARY if success else logging.ERROR,
+            runner=name, activities=len(user_activities), success=success, elapsed=round(elapsed, 1),
+        )
+        if not success:
+            failed_runners.add(name)
+
+    for user_id, name in runners.items():
+        if user_id not in pending_users:
+            log.info(f"{CHECK} {name}: all {len(months)} months already journaled")
+            record_result(name, journal.activities(name, months), True)
+
+    pool_stats = None
+    concurrency_stats = None
+    if not pending_users:
+        log.info(f"{CHECK} Nothing left to scrape")
+    elif engine == "async":
+        # One event loop and one browser; users and detail tabs bounded by semaphores
+        from async_scraper import scrape_users_async
+
+        scrape_users_async(
+            pending_users, months, formatted_cookie, record_result, headless=HEADLESS_MODE,
+            detail_fetcher=detail_fetcher, detail_cache=detail_cache, resource_filter=resource_filter,
+            user_months=pending_months, on_month=journal.record, known_activities=known_activities,
+            storage_state=session_state, on_month_failed=journal.record_failure,
+        )
+    else:
+        # Up to MAX_WORKERS pooled browsers; the controller decides how many are active
+        from concurrent.futures import as_completed
+        from browser_pool import BrowserPool
+
+        concurrency = AdaptiveConcurrency(MAX_WORKERS, adaptive=adaptive_workers)
+        wait_policy.add_listener(concurrency.observe)
+        browser_pool = BrowserPool(
+            MAX_WORKERS, cookies=[formatted_cookie], headless=HEADLESS_MODE,
+            context_setup=resource_filter.install if resource_filter else None,
+            concurrency=concurrency, storage_state=session_state,
+        )
+        with concurrency, browser_pool:
+            pool_stats = browser_pool.stats()
+            log.info(f"{CHECK} Started {pool_stats['browsers']} browsers in {pool_stats['startupSeconds']:.1f} seconds")
+
+            # Submit all scraping tasks
+            future_to_user = {
+                browser_pool.submit(
+                    scrape_user_activities, user_id, name, pending_months[user_id], detail_fetcher=detail_fetcher,
+                    detail_cache=detail_cache, skip_cookie_modal=skip_cookie_modal, on_month=journal.record,
+                    known_activities=known_activities, on_month_failed=journal.record_failure,
+                ): (user_id, name)
+                for user_id, name in pending_users.items()
+            }
+
+            # Collect results as they complete
+            for future in as_completed(future_to_user):
+                user_id, name = future_to_user[future]
+                try:
+                    record_result(*future.result())
+                except Exception as e:
+                    log.error(f"{CROSS} Error processing {name}: {e}")
+                    all_activities[name] = []
                     failed_runners.add(name)
-            except Exception as e:
-                print(f"{CROSS} Error processing {name}: {e}")
-                all_activities[name] = []
-                failed_runners.add(name)
+        wait_policy.remove_listener(concurrency.observe)
+        pool_stats = browser_pool.stats()
+        concurrency_stats = concurrency.stats()
+
+    if detail_fetcher:
+        detail_fetcher.close()
+    if detail_cache:
+        detail_cache.save()
+        log.info(f"{CHART} Detail cache: {detail_cache.hits} hits, {detail_cache.misses} misses, {len(detail_cache)} entries saved")
+    if known_activities:
+        log.info(f"{CHART} Known activities: {known_activities.hits} rows reused, {known_activities.misses} new or changed")
 
     total_time = time.time() - start_time
-    print(f"\n{CHECK} Concurrent scraping completed!")
-    print(f"{WARNING} Total time: {total_time:.1f} seconds")
-    print(f"{CHART} Total users processed: {len(all_activities)}")
-    print(f"{CHART} Total activities collected: {sum(len(activities) for activities in all_activities.values())}")
-    print(f"{WARNING} Average time per user: {total_time/len(spartans):.1f} seconds")
-    
-    export_to_json(all_activities, incremental=incremental, scanned_months=months, failed_runners=failed_runners)
+    log.log(SUMMARY, f"{CHECK} Concurrent scraping completed!")
+    log.log(SUMMARY, f"{WARNING} Total time: {total_time:.1f} seconds")
+    if pool_stats:
+        log.info(f"{CHART} Browser start-up: {pool_stats['startupSeconds']:.1f} seconds for {pool_stats['browsers']} browsers")
+        log.info(f"{CHART} Browser contexts: {pool_stats['contextsCreated']} created, {pool_stats['contextsReused']} reused")
+        log.info(f"{CHART} Peak RSS (scraper + browsers): {pool_stats['peakRssBytes'] / (1024 * 1024):.0f} MB")
+    if concurrency_stats:
+        log.info(
+            f"{CHART} Concurrency: {concurrency_stats['finalLimit']} sessions at the end, peak {concurrency_stats['peakLimit']} "
+            f"(bounds {concurrency_stats['minWorkers']}-{concurrency_stats['maxWorkers']}), "
+            f"{len(concurrency_stats['adjustments'])} adjustments"
+        )
+    if resource_filter:
+        filter_stats = resource_filter.stats()
+        blocked_types = ", ".join(f"{resource_type} {count}" for resource_type, count in sorted(filter_stats["blockedByType"].items()))
+        log.info(f"{CHART} Requests blocked: {filter_stats['blockedRequests']} of {filter_stats['blockedRequests'] + filter_stats['allowedRequests']} ({blocked_types or 'none'})")
+        log.info(f"{CHART} Estimated bandwidth saved: {filter_stats['estimatedBytesSaved'] / (1024 * 1024):.1f} MB")
+    limiter_stats = rate_limiter.stats()
+    requests_sent = ", ".join(f"{kind} {count}" for kind, count in sorted(limiter_stats["requests"].items()))
+    log.info(f"{CHART} Requests: {requests_sent or 'none'}; {limiter_stats['throttled']} throttled (429/5xx), "
+             f"{limiter_stats['delayedRequests']} delayed for {limiter_stats['waitedSeconds']:.1f}s")
+    if rate_limiter.enabled:
+        log.info(f"{CHART} Request rate: {limiter_stats['currentRate']:.2f}/s at the end, lowest {limiter_stats['lowestRate']:.2f}/s "
+                 f"(limit {limiter_stats['targetRate']:.2f}/s, burst {limiter_stats['burst']}, {limiter_stats['backoffs']} backoffs)")
+    for wait_name, wait_stats in sorted(wait_policy.summary().items()):
+        log.info(
+            f"{CHART} Wait {wait_name}: {wait_stats['count']}x, total {wait_stats['totalSeconds']:.1f}s, "
+            f"p50 {wait_stats['p50Seconds']:.2f}s, p95 {wait_stats['p95Seconds']:.2f}s, "
+            f"{wait_stats['timeouts']} timeouts (limit {wait_stats['timeoutMs']} ms)"
+        )
+    if wait_stats_file:
+        wait_policy.save(wait_stats_file)
+        log.info(f"{ARROW} Wait timings written to {wait_stats_file}")
+    log.log(SUMMARY, f"{CHART} Total users processed: {len(all_activities)}")
+    log.log(SUMMARY, f"{CHART} Total activities collected: {sum(len(activities) for activities in all_activities.values())}")
+    log.log(SUMMARY, f"{WARNING} Average time per user: {total_time / max(1, len(runners)):.1f} seconds")
+
+    # A month is ok once journaled; anything else (given up on, or its user failed) keeps its old data
+    month_status = {}
+    for name in runners.values():
+        status = journal.status(name, months)
+        month_status[name] = {
+            month: "failed" if name in failed_runners or state != "ok" else "ok" for month, state in status.items()
+        }
+    failed_months = {
+        name: {month for month, state in status.items() if state == "failed"}
+        for name, status in month_status.items() if name not in failed_runners
+    }
+    failed_months = {name: months_failed for name, months_failed in failed_months.items() if months_failed}
+    for name, months_failed in sorted(failed_months.items()):
+        log.warning(f"{WARNING} {name}: kept previous data for failed months {', '.join(sorted(months_failed))}")
+
+    if shard:
+        write_shard_result(
+            shard, partial_dir, {name: all_activities[name] for name in runners.values() if name in all_activities},
+            months, incremental, failed_runners, failed_months, month_status,
+        )
+    else:
+        export_to_json(all_activities, incremental=incremental, scanned_months=months, failed_runners=failed_runners,
+                       shard_dir=shard_dir, columnar_file=columnar_file, aggregates_file=aggregates_file,
+                       artifacts_dir=artifacts_dir, failed_months=failed_months, month_status=month_status)
+    if failed_runners or failed_months:
+        failed_units = sum(len(months_failed) for months_failed in failed_months.values())
+        log.warning(f"{WARNING} Journal kept in {journal.path}; rerun with --resume to retry "
+                    f"{len(failed_runners)} failed users and {failed_units} failed user-months")
+    else:
+        journal.finish()
 
 
 if __name__ == "__main__":
-    # Define spartans data
-    spartans = {
-        "3458344072": "Bruce",
-        "1703449362": "PT",
-        "499228564": "Scotch",
-        "1306204356": "Trinspiration",
-        "2522499234": "Moose",
-        "2920829518": "AutumnBreeze",
-        "2953059004": "Jon",
-        "2948464110": "Tin",
-        "2966454388": "Muscles",
-        "3486035198": "Alfredo",
-        # "3338995094": "Gato",
-        # KnockKnck
-    }
-    
-    # Set up command line argument parsing
+    # Set up command line argument parsing. The scrape command is the default, so
+    # `update_runkeeper_miles.py --incremental` keeps working without naming it.
+    COMMANDS = ("scrape", "export", "recompute", "merge", "stats")
+    argv = sys.argv[1:]
+    if not argv or argv[0] not in COMMANDS + ("-h", "--help"):
+        argv = ["scrape", *argv]
+
     parser = argparse.ArgumentParser(
-        description="Scrape Runkeeper activities for multiple users",
+        description="Scrape Runkeeper activities for multiple users and export them",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Examples:
@@ -838,37 +1119,227 @@ Examples:
   python update_runkeeper_miles.py --start-month 12 --end-month 12  # Scan only December
   python update_runkeeper_miles.py --start-month 11 --incremental   # Scan Nov-Dec with incremental update
   python update_runkeeper_miles.py --start-month 9 --end-month 10   # Scan September-October
+  python update_runkeeper_miles.py --start-month 2025-11 --end-month 2026-01  # Scan across New Year
+  python update_runkeeper_miles.py --engine async     # Scrape all users on one event loop
+  python update_runkeeper_miles.py --resume           # Continue an interrupted run from its journal
+  python update_runkeeper_miles.py --quiet --log-events events.jsonl  # Month summaries only, plus JSON events
+  python update_runkeeper_miles.py --shard 2/3 --incremental  # Scrape a third of the roster into partials/
+  python update_runkeeper_miles.py merge partials/*.json --aggregates  # Combine all shards into data.json
+  python update_runkeeper_miles.py export --aggregates  # Rebuild outputs from data.json, no browser
+  python update_runkeeper_miles.py stats              # Summarize data.json
         """
     )
+    subparsers = parser.add_subparsers(dest="command", metavar="{scrape,export,merge,stats}")
+
+    # Outputs written next to data.json, shared by scrape and export
+    outputs = argparse.ArgumentParser(add_help=False)
+    
+    outputs.add_argument(
+        "--shards",
+        nargs="?",
+        const=SHARD_DIR,
+        metavar="DIR",
+        help=f"Also write one JSON file per runner per month plus manifest.json to DIR (default: {SHARD_DIR}). "
+             "Only changed shards are rewritten."
+    )
+    
+    outputs.add_argument(
+        "--columnar",
+        nargs="?",
+        const=COLUMNAR_PATH,
+        metavar="FILE",
+        help=f"Also write a compact columnar export (epoch days, seconds, interned types) to FILE "
+             f"(default: {COLUMNAR_PATH})."
+    )
+    
+    outputs.add_argument(
+        "--aggregates",
+        nargs="?",
+        const=AGGREGATES_PATH,
+        metavar="FILE",
+        help=f"Also write precomputed cumulative series (day/week/month, per quarter) and achievement "
+             f"tables to FILE (default: {AGGREGATES_PATH})."
+    )
+    
+    outputs.add_argument(
+        "--artifacts",
+        nargs="?",
+        const=ARTIFACT_DIR,
+        metavar="DIR",
+        help=f"Also publish minified data.<hash>.json with .gz/.br variants and a {POINTER_NAME} pointer "
+             f"to DIR (default: {ARTIFACT_DIR}) so the dashboard can cache the data indefinitely."
+    )
     
-    parser.add_argument(
+    outputs.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="Write nested timing spans (run/user/month/activity) to FILE as JSONL. "
+             "Summarize with: python tracing.py summary FILE"
+    )
+
+    # Console verbosity and the machine-readable event stream, shared by scrape and export
+    logging_options = argparse.ArgumentParser(add_help=False)
+    verbosity = logging_options.add_mutually_exclusive_group()
+    verbosity.add_argument(
+        "--quiet",
+        dest="log_level",
+        action="store_const",
+        const="quiet",
+        help="Only log per-month and per-user summaries, warnings and errors."
+    )
+    verbosity.add_argument(
+        "--verbose",
+        dest="log_level",
+        action="store_const",
+        const="debug",
+        help="Also log every activity and every step of a month."
+    )
+    logging_options.add_argument(
+        "--log-events",
+        metavar="FILE",
+        help="Write summaries, warnings and errors to FILE as JSON lines (month_done, month_failed, "
+             "runner_done events carry their fields), whatever the console verbosity."
+    )
+    logging_options.set_defaults(log_level=LOG_LEVEL)
+
+    scrape_parser = subparsers.add_parser(
+        "scrape", parents=[outputs, logging_options], help="Scrape Runkeeper and update data.json (default)"
+    )
+    
+    scrape_parser.add_argument(
         "--start-month", 
-        type=int, 
-        help="Start month number (1-12). If not provided, starts from January."
+        type=parse_month_argument, 
+        help="Start month: 1-12 (this year) or YYYY-MM. If not provided, starts from January."
     )
     
-    parser.add_argument(
+    scrape_parser.add_argument(
         "--end-month", 
-        type=int, 
-        help="End month number (1-12). If not provided, goes until current month."
+        type=parse_month_argument, 
+        help="End month: 1-12 (this year) or YYYY-MM. If not provided, goes until current month."
     )
     
-    parser.add_argument(
+    scrape_parser.add_argument(
         "--incremental", 
         action="store_true", 
         help="Perform incremental update instead of full overwrite. Only used when scanning partial months."
     )
     
-    args = parser.parse_args()
+    scrape_parser.add_argument(
+        "--no-detail-cache",
+        action="store_true",
+        help="Do not read or write the on-disk activity detail cache."
+    )
     
-    # Validate month arguments
-    if args.start_month and not (1 <= args.start_month <= 12):
-        print(f"{CROSS} Invalid start month: {args.start_month}. Must be between 1 and 12")
-        exit(1)
+    scrape_parser.add_argument(
+        "--engine",
+        choices=["threads", "async"],
+        default="threads",
+        help="Scraping engine: 'threads' runs MAX_WORKERS pooled browsers, 'async' runs all users "
+             "on one event loop (ASYNC_MAX_SESSIONS / ASYNC_MAX_PAGES)."
+    )
     
-    if args.end_month and not (1 <= args.end_month <= 12):
-        print(f"{CROSS} Invalid end month: {args.end_month}. Must be between 1 and 12")
-        exit(1)
+    scrape_parser.add_argument(
+        "--wait-stats",
+        metavar="FILE",
+        help="Write per-wait timings (summary and raw samples) to FILE as JSON for tuning wait timeouts."
+    )
+    
+    scrape_parser.add_argument(
+        "--no-resource-filter",
+        action="store_true",
+        help="Load every page resource (images, fonts, third-party scripts). "
+             "Allow-lists: RESOURCE_ALLOWED_TYPES, RESOURCE_ALLOWED_DOMAINS."
+    )
+    
+    scrape_parser.add_argument(
+        "--no-session-state",
+        action="store_true",
+        help=f"Load the homepage and handle the cookie banner in every session instead of reusing "
+             f"the storage state saved in {STORAGE_STATE_PATH}."
+    )
+    
+    scrape_parser.add_argument(
+        "--fixed-workers",
+        action="store_true",
+        help="Run MAX_WORKERS sessions throughout instead of adapting between MIN_WORKERS and MAX_WORKERS "
+             "(threads engine)."
+    )
+    
+    scrape_parser.add_argument(
+        "--refetch-known",
+        action="store_true",
+        help="Fetch detail pages even for activities already in data.json."
+    )
+    
+    scrape_parser.add_argument(
+        "--roster",
+        default=ROSTER_PATH,
+        metavar="FILE",
+        help=f"Runners to scrape (default: {ROSTER_PATH})."
+    )
+    
+    scrape_parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="I/N",
+        help="Scrape only shard I of N of the roster (a stable, even split by user id) and write a partial "
+             "result to --partial-dir instead of data.json. Combine the N partials with the merge command."
+    )
+    
+    scrape_parser.add_argument(
+        "--partial-dir",
+        default=PARTIAL_DIR,
+        metavar="DIR",
+        help=f"Directory for --shard partial results (default: {PARTIAL_DIR})."
+    )
+    
+    scrape_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip user-months already recorded in the scrape journal (SCRAPE_JOURNAL_PATH) by an "
+             "interrupted run. Use the same month range as that run."
+    )
+    
+    export_parser = subparsers.add_parser(
+        "export", aliases=["recompute"], parents=[outputs, logging_options],
+        help="Recompute stats and outputs from the existing data.json without scraping"
+    )
+    export_parser.add_argument("--file", default="data.json", help="Exported data file (default: data.json)")
+    merge_parser = subparsers.add_parser(
+        "merge", parents=[outputs, logging_options],
+        help="Combine the partial results of every --shard into data.json"
+    )
+    merge_parser.add_argument("partials", nargs="+", metavar="PARTIAL", help="Partial result files, one per shard")
+    merge_parser.add_argument("--file", default="data.json", help="Exported data file (default: data.json)")
+    stats_parser = subparsers.add_parser("stats", help="Print per-runner, per-year totals from data.json")
+    stats_parser.add_argument("--file", default="data.json", help="Exported data file (default: data.json)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "stats":
+        print_stats(args.file)
+        exit(0)
+
+    setup_logging(args.log_level, args.log_events)
+
+    if args.command in ("export", "recompute", "merge"):
+        if args.trace:
+            tracer.start(args.trace)
+        outputs = dict(
+            shard_dir=args.shards, columnar_file=args.columnar,
+            aggregates_file=args.aggregates, artifacts_dir=args.artifacts,
+        )
+        try:
+            if args.command == "merge":
+                merge_export(args.partials, args.file, **outputs)
+            else:
+                recompute_export(args.file, **outputs)
+        except ValueError as e:
+            log.error(f"{CROSS} Error: {e}")
+            exit(1)
+        finally:
+            tracer.stop()
+        exit(0)
     
     # Determine if we should use incremental updates
     # Use incremental if:
@@ -880,23 +1351,48 @@ Examples:
         # If scanning partial year, suggest incremental mode
         months_to_scan = get_months_until_now(args.start_month, args.end_month)
         if len(months_to_scan) < 12:  # Less than full year
-            print(f"{WARNING} Scanning only {len(months_to_scan)} months. Consider using --incremental for faster updates.")
+            log.warning(f"{WARNING} Scanning only {len(months_to_scan)} months. Consider using --incremental for faster updates.")
     
     # Start timing the entire script execution
     script_start_time = time.time()
-    print(f"{RUNNER} Script execution started at {time.strftime('%H:%M:%S')}")
-    print("=" * 60)
+    log.info(f"{RUNNER} Script execution started at {time.strftime('%H:%M:%S')}")
+    log.info("=" * 60)
     
+    if args.trace:
+        tracer.start(args.trace)
     try:
-        main(args.start_month, args.end_month, use_incremental)
+        main(
+            start_month=args.start_month,
+            end_month=args.end_month,
+            incremental=use_incremental,
+            use_detail_cache=not args.no_detail_cache,
+            engine=args.engine,
+            wait_stats_file=args.wait_stats,
+            filter_resources=not args.no_resource_filter,
+            adaptive_workers=not args.fixed_workers,
+            resume=args.resume,
+            use_known_activities=not args.refetch_known,
+            shard_dir=args.shards,
+            columnar_file=args.columnar,
+            aggregates_file=args.aggregates,
+            artifacts_dir=args.artifacts,
+            use_session_state=not args.no_session_state,
+            roster_file=args.roster,
+            shard=args.shard,
+            partial_dir=args.partial_dir,
+        )
     except ValueError as e:
-        print(f"{CROSS} Error: {e}")
+        log.error(f"{CROSS} Error: {e}")
         exit(1)
+    finally:
+        tracer.stop()
+    if args.trace:
+        log.info(f"{ARROW} Trace written to {args.trace}")
     
     # Calculate and print total execution time
     script_total_time = time.time() - script_start_time
-    print("=" * 60)
-    print(f"{CHECK} SCRIPT EXECUTION COMPLETED!")
-    print(f"{WARNING} Total execution time: {script_total_time:.1f} seconds ({script_total_time/60:.1f} minutes)")
-    print(f"{CHART} Finished at: {time.strftime('%H:%M:%S')}")
-    print("=" * 60)
+    log.info("=" * 60)
+    log.log(SUMMARY, f"{CHECK} SCRIPT EXECUTION COMPLETED!")
+    log.log(SUMMARY, f"{WARNING} Total execution time: {script_total_time:.1f} seconds ({script_total_time/60:.1f} minutes)")
+    log.info(f"{CHART} Finished at: {time.strftime('%H:%M:%S')}")
+    log.info("=" * 60)
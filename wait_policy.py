@@ -0,0 +1,236 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Bounded fallbacks (ms) for each kind of wait; a condition that never becomes true
+# costs at most this long instead of a fixed sleep on every call.
+DEFAULT_TIMEOUTS = {
+    "page_ready": 15000,
+    "month_tab": 5000,
+    "list_change": 3000,
+    "list_ready": 10000,
+    "list_stable": 5000,
+    "list_growth": 8000,
+    "detail_ready": 10000,
+    "cookie_banner_closed": 5000,
+}
+STABLE_QUIET_MS = 400  # Item count must stay unchanged this long to count as stable
+POLL_MS = 100
+
+# Identifies the content of the visible month tab so a month switch can be detected
+LIST_SIGNATURE_JS = """
+(selector) => {
+  const items = document.querySelectorAll(selector);
+  const first = items.length ? items[0].textContent : "";
+  const last = items.length ? items[items.length - 1].textContent : "";
+  return items.length + "|" + first + "|" + last;
+}
+"""
+
+LIST_CHANGED_JS = """
+([selector, previous]) => {
+  const items = document.querySelectorAll(selector);
+  const first = items.length ? items[0].textContent : "";
+  const last = items.length ? items[items.length - 1].textContent : "";
+  return (items.length + "|" + first + "|" + last) !== previous;
+}
+"""
+
+# True once the number of matching items has been unchanged for quietMs (five times
+# as long for an empty list, which may still be loading). State lives on window,
+# keyed by a token so each wait starts fresh.
+LIST_STABLE_JS = """
+([selector, quietMs, token]) => {
+  const count = document.querySelectorAll(selector).length;
+  const now = Date.now();
+  const state = window.__listStableState;
+  if (!state || state.token !== token || state.count !== count) {
+    window.__listStableState = { token, count, since: now };
+    return false;
+  }
+  return now - state.since >= (count > 0 ? quietMs : quietMs * 5);
+}
+"""
+
+LIST_GROWN_JS = """
+([selector, previousCount]) => document.querySelectorAll(selector).length > previousCount
+"""
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class WaitPolicy:
+    """Central wait policy for the scrapers.
+
+    Waits on concrete page conditions (month tab content changed, list item count
+    stable, element present) instead of fixed sleeps, falling back to bounded
+    timeouts. Every wait is timed and recorded with its outcome so the defaults
+    can be tuned from real runs (see summary() and save()).
+
+    Sync pages use the plain methods; async pages use the ``*_async`` variants.
+    """
+
+    def __init__(self, timeouts=None, stable_quiet_ms=STABLE_QUIET_MS, poll_ms=POLL_MS):
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.stable_quiet_ms = stable_quiet_ms
+        self.poll_ms = poll_ms
+        self._samples = {}
+        self._lock = threading.Lock()
+        self._token = 0
+        self._listeners = []
+
+    def add_listener(self, listener):
+        """Call listener(name, seconds, outcome) for every recorded wait."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def record(self, name, seconds, outcome):
+        with self._lock:
+            self._samples.setdefault(name, []).append((seconds, outcome))
+        for listener in list(self._listeners):
+            listener(name, seconds, outcome)
+
+    def _next_token(self):
+        with self._lock:
+            self._token += 1
+            return self._token
+
+    @contextmanager
+    def timed(self, name):
+        """Time a block; a raised exception is recorded as a timeout and re-raised."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(name, time.perf_counter() - start, "timeout")
+            raise
+        self.record(name, time.perf_counter() - start, "ok")
+
+    def _wait_for_function(self, page, name, expression, arg):
+        """Wait until expression(arg) is truthy. Returns False on timeout instead of raising."""
+        try:
+            with self.timed(name):
+                page.wait_for_function(
+                    expression, arg=arg, timeout=self.timeouts[name], polling=self.poll_ms
+                )
+            return True
+        except Exception:
+            return False
+
+    async def _wait_for_function_async(self, page, name, expression, arg):
+        start = time.perf_counter()
+        try:
+            await page.wait_for_function(
+                expression, arg=arg, timeout=self.timeouts[name], polling=self.poll_ms
+            )
+        except Exception:
+            self.record(name, time.perf_counter() - start, "timeout")
+            return False
+        self.record(name, time.perf_counter() - start, "ok")
+        return True
+
+    # Sync API
+
+    def list_signature(self, page, selector):
+        """Snapshot of the visible list, used with wait_for_list_change."""
+        return page.evaluate(LIST_SIGNATURE_JS, selector)
+
+    def wait_for_selector(self, page, name, selector, **kwargs):
+        """Wait for selector with the policy's timeout for name. Returns the element or None."""
+        try:
+            with self.timed(name):
+                return page.wait_for_selector(selector, timeout=self.timeouts[name], **kwargs)
+        except Exception:
+            return None
+
+    def wait_for_list_change(self, page, selector, previous_signature):
+        """Wait until the list content differs from previous_signature (e.g. after a tab click)."""
+        return self._wait_for_function(page, "list_change", LIST_CHANGED_JS, [selector, previous_signature])
+
+    def wait_for_stable_count(self, page, selector):
+        """Wait until the number of list items stops changing."""
+        return self._wait_for_function(
+            page, "list_stable", LIST_STABLE_JS, [selector, self.stable_quiet_ms, self._next_token()]
+        )
+
+    def wait_for_growth(self, page, selector, previous_count):
+        """Wait until more than previous_count items are present (after "Load More")."""
+        grown = self._wait_for_function(page, "list_growth", LIST_GROWN_JS, [selector, previous_count])
+        if grown:
+            self.wait_for_stable_count(page, selector)
+        return grown
+
+    # Async API
+
+    async def list_signature_async(self, page, selector):
+        return await page.evaluate(LIST_SIGNATURE_JS, selector)
+
+    async def wait_for_selector_async(self, page, name, selector, **kwargs):
+        start = time.perf_counter()
+        try:
+            element = await page.wait_for_selector(selector, timeout=self.timeouts[name], **kwargs)
+        except Exception:
+            self.record(name, time.perf_counter() - start, "timeout")
+            return None
+        self.record(name, time.perf_counter() - start, "ok")
+        return element
+
+    async def wait_for_list_change_async(self, page, selector, previous_signature):
+        return await self._wait_for_function_async(
+            page, "list_change", LIST_CHANGED_JS, [selector, previous_signature]
+        )
+
+    async def wait_for_stable_count_async(self, page, selector):
+        return await self._wait_for_function_async(
+            page, "list_stable", LIST_STABLE_JS, [selector, self.stable_quiet_ms, self._next_token()]
+        )
+
+    async def wait_for_growth_async(self, page, selector, previous_count):
+        grown = await self._wait_for_function_async(
+            page, "list_growth", LIST_GROWN_JS, [selector, previous_count]
+        )
+        if grown:
+            await self.wait_for_stable_count_async(page, selector)
+        return grown
+
+    # Reporting
+
+    def summary(self):
+        """Per-wait statistics: count, timeouts, total/mean/p50/p95/max seconds."""
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+        summary = {}
+        for name, values in samples.items():
+            durations = sorted(seconds for seconds, _ in values)
+            summary[name] = {
+                "count": len(values),
+                "timeouts": sum(1 for _, outcome in values if outcome == "timeout"),
+                "totalSeconds": round(sum(durations), 3),
+                "meanSeconds": round(sum(durations) / len(durations), 3),
+                "p50Seconds": round(_percentile(durations, 0.5), 3),
+                "p95Seconds": round(_percentile(durations, 0.95), 3),
+                "maxSeconds": round(durations[-1], 3),
+                "timeoutMs": self.timeouts.get(name),
+            }
+        return summary
+
+    def save(self, filename):
+        """Write the summary and the raw samples to a JSON file for tuning."""
+        with self._lock:
+            raw = {name: [[round(seconds, 4), outcome] for seconds, outcome in values]
+                   for name, values in self._samples.items()}
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump({"summary": self.summary(), "samples": raw}, f, indent=2)
+
+
+# Shared by all scraping workers in the process
+wait_policy = WaitPolicy()
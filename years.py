@@ -0,0 +1,145 @@
+import json
+import os
+import re
+from datetime import date, datetime, timedelta
+
+from activity import month_key, parse_export_date, parse_month_key
+
+# One immutable file per finished year: <YEAR_DIR>/<YYYY>.json
+YEAR_DIR = os.getenv("YEAR_DIR", "years")
+# Days into the new year before a scrape of December may close the old one (late uploads land meanwhile)
+YEAR_CLOSE_GRACE_DAYS = int(os.getenv("YEAR_CLOSE_GRACE_DAYS", "7"))
+
+_YEAR_FILE = re.compile(r"^(\d{4})\.json$")
+
+
+def year_path(year, directory=YEAR_DIR):
+    return os.path.join(directory, f"{year}.json")
+
+
+def archived_years(directory=YEAR_DIR):
+    """Years that have been closed, i.e. that have an archive file."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return set()
+    return {int(match.group(1)) for match in map(_YEAR_FILE.match, names) if match}
+
+
+def load_year(year, directory=YEAR_DIR):
+    """{runner: activities} of a closed year."""
+    with open(year_path(year, directory), "r", encoding="utf-8") as f:
+        archive = json.load(f)
+    return {runner: runner_data["activities"] for runner, runner_data in archive["runners"].items()}
+
+
+def archive_year(year, runners, directory=YEAR_DIR):
+    """Write a closed year's {runner: activities} in the data.json layout. Existing archives are never replaced."""
+    path = year_path(year, directory)
+    if os.path.exists(path):
+        raise FileExistsError(f"{path} is closed and cannot be rewritten")
+    archive = {
+        "runners": {
+            runner: {
+                "name": runner,
+                "stats": {
+                    "totalActivities": len(activities),
+                    "totalDistance": round(sum(a["distance"] for a in activities if a["distance"]), 2),
+                    "activityTypes": sorted({a["type"] for a in activities}),
+                },
+                "activities": activities,
+            }
+            for runner, activities in sorted(runners.items())
+        },
+        "metadata": {
+            "year": year,
+            "closedAt": datetime.now().isoformat(),
+            "totalRunners": len(runners),
+            "totalActivities": sum(len(activities) for activities in runners.values()),
+        },
+    }
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(archive, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def activity_year(activity):
+    day = parse_export_date(activity.get("date"))
+    return day.year if day else None
+
+
+def activity_month(activity):
+    day = parse_export_date(activity.get("date"))
+    return month_key(day.year, day.month) if day else None
+
+
+def _closing_year(year, activities_data, existing, covered_months):
+    """{runner: activities} to archive for year, built month by month.
+
+    Months this run covered come from activities_data; every other month of
+    the year comes from existing for the runners it has, so a run that scanned
+    only December cannot archive a year holding only December.
+    """
+    runners = {}
+    for runner in set(activities_data) | set(existing):
+        activities = [
+            a for a in activities_data.get(runner, [])
+            if activity_year(a) == year and (runner not in existing or activity_month(a) in covered_months)
+        ]
+        activities.extend(
+            a for a in existing.get(runner, [])
+            if activity_year(a) == year and activity_month(a) not in covered_months
+        )
+        if activities:
+            runners[runner] = sorted(activities, key=lambda a: parse_export_date(a["date"]))
+    return runners
+
+
+def apply_year_archives(activities_data, covered_months=None, directory=YEAR_DIR, existing=None, today=None,
+                        grace_days=YEAR_CLOSE_GRACE_DAYS):
+    """Close finished years and make closed years authoritative, in place.
+
+    A past year is closed only by a scrape that covered its December for every
+    runner (covered_months holds the YYYY-MM keys scraped without failure), and
+    only grace_days or more into the following year. The January runs, which
+    still rescan December, close it once the grace period is over; export,
+    recompute and a scrape of other months never close anything. A closed
+    year's activities are written to <directory>/<YYYY>.json and never change
+    afterwards: for every closed year, the archived activities replace whatever
+    activities_data holds for it. activities_data keeps every year, closed or
+    not, since the dashboard reads them all from data.json.
+
+    A closing year is assembled per month (see _closing_year): covered
+    months from activities_data, the others from existing ({runner:
+    activities}, e.g. the previous data.json).
+
+    Returns:
+        tuple: (closed years, years newly closed by this call)
+    """
+    today = today or date.today()
+    covered_months = set(covered_months or [])
+    existing = existing or {}
+    covered_years = {
+        year for year, month in map(parse_month_key, covered_months)
+        if month == 12 and today >= date(year + 1, 1, 1) + timedelta(days=grace_days)
+    }
+    archived = archived_years(directory)
+
+    closing = []
+    for year in sorted(covered_years - archived):
+        runners = _closing_year(year, activities_data, existing, covered_months)
+        if runners:
+            archive_year(year, runners, directory)
+            closing.append(year)
+
+    closed = archived | set(closing)
+    if closed:
+        archives = {year: load_year(year, directory) for year in sorted(closed)}
+        for runner in set(activities_data) | {runner for runners in archives.values() for runner in runners}:
+            activities = [a for a in activities_data.get(runner, []) if activity_year(a) not in closed]
+            for runners in archives.values():
+                activities.extend(runners.get(runner, []))
+            activities_data[runner] = activities
+    return closed, closing